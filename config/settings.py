@@ -114,6 +114,13 @@ AUTH_PASSWORD_VALIDATORS = [
     { 'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator'},
 ]
 
+# Autenticación: el usuario se carga junto con su perfil en un solo SELECT (core/perfiles.py).
+# ModelBackend queda sólo para las sesiones iniciadas antes del cambio (guardan ese backend).
+AUTHENTICATION_BACKENDS = [
+    "core.perfiles.BackendConPerfil",
+    "django.contrib.auth.backends.ModelBackend",
+]
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -148,6 +155,29 @@ CLOUDINARY_CLOUD_NAME = os.getenv('CLOUDINARY_CLOUD_NAME')
 CLOUDINARY_API_KEY = os.getenv('CLOUDINARY_API_KEY')
 CLOUDINARY_API_SECRET = os.getenv('CLOUDINARY_API_SECRET')
 
+# --- Cache
+# Compartido por todos los workers de la máquina (cooldowns y límites de reenvío,
+# favoritos); ver core/cache_sqlite.py. CACHE_BACKEND=locmem vuelve al cache por proceso.
+if os.getenv("CACHE_BACKEND", "sqlite") == "locmem":
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "core.cache_sqlite.SQLiteCache",
+            "LOCATION": os.getenv("CACHE_PATH", str(BASE_DIR / "cache" / "cache.sqlite3")),
+            "OPTIONS": {"MAX_ENTRIES": int(os.getenv("CACHE_MAX_ENTRIES", "50000"))},
+        }
+    }
+
+# --- Límites de frecuencia (core/limites.py) para login, registro y donaciones
+LIMITES_FRECUENCIA_ACTIVOS = os.getenv("LIMITES_FRECUENCIA_ACTIVOS", "1") == "1"
+# Proxies de confianza delante de la app: la IP del cliente sale de X-Forwarded-For.
+# En Render hay uno (y es el valor por defecto ahí); con 0, REMOTE_ADDR sería la IP del proxy
+# para todos y los límites por IP serían globales
+LIMITES_PROXIES = int(os.getenv("LIMITES_PROXIES", "1" if "RENDER" in os.environ else "0"))
+# Tasas por endpoint que pisan las del decorador, ej. {"login": {"ip": "20/m", "campo": "5/m"}}
+LIMITES_FRECUENCIA = {}
+
 # --- Verificación de correo electrónico
 # Tiempo que el código es válido (en minutos)
 VERIFICATION_WINDOW_MINUTES = int(os.getenv("VERIFICATION_WINDOW_MINUTES", "15"))
@@ -155,6 +185,30 @@ VERIFICATION_WINDOW_MINUTES = int(os.getenv("VERIFICATION_WINDOW_MINUTES", "15")
 # Máximo de intentos permitidos antes de regenerar código
 VERIFICATION_MAX_TRIES = int(os.getenv("VERIFICATION_MAX_TRIES", "5"))
 
+# Purga (comando purgar_verificaciones): antigüedad en días de las cuentas nunca verificadas
+# que se borran, y filas por lote (cada lote es una transacción corta)
+VERIFICACION_PURGA_DIAS = int(os.getenv("VERIFICACION_PURGA_DIAS", "30"))
+VERIFICACION_PURGA_LOTE = int(os.getenv("VERIFICACION_PURGA_LOTE", "500"))
+
+# --- Idempotencia (header Idempotency-Key en las APIs de donación)
+# Horas durante las que un reintento con la misma clave recibe la respuesta original
+IDEMPOTENCIA_HORAS = int(os.getenv("IDEMPOTENCIA_HORAS", "24"))
+# Publicaciones que acepta como máximo un envío de donaciones por lote
+DONACIONES_LOTE_MAX = int(os.getenv("DONACIONES_LOTE_MAX", "20"))
+
+# --- Listados
+# Cantidad de comedores por página en el listado (paginación por cursor)
+COMEDORES_PAGE_SIZE = int(os.getenv("COMEDORES_PAGE_SIZE", "24"))
+# Cantidad de donaciones por página en el libro de donaciones
+DONACIONES_PAGE_SIZE = int(os.getenv("DONACIONES_PAGE_SIZE", "20"))
+# Resultados por página en el buscador, y cuántas páginas guarda en memoria cada proceso
+BUSCAR_PAGE_SIZE = int(os.getenv("BUSCAR_PAGE_SIZE", "12"))
+BUSCAR_CACHE_MAX = int(os.getenv("BUSCAR_CACHE_MAX", "500"))
+# Cada cuántos segundos se descartan las páginas cacheadas (las publicaciones vencen con la hora)
+BUSCAR_CACHE_SEGUNDOS = int(os.getenv("BUSCAR_CACHE_SEGUNDOS", "60"))
+# Cada cuánto el autocompletado revisa si otro proceso cambió comedores/artículos
+SUGERENCIAS_REFRESCO_SEGUNDOS = int(os.getenv("SUGERENCIAS_REFRESCO_SEGUNDOS", "60"))
+
 # Configuración de email
 INSTALLED_APPS += ["anymail"]
 
@@ -166,6 +220,20 @@ ANYMAIL = {
 
 DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL", "no-reply@example.com")
 
+# Outbox de correos (core/mail_queue.py, comando procesar_correos)
+# Correos por lote del worker
+EMAIL_OUTBOX_BATCH = int(os.getenv("EMAIL_OUTBOX_BATCH", "200"))
+# Mensajes que se mandan por una misma conexión SMTP antes de reabrirla
+EMAIL_ENVIO_CHUNK = int(os.getenv("EMAIL_ENVIO_CHUNK", "100"))
+# Favoritos que se encolan por transacción al avisar una publicación nueva
+DIFUSION_CHUNK = int(os.getenv("DIFUSION_CHUNK", "500"))
+# Intervalo mínimo entre resúmenes de donaciones para dueños que los activaron
+DONACIONES_RESUMEN_MINUTOS = int(os.getenv("DONACIONES_RESUMEN_MINUTOS", "60"))
+# Intentos antes de dejar un correo como fallido, y espera base/máxima entre reintentos (se duplica en cada fallo)
+EMAIL_OUTBOX_MAX_INTENTOS = int(os.getenv("EMAIL_OUTBOX_MAX_INTENTOS", "6"))
+EMAIL_OUTBOX_BACKOFF_SEGUNDOS = int(os.getenv("EMAIL_OUTBOX_BACKOFF_SEGUNDOS", "30"))
+EMAIL_OUTBOX_BACKOFF_MAX_SEGUNDOS = int(os.getenv("EMAIL_OUTBOX_BACKOFF_MAX_SEGUNDOS", "3600"))
+
 # --- Auth redirects
 LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'core:privada'
@@ -266,9 +334,27 @@ INSTALLED_APPS += [
     'haystack',
 ]
 
-HAYSTACK_CONNECTIONS = {
-    'default': {
-        'ENGINE': 'haystack.backends.whoosh_backend.WhooshEngine',
-        'PATH': BASE_DIR / 'whoosh_index',
-    },
-}
+# Backend del buscador:
+# - "whoosh": archivos en whoosh_index/ (locales a cada instancia)
+# - "db": en la misma base (FTS5 en SQLite, full-text en Postgres), compartido entre instancias
+BUSQUEDA_BACKEND = os.getenv("BUSQUEDA_BACKEND", "whoosh")
+
+if BUSQUEDA_BACKEND == "db":
+    HAYSTACK_CONNECTIONS = {
+        'default': {
+            'ENGINE': 'core.search_backend.DBSearchEngine',
+        },
+    }
+else:
+    HAYSTACK_CONNECTIONS = {
+        'default': {
+            # Whoosh con un searcher abierto por proceso, reabierto sólo si cambió el índice
+            'ENGINE': 'core.search_whoosh.PooledWhooshEngine',
+            'PATH': BASE_DIR / 'whoosh_index',
+        },
+    }
+
+# Los save/delete sólo encolan el cambio; lo aplica `manage.py procesar_indice_busqueda`
+HAYSTACK_SIGNAL_PROCESSOR = 'core.search_queue.ColaSignalProcessor'
+# Segundos sin avance tras los que otro worker retoma una reconstrucción del índice en curso
+BUSQUEDA_RECONSTRUCCION_VENCE_SEGUNDOS = int(os.getenv("BUSQUEDA_RECONSTRUCCION_VENCE_SEGUNDOS", "600"))
@@ -17,7 +17,7 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 from django.contrib.auth import views as auth_views
-from core.views import registro, custom_login, rebuild_index_view, robots_txt
+from core.views import registro, custom_login, rebuild_index_view, rebuild_index_status, robots_txt
 from django.conf import settings
 from django.conf.urls.static import static
 
@@ -36,6 +36,7 @@ urlpatterns = [
     path('signup/', registro, name='signup'),
     path('', include('core.urls')),
     path('rebuild_index/', rebuild_index_view, name='rebuild_index'),
+    path('rebuild_index/<int:job_id>/', rebuild_index_status, name='rebuild_index_status'),
     path('robots.txt', robots_txt, name='robots_txt'),
 ]
 
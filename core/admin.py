@@ -1,5 +1,10 @@
 from django.contrib import admin
-from .models import Comedor, UserProfile, Publicacion, PublicacionArticulo, Favoritos, Donacion, TipoPublicacion
+from .models import (
+    Comedor, UserProfile, Publicacion, PublicacionArticulo, Favoritos, Donacion, TipoPublicacion,
+    ReconstruccionIndice, CorreoPendiente, DifusionPublicacion,
+)
+from .difusion import reintentar_difusiones
+from .mail_queue import reintentar_fallidos
 
 # Register your models here.
 @admin.register(Comedor)
@@ -10,8 +15,8 @@ class ComedorAdmin(admin.ModelAdmin):
 
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
-    list_display = ['user', 'email_verified', 'activation_token']
-    list_filter = ['email_verified']
+    list_display = ['user', 'email_verified', 'resumen_donaciones', 'activation_token']
+    list_filter = ['email_verified', 'resumen_donaciones']
     search_fields = ['user__username', 'user__email']
     readonly_fields = ['activation_token']
 
@@ -61,4 +66,35 @@ class DonacionAdmin(admin.ModelAdmin):
 @admin.register(TipoPublicacion)
 class TipoPublicacionAdmin(admin.ModelAdmin):
     list_display = ('id', 'descripcion')
-    search_fields = ('descripcion',)
\ No newline at end of file
+    search_fields = ('descripcion',)
+
+@admin.register(ReconstruccionIndice)
+class ReconstruccionIndiceAdmin(admin.ModelAdmin):
+    list_display = ('id', 'estado', 'procesados', 'total', 'solicitado_por', 'creado', 'terminado')
+    list_filter = ('estado',)
+    readonly_fields = ('estado', 'total', 'procesados', 'error', 'solicitado_por', 'creado', 'iniciado', 'tomado', 'terminado')
+
+@admin.register(CorreoPendiente)
+class CorreoPendienteAdmin(admin.ModelAdmin):
+    list_display = ('id', 'destinatario', 'asunto', 'estado', 'intentos', 'proximo_intento', 'creado', 'enviado')
+    list_filter = ('estado',)
+    search_fields = ('destinatario', 'asunto')
+    readonly_fields = ('lote', 'tomado', 'creado', 'enviado', 'ultimo_error')
+    actions = ['reintentar']
+
+    @admin.action(description='Reintentar correos fallidos seleccionados')
+    def reintentar(self, request, queryset):
+        n = reintentar_fallidos(ids=list(queryset.values_list('id', flat=True)))
+        self.message_user(request, f"{n} correo(s) vuelven a la cola.")
+
+@admin.register(DifusionPublicacion)
+class DifusionPublicacionAdmin(admin.ModelAdmin):
+    list_display = ('id', 'publicacion', 'estado', 'encolados', 'intentos', 'proximo_intento', 'creado', 'terminado')
+    list_filter = ('estado',)
+    readonly_fields = ('ultimo_email', 'encolados', 'tomado', 'creado', 'terminado', 'ultimo_error')
+    actions = ['reintentar']
+
+    @admin.action(description='Reintentar difusiones fallidas seleccionadas')
+    def reintentar(self, request, queryset):
+        n = reintentar_difusiones(ids=list(queryset.values_list('id', flat=True)))
+        self.message_user(request, f"{n} difusión(es) vuelven a la cola.")
@@ -0,0 +1,149 @@
+# core/busqueda.py
+"""
+Resultados del buscador, paginados y con cache.
+
+Cada página pide al índice sólo su tramo de resultados y trae los comedores
+con un único in_bulk. Las páginas ya resueltas quedan en un LRU acotado en
+memoria del proceso; la clave incluye la generación del índice (el TOC de
+Whoosh), así que cualquier cambio aplicado por el worker las invalida sin
+coordinar procesos (o la versión del índice en base, con BUSQUEDA_BACKEND = "db").
+
+Las publicaciones vigentes dependen también de la hora, que el índice no ve
+cambiar: por eso la clave lleva además un tramo de BUSCAR_CACHE_SEGUNDOS y
+una publicación vencida deja de mostrarse, a lo sumo, al pasar al tramo siguiente.
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+from haystack import connections
+from haystack.query import SearchQuerySet
+
+from .models import Comedor, Publicacion
+from .search_indexes import fecha_indice
+
+BUSCAR_PAGE_SIZE = getattr(settings, "BUSCAR_PAGE_SIZE", 12)
+BUSCAR_CACHE_MAX = getattr(settings, "BUSCAR_CACHE_MAX", 500)
+BUSCAR_CACHE_SEGUNDOS = getattr(settings, "BUSCAR_CACHE_SEGUNDOS", 60)
+
+
+class _LRU:
+    """Diccionario acotado: al pasar `maximo` entradas se descarta la menos usada."""
+
+    def __init__(self, maximo: int):
+        self.maximo = maximo
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, clave):
+        with self._lock:
+            valor = self._datos.get(clave)
+            if valor is not None:
+                self._datos.move_to_end(clave)
+            return valor
+
+    def set(self, clave, valor) -> None:
+        with self._lock:
+            self._datos[clave] = valor
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.maximo:
+                self._datos.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._datos.clear()
+
+
+_cache = _LRU(BUSCAR_CACHE_MAX)
+
+
+def normalizar_consulta(query: str) -> str:
+    # Whoosh ya ignora mayúsculas y espacios extra; los acentos sí cambian el resultado
+    return " ".join(query.split()).casefold()
+
+
+def generacion_indice(using: str = "default"):
+    """Generación actual del índice, o None si el backend no la expone (y entonces no se cachea)."""
+    backend = connections[using].get_backend()
+    if hasattr(backend, "generacion"):
+        return backend.generacion()   # backend en base (core/search_backend.py)
+    if not getattr(backend, "setup_complete", True):
+        backend.setup()
+    index = getattr(backend, "index", None)
+    if index is None or not hasattr(index, "latest_generation"):
+        return None
+    return index.latest_generation()
+
+
+def _tramo(page: int):
+    inicio = (page - 1) * BUSCAR_PAGE_SIZE
+    return inicio, inicio + BUSCAR_PAGE_SIZE
+
+
+def _publicacion_desde_indice(resultado) -> dict:
+    """Arma la publicación sólo con los campos guardados (las fechas vuelven a UTC 'aware')."""
+    return {
+        "id": int(resultado.pk),
+        "titulo": resultado.titulo,
+        "articulos": resultado.articulos or [],
+        "comedor_id": resultado.comedor_id,
+        "comedor_nombre": resultado.comedor_nombre,
+        "comedor_barrio": resultado.comedor_barrio,
+        "fecha_inicio": timezone.make_aware(resultado.fecha_inicio, dt_timezone.utc) if resultado.fecha_inicio else None,
+        "fecha_fin": timezone.make_aware(resultado.fecha_fin, dt_timezone.utc) if resultado.fecha_fin else None,
+    }
+
+
+def _consultar_indice(query: str, page: int) -> dict:
+    inicio, fin = _tramo(page)
+
+    comedores_sqs = SearchQuerySet().models(Comedor).filter(content=query)
+    comedor_ids = [int(r.pk) for r in comedores_sqs[inicio:fin]]
+
+    # Publicaciones vigentes: se resuelven enteras desde el índice
+    ahora = fecha_indice(timezone.now())
+    publicaciones_sqs = (
+        SearchQuerySet().models(Publicacion)
+        .filter(content=query, fecha_inicio__lte=ahora, vence__gte=ahora)
+    )
+    publicaciones = [_publicacion_desde_indice(r) for r in publicaciones_sqs[inicio:fin]]
+
+    return {
+        "comedor_ids": comedor_ids,
+        "comedores_total": comedores_sqs.count(),
+        "publicaciones": publicaciones,
+        "publicaciones_total": publicaciones_sqs.count(),
+    }
+
+
+def buscar_pagina(query: str, page: int = 1) -> dict:
+    """
+    Devuelve la página `page` de resultados para `query`:
+    comedores (objetos del modelo, en el orden del índice), publicaciones vigentes
+    (dicts armados desde el índice), totales y si hay página siguiente.
+    """
+    page = max(page, 1)
+    generacion = generacion_indice()
+    tramo_hora = int(time.time() // max(BUSCAR_CACHE_SEGUNDOS, 1))
+    clave = (generacion, tramo_hora, normalizar_consulta(query), page)
+
+    datos = _cache.get(clave) if generacion is not None else None
+    if datos is None:
+        datos = _consultar_indice(query, page)
+        if generacion is not None:
+            _cache.set(clave, datos)
+
+    por_id = Comedor.objects.in_bulk(datos["comedor_ids"]) if datos["comedor_ids"] else {}
+    _, fin = _tramo(page)
+    return {
+        "comedores": [por_id[pk] for pk in datos["comedor_ids"] if pk in por_id],
+        "comedores_total": datos["comedores_total"],
+        "publicaciones": datos["publicaciones"],
+        "publicaciones_total": datos["publicaciones_total"],
+        "page": page,
+        "has_previous": page > 1,
+        "has_next": fin < max(datos["comedores_total"], datos["publicaciones_total"]),
+    }
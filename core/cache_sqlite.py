@@ -0,0 +1,217 @@
+# core/cache_sqlite.py
+"""
+Backend de cache de Django sobre un archivo SQLite, compartido por todos los
+workers de gunicorn de la máquina (LocMemCache es por proceso, así que cada
+worker tenía sus propios contadores de cooldown y reenvíos).
+
+Sólo usa la librería estándar. El archivo va en modo WAL, así las lecturas no
+bloquean a las escrituras. Los enteros se guardan tal cual (no serializados),
+de modo que incr() es un único UPDATE ... RETURNING atómico (SQLite >= 3.35);
+add() es un INSERT ... ON CONFLICT que sólo pisa entradas vencidas, también
+atómico entre procesos.
+
+    CACHES = {"default": {
+        "BACKEND": "core.cache_sqlite.SQLiteCache",
+        "LOCATION": "/ruta/a/cache.sqlite3",
+    }}
+
+Es compartido entre procesos de un mismo host; con varias máquinas hace falta
+un cache de red (Redis, Memcached) o el de base de datos de Django.
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+TABLA = "cache"
+_CULL_CADA = 200   # escrituras entre chequeos de MAX_ENTRIES
+
+
+def _serializar(valor):
+    # bool es int en Python, pero tiene que volver como bool
+    if isinstance(valor, int) and not isinstance(valor, bool):
+        return valor
+    return sqlite3.Binary(pickle.dumps(valor, pickle.HIGHEST_PROTOCOL))
+
+
+def _primera(cursor):
+    # fetchall() termina el statement: uno a medio leer deja abierta la transacción implícita
+    filas = cursor.fetchall()
+    return filas[0] if filas else None
+
+
+def _deserializar(valor):
+    if isinstance(valor, int):
+        return valor
+    return pickle.loads(valor)
+
+
+class SQLiteCache(BaseCache):
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._ruta = location
+        self._local = threading.local()
+        self._escrituras = 0
+        self._lock_cull = threading.Lock()
+
+    # --- conexión (una por hilo y por proceso: no se comparten tras un fork)
+
+    def _conexion(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        directorio = os.path.dirname(self._ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        conn = sqlite3.connect(self._ruta, timeout=10, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {TABLA} (clave TEXT PRIMARY KEY, valor BLOB, vence REAL)")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {TABLA}_vence ON {TABLA}(vence)")
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    @staticmethod
+    def _vigente():
+        return "(vence IS NULL OR vence > ?)"
+
+    # --- API de BaseCache
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        ahora = time.time()
+        cur = self._conexion().execute(
+            f"INSERT INTO {TABLA}(clave, valor, vence) VALUES (?, ?, ?) "
+            f"ON CONFLICT(clave) DO UPDATE SET valor = excluded.valor, vence = excluded.vence "
+            f"WHERE {TABLA}.vence IS NOT NULL AND {TABLA}.vence <= ?",
+            (key, _serializar(value), self.get_backend_timeout(timeout), ahora),
+        )
+        self._tal_vez_cull()
+        return cur.rowcount > 0
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        fila = _primera(self._conexion().execute(
+            f"SELECT valor FROM {TABLA} WHERE clave = ? AND {self._vigente()}", (key, time.time())
+        ))
+        return default if fila is None else _deserializar(fila[0])
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._conexion().execute(
+            f"INSERT INTO {TABLA}(clave, valor, vence) VALUES (?, ?, ?) "
+            f"ON CONFLICT(clave) DO UPDATE SET valor = excluded.valor, vence = excluded.vence",
+            (key, _serializar(value), self.get_backend_timeout(timeout)),
+        )
+        self._tal_vez_cull()
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cur = self._conexion().execute(
+            f"UPDATE {TABLA} SET vence = ? WHERE clave = ? AND {self._vigente()}",
+            (self.get_backend_timeout(timeout), key, time.time()),
+        )
+        return cur.rowcount > 0
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cur = self._conexion().execute(f"DELETE FROM {TABLA} WHERE clave = ?", (key,))
+        return cur.rowcount > 0
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        fila = _primera(self._conexion().execute(
+            f"SELECT 1 FROM {TABLA} WHERE clave = ? AND {self._vigente()}", (key, time.time())
+        ))
+        return fila is not None
+
+    def incr(self, key, delta=1, version=None):
+        """Suma `delta` en un único UPDATE (atómico entre procesos). ValueError si no existe."""
+        clave = self.make_and_validate_key(key, version=version)
+        conn = self._conexion()
+        fila = _primera(conn.execute(
+            f"UPDATE {TABLA} SET valor = valor + ? "
+            f"WHERE clave = ? AND {self._vigente()} AND typeof(valor) = 'integer' RETURNING valor",
+            (delta, clave, time.time()),
+        ))
+        if fila is not None:
+            return fila[0]
+
+        # No existe, venció, o guarda algo que no es un entero: se resuelve bajo el lock de escritura
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            fila = _primera(conn.execute(
+                f"SELECT valor FROM {TABLA} WHERE clave = ? AND {self._vigente()}", (clave, time.time())
+            ))
+            if fila is None:
+                raise ValueError("Key '%s' not found" % key)
+            nuevo = _deserializar(fila[0]) + delta
+            conn.execute(f"UPDATE {TABLA} SET valor = ? WHERE clave = ?", (_serializar(nuevo), clave))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return nuevo
+
+    def tomar_turno(self, key, intervalo_ms: int, rafaga_ms: int, version=None) -> tuple[bool, int]:
+        """
+        Balde de fichas (en su forma GCRA) en un solo upsert atómico: la entrada guarda el
+        "tiempo teórico de llegada" (TAT, en ms). Cada evento lo corre `intervalo_ms`; se
+        permite si no queda más de `rafaga_ms` por delante de ahora. Devuelve
+        (permitido, ms_de_espera_si_no). Lo usa core.limites.BaldeDeFichas.
+        """
+        clave = self.make_and_validate_key(key, version=version)
+        ahora_ms = int(time.time() * 1000)
+        vence = (ahora_ms + rafaga_ms) / 1000
+        tat = (
+            f"max(CASE WHEN typeof({TABLA}.valor) = 'integer' AND "
+            f"({TABLA}.vence IS NULL OR {TABLA}.vence > :ahora_s) THEN {TABLA}.valor ELSE 0 END, :ahora)"
+        )
+        conn = self._conexion()
+        fila = _primera(conn.execute(
+            f"INSERT INTO {TABLA}(clave, valor, vence) VALUES (:clave, :ahora + :intervalo, :vence) "
+            f"ON CONFLICT(clave) DO UPDATE SET valor = {tat} + :intervalo, vence = :vence "
+            f"WHERE {tat} + :intervalo - :ahora <= :rafaga "
+            f"RETURNING valor",
+            {"clave": clave, "ahora": ahora_ms, "ahora_s": ahora_ms / 1000, "intervalo": intervalo_ms,
+             "vence": vence, "rafaga": rafaga_ms},
+        ))
+        if fila is not None and fila[0] - ahora_ms <= rafaga_ms:
+            return (True, 0)
+        actual = _primera(conn.execute(f"SELECT valor FROM {TABLA} WHERE clave = ?", (clave,)))
+        tat_actual = actual[0] if actual and isinstance(actual[0], int) else ahora_ms
+        return (False, max(tat_actual + intervalo_ms - ahora_ms - rafaga_ms, 1))
+
+    def clear(self):
+        self._conexion().execute(f"DELETE FROM {TABLA}")
+
+    def close(self, **kwargs):
+        # Se mantiene la conexión del hilo entre requests (abrirla cuesta más que la consulta)
+        pass
+
+    # --- limpieza
+
+    def _tal_vez_cull(self):
+        self._escrituras += 1
+        if self._escrituras % _CULL_CADA:
+            return
+        if not self._lock_cull.acquire(blocking=False):
+            return
+        try:
+            conn = self._conexion()
+            conn.execute(f"DELETE FROM {TABLA} WHERE vence IS NOT NULL AND vence <= ?", (time.time(),))
+            total = _primera(conn.execute(f"SELECT COUNT(*) FROM {TABLA}"))[0]
+            if total > self._max_entries and self._cull_frequency:
+                # Igual que los backends de Django: se descarta 1/CULL_FREQUENCY, empezando por lo que vence antes
+                conn.execute(
+                    f"DELETE FROM {TABLA} WHERE clave IN ("
+                    f"SELECT clave FROM {TABLA} ORDER BY vence IS NULL, vence LIMIT ?)",
+                    (total // self._cull_frequency,),
+                )
+        finally:
+            self._lock_cull.release()
@@ -1,20 +1,10 @@
 # context_processors.py
-from django.contrib.auth.models import User
-from .models import UserProfile
+from .perfiles import perfil_de
 
 def email_verification_status(request):
     """
     Context processor para incluir el estado de verificación del email en todos los templates
+    (el perfil ya viene cargado con request.user: no agrega consultas)
     """
-    context = {}
-    
-    if request.user.is_authenticated:
-        try:
-            profile = request.user.userprofile
-            context['email_verified'] = profile.email_verified
-        except UserProfile.DoesNotExist:
-            context['email_verified'] = False
-    else:
-        context['email_verified'] = False
-    
-    return context
+    profile = perfil_de(request)
+    return {'email_verified': bool(profile and profile.email_verified)}
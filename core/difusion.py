@@ -0,0 +1,151 @@
+# core/difusion.py
+"""
+Aviso de publicaciones nuevas a los favoritos del comedor.
+
+Un comedor puede tener decenas de miles de seguidores, así que el request no
+los recorre: crea una DifusionPublicacion (en su misma transacción) y el
+worker de correos la procesa después.
+
+Los destinatarios salen de una sola consulta que ya filtra en SQL (email
+verificado, usuario activo, sin el autor, sin emails vacíos), ordenada por
+email y sin repetidos, leída con values_list + iterator(). Cada tramo de
+DIFUSION_CHUNK emails se encola en el outbox en la misma transacción que
+avanza el cursor (`ultimo_email`): si el worker muere a mitad de camino,
+la difusión sigue desde el último tramo confirmado, sin duplicar ni perder avisos.
+
+Si falla, vuelve a la cola con el mismo backoff que los correos (espera_reintento)
+y, tras EMAIL_OUTBOX_MAX_INTENTOS fallos seguidos sin avanzar, queda FALLIDA para
+revisarla desde el admin.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .mail_queue import MAX_INTENTOS, TOMADO_VENCE_SEGUNDOS, espera_reintento
+from .mail_service import EmailService
+from .models import DifusionPublicacion, Favoritos
+
+logger = logging.getLogger(__name__)
+
+DIFUSION_CHUNK = getattr(settings, "DIFUSION_CHUNK", 500)
+
+
+def difundir_publicacion(publicacion, autor=None) -> DifusionPublicacion:
+    """Programa el aviso de `publicacion` a los favoritos de su comedor (llamar dentro de la transacción)."""
+    return DifusionPublicacion.objects.create(publicacion=publicacion, autor=autor)
+
+
+def destinatarios(comedor_id: int, autor=None, desde: str = ""):
+    """Emails (ordenados, sin repetir) de los favoritos del comedor que deben recibir el aviso."""
+    qs = (
+        Favoritos.objects
+        .filter(
+            id_comedor_id=comedor_id,
+            id_usuario__email_verified=True,
+            id_usuario__user__is_active=True,
+            id_usuario__user__email__gt=desde,
+        )
+    )
+    if autor is not None:
+        qs = qs.exclude(id_usuario__user_id=autor.pk)
+        if autor.email:
+            qs = qs.exclude(id_usuario__user__email__iexact=autor.email.strip())
+    return (
+        qs.order_by("id_usuario__user__email")
+        .values_list("id_usuario__user__email", flat=True)
+        .distinct()
+    )
+
+
+def tomar_difusion(excluir=()) -> DifusionPublicacion | None:
+    """Reserva una difusión pendiente (o abandonada por un worker caído) con un UPDATE condicional."""
+    ahora = timezone.now()
+    disponibles = (
+        Q(estado=DifusionPublicacion.ESTADO_PENDIENTE, proximo_intento__lte=ahora)
+        | Q(estado=DifusionPublicacion.ESTADO_EN_CURSO, tomado__lt=ahora - timedelta(seconds=TOMADO_VENCE_SEGUNDOS))
+    )
+    candidatas = DifusionPublicacion.objects.filter(disponibles).exclude(pk__in=excluir).order_by("id")
+    for pk in candidatas.values_list("id", flat=True)[:5]:
+        tomadas = DifusionPublicacion.objects.filter(disponibles, pk=pk).update(
+            estado=DifusionPublicacion.ESTADO_EN_CURSO, tomado=ahora
+        )
+        if tomadas:
+            return DifusionPublicacion.objects.select_related("publicacion__id_comedor", "autor").get(pk=pk)
+    return None
+
+
+def _encolar_tramo(difusion: DifusionPublicacion, emails: list[str]) -> None:
+    publicacion = difusion.publicacion
+    with transaction.atomic():
+        EmailService.send_new_publication(
+            emails=emails,
+            comedor_nombre=publicacion.id_comedor.nombre,
+            titulo=publicacion.titulo,
+        )
+        difusion.ultimo_email = emails[-1]
+        difusion.encolados += len(emails)
+        difusion.intentos = 0   # avanzó: los fallos anteriores ya no cuentan
+        difusion.tomado = timezone.now()   # sigue viva: que otro worker no la retome
+        difusion.save(update_fields=["ultimo_email", "encolados", "intentos", "tomado"])
+
+
+def _registrar_fallo(difusion: DifusionPublicacion, error: Exception) -> None:
+    """Vuelve a la cola desde el último tramo confirmado, con backoff; o queda fallida."""
+    intentos = difusion.intentos + 1
+    cambios = {"intentos": intentos, "ultimo_error": f"{type(error).__name__}: {error}"[:2000]}
+    if intentos >= MAX_INTENTOS:
+        cambios["estado"] = DifusionPublicacion.ESTADO_FALLIDO
+        logger.exception("[difusion] Difusión #%s descartada tras %s intentos (encolados %s)",
+                         difusion.pk, intentos, difusion.encolados)
+    else:
+        cambios["estado"] = DifusionPublicacion.ESTADO_PENDIENTE
+        cambios["proximo_intento"] = timezone.now() + espera_reintento(intentos)
+        logger.warning("[difusion] Falló la difusión #%s (intento %s, encolados %s)",
+                       difusion.pk, intentos, difusion.encolados, exc_info=True)
+    DifusionPublicacion.objects.filter(pk=difusion.pk).update(**cambios)
+    for campo, valor in cambios.items():
+        setattr(difusion, campo, valor)
+
+
+def reintentar_difusiones(ids=None) -> int:
+    """Vuelve a poner en cola difusiones FALLIDAS (todas, o las de `ids`) con el contador en cero."""
+    qs = DifusionPublicacion.objects.filter(estado=DifusionPublicacion.ESTADO_FALLIDO)
+    if ids is not None:
+        qs = qs.filter(id__in=ids)
+    return qs.update(estado=DifusionPublicacion.ESTADO_PENDIENTE, intentos=0, proximo_intento=timezone.now())
+
+
+def ejecutar_difusion(difusion: DifusionPublicacion, chunk: int = DIFUSION_CHUNK) -> None:
+    """Encola los avisos de `difusion` desde su cursor, de a `chunk` emails por transacción."""
+    publicacion = difusion.publicacion
+    tramo = []
+    try:
+        emails = destinatarios(publicacion.id_comedor_id, difusion.autor, desde=difusion.ultimo_email)
+        for email in emails.iterator(chunk_size=chunk):
+            tramo.append(email)
+            if len(tramo) >= chunk:
+                _encolar_tramo(difusion, tramo)
+                tramo = []
+        if tramo:
+            _encolar_tramo(difusion, tramo)
+    except Exception as e:
+        _registrar_fallo(difusion, e)
+        return
+
+    difusion.estado = DifusionPublicacion.ESTADO_TERMINADO
+    difusion.terminado = timezone.now()
+    difusion.ultimo_error = ""
+    difusion.save(update_fields=["estado", "terminado", "ultimo_error"])
+
+
+def procesar_difusiones(chunk: int = DIFUSION_CHUNK) -> int:
+    """Ejecuta las difusiones pendientes, cada una a lo sumo una vez por llamada. Devuelve cuántas procesó."""
+    vistas = []
+    while (difusion := tomar_difusion(excluir=vistas)) is not None:
+        ejecutar_difusion(difusion, chunk=chunk)
+        vistas.append(difusion.pk)
+    return len(vistas)
@@ -0,0 +1,122 @@
+# core/export.py
+"""
+Exportación masiva de comedores (JSON Lines / CSV) pensada para streaming.
+
+Todo se recorre con values() + iterator(), así que la memoria no depende de
+la cantidad de filas. Las publicaciones vigentes y sus artículos se cruzan
+con los comedores haciendo un merge de tres cursores ordenados por comedor.
+"""
+import csv
+import json
+
+from .models import Comedor, Publicacion, PublicacionArticulo
+
+CHUNK_SIZE = 2000
+
+CAMPOS_COMEDOR = ['id', 'nombre', 'descripcion', 'barrio', 'tipo', 'capacidad', 'latitud', 'longitud', 'imagen']
+
+
+class _Agrupado:
+    """
+    Recorre un iterador ordenado por `clave` y entrega de a un grupo por vez,
+    avanzando en paralelo con el cursor de comedores (merge join en streaming).
+    """
+
+    def __init__(self, filas, clave):
+        self._filas = iter(filas)
+        self._clave = clave
+        self._siguiente = next(self._filas, None)
+
+    def tomar(self, valor):
+        """Descarta grupos anteriores a `valor` y devuelve las filas cuyo `clave` == `valor`."""
+        while self._siguiente is not None and self._siguiente[self._clave] < valor:
+            self._siguiente = next(self._filas, None)
+        grupo = []
+        while self._siguiente is not None and self._siguiente[self._clave] == valor:
+            grupo.append(self._siguiente)
+            self._siguiente = next(self._filas, None)
+        return grupo
+
+
+def iter_comedores(incluir_publicaciones: bool = False):
+    """Genera un dict por comedor, ordenado por id, opcionalmente con sus publicaciones vigentes."""
+    comedores = (
+        Comedor.objects
+        .order_by('id')
+        .values(*CAMPOS_COMEDOR)
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+    if not incluir_publicaciones:
+        yield from comedores
+        return
+
+    vigentes = Publicacion.objects.vigentes()
+    publicaciones = _Agrupado(
+        vigentes
+        .order_by('id_comedor_id', 'id')
+        .values('id', 'id_comedor_id', 'titulo', 'descripcion', 'fecha_inicio', 'fecha_fin')
+        .iterator(chunk_size=CHUNK_SIZE),
+        'id_comedor_id',
+    )
+    articulos = _Agrupado(
+        PublicacionArticulo.objects
+        .filter(id_publicacion__in=vigentes.values('id'))
+        .order_by('id_publicacion__id_comedor_id', 'id_publicacion_id', 'id')
+        .values('id_publicacion__id_comedor_id', 'id_publicacion_id', 'nombre_articulo')
+        .iterator(chunk_size=CHUNK_SIZE),
+        'id_publicacion__id_comedor_id',
+    )
+
+    for comedor in comedores:
+        pubs = publicaciones.tomar(comedor['id'])
+        arts = articulos.tomar(comedor['id'])
+        por_publicacion = {}
+        for art in arts:
+            por_publicacion.setdefault(art['id_publicacion_id'], []).append(art['nombre_articulo'])
+        comedor['publicaciones'] = [
+            {
+                'id': pub['id'],
+                'titulo': pub['titulo'],
+                'descripcion': pub['descripcion'],
+                'fecha_inicio': pub['fecha_inicio'],
+                'fecha_fin': pub['fecha_fin'],
+                'articulos': por_publicacion.get(pub['id'], []),
+            }
+            for pub in pubs
+        ]
+        yield comedor
+
+
+def _json_default(valor):
+    if hasattr(valor, 'isoformat'):
+        return valor.isoformat()
+    return str(valor)
+
+
+def stream_jsonl(filas):
+    for fila in filas:
+        yield json.dumps(fila, ensure_ascii=False, default=_json_default) + "\n"
+
+
+class _Eco:
+    """Pseudo-archivo para csv.writer: devuelve la línea en vez de escribirla."""
+
+    def write(self, valor):
+        return valor
+
+
+def stream_csv(filas, incluir_publicaciones: bool = False):
+    columnas = list(CAMPOS_COMEDOR)
+    if incluir_publicaciones:
+        columnas += ['publicaciones_vigentes', 'articulos']
+    writer = csv.writer(_Eco())
+    yield writer.writerow(columnas)
+    for fila in filas:
+        valores = [fila[c] for c in CAMPOS_COMEDOR]
+        if incluir_publicaciones:
+            pubs = fila['publicaciones']
+            valores += [
+                len(pubs),
+                "|".join(a for pub in pubs for a in pub['articulos']),
+            ]
+        yield writer.writerow(valores)
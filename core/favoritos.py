@@ -0,0 +1,45 @@
+# core/favoritos.py
+"""
+IDs de comedores favoritos del usuario logueado, como set.
+
+Se calculan una vez por request (memo en el request) y se guardan en cache
+por usuario; las señales de Favoritos invalidan la entrada al agregar o
+eliminar (al confirmar la transacción). Así marcar "es favorito" en un listado
+cuesta 0 o 1 consultas.
+"""
+from django.core.cache import cache
+
+from .models import Favoritos
+
+FAVORITOS_CACHE_TIMEOUT = 60 * 60
+
+
+def _cache_key(user_id: int) -> str:
+    return f"favoritos_ids:{user_id}"
+
+
+def ids_favoritos(request) -> frozenset[int]:
+    """Devuelve los ids de comedores favoritos de request.user (vacío si es anónimo)."""
+    if not request.user.is_authenticated:
+        return frozenset()
+
+    memo = getattr(request, "_favoritos_ids", None)
+    if memo is not None:
+        return memo
+
+    key = _cache_key(request.user.id)
+    ids = cache.get(key)
+    if ids is None:
+        ids = frozenset(
+            Favoritos.objects
+            .filter(id_usuario__user_id=request.user.id)
+            .values_list("id_comedor_id", flat=True)
+        )
+        cache.set(key, ids, timeout=FAVORITOS_CACHE_TIMEOUT)
+
+    request._favoritos_ids = ids
+    return ids
+
+
+def invalidar_favoritos(user_id: int) -> None:
+    cache.delete(_cache_key(user_id))
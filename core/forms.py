@@ -13,7 +13,7 @@ class ComedorForm(forms.ModelForm):
     """
     class Meta:
         model = Comedor
-        fields = ['nombre', 'descripcion', 'imagen', 'barrio', 'tipo', 'capacidad']
+        fields = ['nombre', 'descripcion', 'imagen', 'barrio', 'tipo', 'capacidad', 'latitud', 'longitud']
         widgets = {
             'nombre': forms.TextInput(attrs={
                 'class': 'form-control',
@@ -48,9 +48,26 @@ class ComedorForm(forms.ModelForm):
             'capacidad': forms.NumberInput(attrs={
                 'class': 'form-control',
                 'placeholder': 'Capacidad máxima de personas'
+            }),
+            'latitud': forms.NumberInput(attrs={
+                'class': 'form-control',
+                'step': 'any',
+                'placeholder': 'Ej: -34.6037'
+            }),
+            'longitud': forms.NumberInput(attrs={
+                'class': 'form-control',
+                'step': 'any',
+                'placeholder': 'Ej: -58.3816'
             })
         }
 
+    def clean(self):
+        cleaned = super().clean()
+        # Latitud y longitud van juntas: o las dos o ninguna
+        if (cleaned.get('latitud') is None) != (cleaned.get('longitud') is None):
+            raise ValidationError("Completá latitud y longitud, o dejá ambas vacías.")
+        return cleaned
+
 class CustomUserCreationForm(UserCreationForm):
     email = forms.EmailField(required=True, help_text='Requerido. Ingresa una dirección de email válida.')
     first_name = forms.CharField(max_length=30, required=True, help_text='Requerido.')
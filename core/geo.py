@@ -0,0 +1,113 @@
+# core/geo.py
+"""
+Búsqueda de comedores cercanos sin PostGIS.
+
+Cada comedor guarda en `geo_celda` la celda de una grilla de CELDA_GRADOS
+(~1 km) donde cae. Para buscar se piden sólo las celdas que tocan el
+círculo del radio (columna indexada, IN de pocas claves), recortadas a la
+caja de lat/lon que lo contiene, y la distancia exacta se calcula en Python
+sobre esos candidatos.
+"""
+import math
+
+from .models import Comedor
+
+CELDA_GRADOS = 0.01          # ~1,1 km de latitud
+KM_POR_GRADO = 111.32
+RADIO_TIERRA_KM = 6371.0
+MAX_CELDAS = 900             # 30x30 celdas; más que eso se filtra por caja de lat/lon
+RADIO_MAX_KM = 50.0
+
+
+def celda(lat: float | None, lon: float | None) -> str:
+    if lat is None or lon is None:
+        return ""
+    return f"{math.floor(lat / CELDA_GRADOS)}:{math.floor(lon / CELDA_GRADOS)}"
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp = p2 - p1
+    dl = math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * RADIO_TIERRA_KM * math.asin(math.sqrt(a))
+
+
+def _caja(lat: float, lon: float, radio_km: float):
+    dlat = radio_km / KM_POR_GRADO
+    dlon = radio_km / (KM_POR_GRADO * max(math.cos(math.radians(lat)), 0.01))
+    return lat - dlat, lat + dlat, lon - dlon, lon + dlon
+
+
+def _toca_circulo(lat: float, lon: float, radio_km: float, i: int, j: int) -> bool:
+    """¿La celda (i, j) tiene algún punto a menos de `radio_km`? (punto de la celda más cercano al centro)"""
+    cerca_lat = min(max(lat, i * CELDA_GRADOS), (i + 1) * CELDA_GRADOS)
+    cerca_lon = min(max(lon, j * CELDA_GRADOS), (j + 1) * CELDA_GRADOS)
+    return haversine_km(lat, lon, cerca_lat, cerca_lon) <= radio_km
+
+
+def _candidatos(queryset, lat: float, lon: float, radio_km: float):
+    """Filas (id, lat, lon) que pueden estar dentro del radio."""
+    lat_min, lat_max, lon_min, lon_max = _caja(lat, lon, radio_km)
+    i0, i1 = math.floor(lat_min / CELDA_GRADOS), math.floor(lat_max / CELDA_GRADOS)
+    j0, j1 = math.floor(lon_min / CELDA_GRADOS), math.floor(lon_max / CELDA_GRADOS)
+
+    # La caja de lat/lon va siempre: de las celdas del borde sólo se traen las filas dentro de ella
+    qs = queryset.filter(
+        latitud__range=(lat_min, lat_max),
+        longitud__range=(lon_min, lon_max),
+    )
+    if (i1 - i0 + 1) * (j1 - j0 + 1) <= MAX_CELDAS:
+        # Sólo las celdas que tocan el círculo (las esquinas de la caja quedan afuera)
+        celdas = [
+            f"{i}:{j}"
+            for i in range(i0, i1 + 1) for j in range(j0, j1 + 1)
+            if _toca_circulo(lat, lon, radio_km, i, j)
+        ]
+        qs = qs.filter(geo_celda__in=celdas)
+    return qs.values_list('id', 'latitud', 'longitud')
+
+
+def cercanos(lat: float, lon: float, k: int = 10, radio_km: float | None = None, queryset=None):
+    """
+    Devuelve hasta `k` pares (comedor, distancia_km) ordenados por distancia.
+    Con `radio_km` se limita a ese radio; sin él se agranda la búsqueda
+    (1, 2, 4... km) hasta juntar `k` resultados o llegar a RADIO_MAX_KM.
+    """
+    if queryset is None:
+        queryset = Comedor.objects.all()
+    queryset = queryset.exclude(geo_celda="")
+
+    radios = [min(radio_km, RADIO_MAX_KM)] if radio_km else []
+    if not radios:
+        r = 1.0
+        while r < RADIO_MAX_KM:
+            radios.append(r)
+            r *= 2
+        radios.append(RADIO_MAX_KM)
+
+    encontrados = []
+    for radio in radios:
+        encontrados = []
+        for pk, c_lat, c_lon in _candidatos(queryset, lat, lon, radio):
+            distancia = haversine_km(lat, lon, c_lat, c_lon)
+            if distancia <= radio:
+                encontrados.append((distancia, pk))
+        if len(encontrados) >= k:
+            break
+
+    encontrados.sort()
+    encontrados = encontrados[:k]
+    por_id = Comedor.objects.in_bulk([pk for _, pk in encontrados])
+    return [(por_id[pk], distancia) for distancia, pk in encontrados if pk in por_id]
+
+
+def parse_coordenadas(lat, lon):
+    """Convierte lat/lon de un request a float; devuelve (None, None) si no son válidas."""
+    try:
+        lat, lon = float(lat), float(lon)
+    except (TypeError, ValueError):
+        return None, None
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return None, None
+    return lat, lon
@@ -0,0 +1,98 @@
+# core/idempotencia.py
+"""
+Header Idempotency-Key para las APIs que crean cosas (donaciones).
+
+El modal reintenta el POST si la red falla o el usuario vuelve a hacer clic, y
+cada reintento creaba otra Donacion. Con @idempotente, el cliente manda una
+clave por operación y:
+
+- la primera vez la vista corre normalmente; si responde 2xx, la respuesta
+  se guarda (ClaveIdempotencia) en la MISMA transacción que lo que creó la
+  vista: o quedan las dos cosas o ninguna;
+- un reintento con la misma clave dentro de IDEMPOTENCIA_HORAS recibe la
+  respuesta guardada, con el header Idempotent-Replayed, sin volver a correr
+  la vista;
+- la misma clave con otro cuerpo es un error del cliente (422).
+
+La fila de la clave se inserta antes de correr la vista, así un reintento que
+llega mientras el original sigue en curso choca con la restricción única y,
+cuando el original confirma, recibe su respuesta. Las respuestas de error no
+se guardan: no crearon nada, así que repetirlas es seguro.
+Sin el header, la vista se comporta como siempre.
+"""
+import hashlib
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+
+from .models import ClaveIdempotencia
+
+VENTANA_HORAS = getattr(settings, "IDEMPOTENCIA_HORAS", 24)
+HEADER = "Idempotency-Key"
+
+
+class _NoGuardar(Exception):
+    """Respuesta que no es 2xx: se deshace la transacción (y con ella la clave)."""
+
+    def __init__(self, respuesta):
+        self.respuesta = respuesta
+
+
+def _vigente(usuario, clave: str):
+    limite = timezone.now() - timedelta(hours=VENTANA_HORAS)
+    return ClaveIdempotencia.objects.filter(usuario=usuario, clave=clave, creado__gte=limite).first()
+
+
+def _repetir(guardada: ClaveIdempotencia, huella: str):
+    if guardada.huella != huella:
+        return JsonResponse({"error": f"La {HEADER} ya se usó con otro pedido."}, status=422)
+    respuesta = HttpResponse(guardada.cuerpo, status=guardada.estado_http, content_type=guardada.tipo_contenido)
+    respuesta["Idempotent-Replayed"] = "true"
+    return respuesta
+
+
+def idempotente(vista):
+    """Decorador para vistas POST de usuarios logueados (va después de @login_required)."""
+    @wraps(vista)
+    def _wrapped_view(request, *args, **kwargs):
+        clave = (request.headers.get(HEADER) or "").strip()
+        if not clave:
+            return vista(request, *args, **kwargs)
+        if len(clave) > 255:
+            return JsonResponse({"error": f"{HEADER} demasiado larga (máximo 255 caracteres)."}, status=400)
+
+        huella = hashlib.sha256(request.body).hexdigest()
+        guardada = _vigente(request.user, clave)
+        if guardada is not None:
+            return _repetir(guardada, huella)
+
+        try:
+            with transaction.atomic():
+                # Las claves vencidas del usuario (incluida esta, si se reusa pasada la ventana)
+                ClaveIdempotencia.objects.filter(
+                    usuario=request.user, creado__lt=timezone.now() - timedelta(hours=VENTANA_HORAS)
+                ).delete()
+                registro = ClaveIdempotencia.objects.create(usuario=request.user, clave=clave, huella=huella)
+
+                respuesta = vista(request, *args, **kwargs)
+                if not 200 <= respuesta.status_code < 300:
+                    raise _NoGuardar(respuesta)
+
+                registro.estado_http = respuesta.status_code
+                registro.tipo_contenido = respuesta.get("Content-Type", "")
+                registro.cuerpo = respuesta.content.decode(respuesta.charset)
+                registro.save(update_fields=["estado_http", "tipo_contenido", "cuerpo"])
+        except _NoGuardar as e:
+            return e.respuesta
+        except IntegrityError:
+            # La misma clave entró en paralelo y el otro pedido ya confirmó
+            guardada = _vigente(request.user, clave)
+            if guardada is None:
+                raise
+            return _repetir(guardada, huella)
+        return respuesta
+    return _wrapped_view
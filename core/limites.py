@@ -0,0 +1,224 @@
+# core/limites.py
+"""
+Límites de frecuencia sobre el cache compartido (ver core/cache_sqlite.py).
+
+VentanaDeslizante cuenta eventos por clave en una ventana móvil de `ventana`
+segundos con el método de "ventana deslizante aproximada": un contador por
+tramo fijo (incr atómico) y el tramo anterior pesado por cuánto todavía se
+solapa con la ventana. Son dos claves por usuario, sin listas de timestamps,
+y no tiene el efecto borde de la ventana fija (el doble de eventos justo en
+el cambio de tramo).
+
+consumir() primero incrementa y después decide, así dos workers que llegan a
+la vez no pueden pasar los dos con el último lugar: si el estimado se pasa
+del límite, devuelve el lugar (decr) y rechaza.
+
+BaldeDeFichas y el decorador @limitar frenan ráfagas contra vistas caras
+(login, registro, donaciones) por IP, por usuario, por un campo del POST o
+para el endpoint entero. Se evalúan antes que la vista, así que un pedido
+rechazado no llega a hashear contraseñas ni a tocar la base: responde 429
+con Retry-After.
+"""
+import math
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse, JsonResponse
+from django.template.loader import render_to_string
+
+LIMITES_ACTIVOS = getattr(settings, "LIMITES_FRECUENCIA_ACTIVOS", True)
+LIMITES = getattr(settings, "LIMITES_FRECUENCIA", {})
+PROXIES = getattr(settings, "LIMITES_PROXIES", 0)
+
+_UNIDADES = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+class VentanaDeslizante:
+
+    def __init__(self, prefijo: str, limite: int, ventana: int, alias: str = "default"):
+        self.prefijo = prefijo
+        self.limite = limite
+        self.ventana = ventana
+        self.alias = alias
+
+    @property
+    def _cache(self):
+        return caches[self.alias]
+
+    def _tramo(self, ahora: float):
+        n = int(ahora // self.ventana)
+        transcurrido = (ahora - n * self.ventana) / self.ventana   # fracción del tramo actual
+        return n, transcurrido
+
+    def _clave(self, clave: str, n: int) -> str:
+        return f"{self.prefijo}:{clave}:{n}"
+
+    def _sumar(self, clave: str) -> int:
+        cache = self._cache
+        # Cada contador vive dos tramos: el actual y el siguiente, donde cuenta como "anterior"
+        cache.add(clave, 0, timeout=2 * self.ventana)
+        try:
+            return cache.incr(clave)
+        except ValueError:
+            # Venció entre el add y el incr
+            cache.add(clave, 0, timeout=2 * self.ventana)
+            return cache.incr(clave)
+
+    def _espera(self, anteriores: int, actuales: int, transcurrido: float) -> int:
+        """Segundos hasta que entraría un evento más."""
+        if actuales >= self.limite:
+            # Con el tramo actual lleno hay que esperar a que pase a ser el anterior y decaiga:
+            # en el tramo siguiente, actuales * (1 - t) + 1 <= limite
+            t_siguiente = 1 - (self.limite - 1) / actuales
+            return max(1, math.ceil((1 - transcurrido + t_siguiente) * self.ventana))
+        # anteriores * (1 - t) + actuales + 1 <= limite  =>  t >= 1 - (limite - actuales - 1) / anteriores
+        t_necesario = 1 - (self.limite - actuales - 1) / anteriores
+        return max(1, math.ceil((t_necesario - transcurrido) * self.ventana))
+
+    def estimado(self, clave: str, ahora: float | None = None) -> float:
+        """Eventos en la última ventana (estimados), sin consumir."""
+        n, transcurrido = self._tramo(ahora or time.time())
+        cache = self._cache
+        anteriores = cache.get(self._clave(clave, n - 1), 0)
+        actuales = cache.get(self._clave(clave, n), 0)
+        return anteriores * (1 - transcurrido) + actuales
+
+    def consumir(self, clave: str, ahora: float | None = None) -> tuple[bool, int]:
+        """
+        Registra un evento si entra en el límite. Devuelve (permitido, segundos_de_espera_si_no).
+        """
+        if self.limite <= 0:
+            return (True, 0)
+        n, transcurrido = self._tramo(ahora or time.time())
+        actual = self._clave(clave, n)
+        actuales = self._sumar(actual)
+        anteriores = self._cache.get(self._clave(clave, n - 1), 0)
+
+        if anteriores * (1 - transcurrido) + actuales > self.limite:
+            self._cache.decr(actual)
+            return (False, self._espera(anteriores, actuales - 1, transcurrido))
+        return (True, 0)
+
+    def devolver(self, clave: str, ahora: float | None = None) -> None:
+        """Deshace un consumir() exitoso (ej. la acción falló después de reservar el lugar)."""
+        n, _ = self._tramo(ahora or time.time())
+        try:
+            if self._cache.get(self._clave(clave, n), 0) > 0:
+                self._cache.decr(self._clave(clave, n))
+        except ValueError:
+            pass
+
+
+def parsear_tasa(tasa: str) -> tuple[int, int]:
+    """'5/m' -> (5, 60). También acepta '10/30s' (10 cada 30 segundos)."""
+    cantidad, _, periodo = tasa.partition("/")
+    periodo = periodo.strip() or "s"
+    multiplo = int(periodo[:-1]) if len(periodo) > 1 else 1
+    return int(cantidad), multiplo * _UNIDADES[periodo[-1]]
+
+
+class BaldeDeFichas:
+    """
+    Hasta `capacidad` eventos seguidos, que se reponen de a uno cada periodo/capacidad
+    segundos. Con SQLiteCache es un único upsert atómico (tomar_turno); con otro
+    backend se resuelve en el proceso (alcanza para LocMemCache, que es por proceso).
+    """
+    _lock = threading.Lock()
+
+    def __init__(self, prefijo: str, capacidad: int, periodo: int, alias: str = "default"):
+        self.prefijo = prefijo
+        self.capacidad = capacidad
+        self.intervalo_ms = max(1, int(periodo * 1000 / capacidad))
+        self.rafaga_ms = self.intervalo_ms * capacidad
+        self.alias = alias
+
+    def tomar(self, clave: str) -> tuple[bool, int]:
+        """Devuelve (permitido, segundos_de_espera_si_no)."""
+        cache = caches[self.alias]
+        clave = f"{self.prefijo}:{clave}"
+        if hasattr(cache, "tomar_turno"):
+            permitido, espera_ms = cache.tomar_turno(clave, self.intervalo_ms, self.rafaga_ms)
+        else:
+            with self._lock:
+                ahora_ms = int(time.time() * 1000)
+                tat = max(cache.get(clave, 0), ahora_ms) + self.intervalo_ms
+                permitido = tat - ahora_ms <= self.rafaga_ms
+                espera_ms = 0 if permitido else tat - ahora_ms - self.rafaga_ms
+                if permitido:
+                    cache.set(clave, tat, timeout=math.ceil(self.rafaga_ms / 1000))
+        return permitido, (0 if permitido else max(1, math.ceil(espera_ms / 1000)))
+
+
+def ip_cliente(request) -> str | None:
+    """
+    IP del cliente. Con LIMITES_PROXIES = n se toma la n-ésima desde la derecha de X-Forwarded-For.
+    None si no se puede saber (ej. al pedido le faltan saltos del proxy): REMOTE_ADDR sería la IP
+    del proxy, compartida por todos, y limitar por ella bloquearía a todos los clientes juntos.
+    """
+    if PROXIES:
+        reenviadas = [ip.strip() for ip in request.META.get("HTTP_X_FORWARDED_FOR", "").split(",") if ip.strip()]
+        return reenviadas[-PROXIES] if len(reenviadas) >= PROXIES else None
+    return request.META.get("REMOTE_ADDR") or None
+
+
+def _respuesta_429(espera: int, json: bool):
+    mensaje = f"Demasiados intentos. Probá de nuevo en {espera} segundo(s)."
+    if json:
+        respuesta = JsonResponse({"error": mensaje}, status=429)
+    else:
+        # Sin context processors: no tiene que tocar la sesión ni la base
+        respuesta = HttpResponse(render_to_string("429.html", {"mensaje": mensaje}), status=429)
+    respuesta["Retry-After"] = str(espera)
+    return respuesta
+
+
+def limitar(nombre: str, *, ip=None, usuario=None, campo=None, total=None,
+            metodos=("POST",), json=False):
+    """
+    Decorador de límites por balde de fichas. Cada criterio es una tasa ('5/m') o None:
+
+    - ip: por IP del cliente (no se aplica si no se la puede determinar, ver ip_cliente).
+    - campo: ("username", "5/m") -> por valor de un campo del POST (ej. la cuenta atacada).
+    - total: para el endpoint entero.
+    - usuario: por usuario logueado (se evalúa al final: leer request.user consulta la sesión).
+
+    LIMITES_FRECUENCIA[nombre] en settings pisa las tasas de acá (ej. {"login": {"ip": "20/m"}}).
+    Respuesta 429 con Retry-After, en JSON si json=True.
+    """
+    def decorador(vista):
+        configuradas = {"ip": ip, "campo": campo[1] if campo else None, "total": total, "usuario": usuario}
+        configuradas.update(LIMITES.get(nombre, {}))
+        baldes = {
+            criterio: BaldeDeFichas(f"rl:{nombre}:{criterio}", *parsear_tasa(tasa))
+            for criterio, tasa in configuradas.items() if tasa
+        }
+        nombre_campo = campo[0] if campo else None
+
+        def claves(request):
+            # Primero lo que sale gratis del request; el usuario al final
+            if "total" in baldes:
+                yield "total", "*"
+            if "ip" in baldes:
+                ip_real = ip_cliente(request)
+                if ip_real:
+                    yield "ip", ip_real
+            if "campo" in baldes and nombre_campo:
+                valor = (request.POST.get(nombre_campo) or "").strip().lower()
+                if valor:
+                    yield "campo", valor
+            if "usuario" in baldes and request.user.is_authenticated:
+                yield "usuario", str(request.user.pk)
+
+        @wraps(vista)
+        def _wrapped_view(request, *args, **kwargs):
+            if LIMITES_ACTIVOS and request.method in metodos:
+                for criterio, clave in claves(request):
+                    permitido, espera = baldes[criterio].tomar(clave)
+                    if not permitido:
+                        return _respuesta_429(espera, json)
+            return vista(request, *args, **kwargs)
+        return _wrapped_view
+    return decorador
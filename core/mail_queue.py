@@ -0,0 +1,166 @@
+# core/mail_queue.py
+"""
+Outbox de correos.
+
+- encolar() inserta un CorreoPendiente por destinatario. Se llama dentro de
+  la transacción del request: si el request hace rollback, el correo no sale;
+  si confirma, el correo queda persistido aunque el proceso muera.
+- procesar_correos() toma un lote (UPDATE condicional, así varios workers no
+  toman el mismo correo), lo envía y reprograma los que fallan con backoff
+  exponencial. Al llegar a EMAIL_OUTBOX_MAX_INTENTOS el correo queda FALLIDO
+  (dead letter) para revisarlo desde el admin.
+- El lote se manda como EmailMessage por una misma conexión del backend
+  (get_connection + send_messages), reabriéndola cada EMAIL_ENVIO_CHUNK
+  mensajes: un solo handshake SMTP por tramo en vez de uno por correo.
+
+Lo corre el comando `procesar_correos`, como proceso aparte de gunicorn.
+"""
+import logging
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import CorreoPendiente
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = getattr(settings, "EMAIL_OUTBOX_BATCH", 200)
+MAX_INTENTOS = getattr(settings, "EMAIL_OUTBOX_MAX_INTENTOS", 6)
+BACKOFF_SEGUNDOS = getattr(settings, "EMAIL_OUTBOX_BACKOFF_SEGUNDOS", 30)
+BACKOFF_MAX_SEGUNDOS = getattr(settings, "EMAIL_OUTBOX_BACKOFF_MAX_SEGUNDOS", 3600)
+# Un correo "enviando" más viejo que esto es de un worker que murió: se vuelve a tomar
+TOMADO_VENCE_SEGUNDOS = getattr(settings, "EMAIL_OUTBOX_TOMADO_VENCE_SEGUNDOS", 600)
+# Mensajes por conexión (muchos servidores SMTP cortan la sesión pasado cierto número)
+ENVIO_CHUNK = getattr(settings, "EMAIL_ENVIO_CHUNK", 100)
+
+
+def encolar(asunto: str, mensaje: str, destinatarios: list[str]) -> int:
+    """Deja un correo por destinatario en el outbox. Devuelve cuántos se encolaron."""
+    ahora = timezone.now()
+    correos = [
+        CorreoPendiente(destinatario=d.strip(), asunto=asunto[:255], mensaje=mensaje,
+                        proximo_intento=ahora, creado=ahora)
+        for d in destinatarios if (d or "").strip()
+    ]
+    CorreoPendiente.objects.bulk_create(correos, batch_size=500)
+    return len(correos)
+
+
+def espera_reintento(intentos: int) -> timedelta:
+    """Backoff exponencial: 30s, 60s, 120s, ... hasta BACKOFF_MAX_SEGUNDOS."""
+    return timedelta(seconds=min(BACKOFF_SEGUNDOS * 2 ** max(intentos - 1, 0), BACKOFF_MAX_SEGUNDOS))
+
+
+def tomar_lote(batch_size: int = BATCH_SIZE) -> list[CorreoPendiente]:
+    """Reserva hasta `batch_size` correos listos para enviar y los devuelve."""
+    ahora = timezone.now()
+    vencido = ahora - timedelta(seconds=TOMADO_VENCE_SEGUNDOS)
+    disponibles = (
+        Q(estado=CorreoPendiente.ESTADO_PENDIENTE, proximo_intento__lte=ahora)
+        | Q(estado=CorreoPendiente.ESTADO_ENVIANDO, tomado__lt=vencido)
+    )
+    ids = list(
+        CorreoPendiente.objects.filter(disponibles)
+        .order_by("proximo_intento", "id")
+        .values_list("id", flat=True)[:batch_size]
+    )
+    if not ids:
+        return []
+
+    lote = uuid.uuid4().hex
+    CorreoPendiente.objects.filter(disponibles, id__in=ids).update(
+        estado=CorreoPendiente.ESTADO_ENVIANDO, lote=lote, tomado=ahora
+    )
+    return list(CorreoPendiente.objects.filter(lote=lote, estado=CorreoPendiente.ESTADO_ENVIANDO).order_by("id"))
+
+
+def _mensaje(correo: CorreoPendiente, conexion) -> EmailMessage:
+    from_email = getattr(settings, "DEFAULT_FROM_EMAIL", "no-reply@localhost")
+    return EmailMessage(correo.asunto, correo.mensaje, from_email, [correo.destinatario], connection=conexion)
+
+
+def enviar_lote(correos: list[CorreoPendiente], chunk: int = ENVIO_CHUNK) -> dict:
+    """
+    Envía `correos` reutilizando la conexión del backend, `chunk` mensajes por conexión.
+    Devuelve {pk: None si salió, o la excepción si falló}. Cada mensaje se manda con su
+    propio send_messages([m]) sobre la conexión abierta, así un rechazo se atribuye a
+    ese correo y no se reenvían los que ya salieron.
+    """
+    resultados = {}
+    chunk = max(chunk, 1)
+    for i in range(0, len(correos), chunk):
+        parte = correos[i:i + chunk]
+        conexion = get_connection(fail_silently=False)
+        try:
+            conexion.open()
+        except Exception as e:
+            resultados.update((correo.pk, e) for correo in parte)
+            continue
+        try:
+            for n, correo in enumerate(parte):
+                try:
+                    conexion.send_messages([_mensaje(correo, conexion)])
+                except Exception as e:
+                    resultados[correo.pk] = e
+                    # Tras un error la sesión puede haber quedado rota: se reabre para el resto
+                    conexion.close()
+                    try:
+                        conexion.open()
+                    except Exception as e_open:
+                        resultados.update((c.pk, e_open) for c in parte[n + 1:])
+                        break
+                else:
+                    resultados[correo.pk] = None
+        finally:
+            conexion.close()
+    return resultados
+
+
+def _registrar_fallo(correo: CorreoPendiente, error: Exception) -> None:
+    correo.intentos += 1
+    correo.ultimo_error = f"{type(error).__name__}: {error}"[:2000]
+    if correo.intentos >= MAX_INTENTOS:
+        correo.estado = CorreoPendiente.ESTADO_FALLIDO
+        logger.error("[mail_queue] Correo #%s a %s descartado tras %s intentos: %s",
+                     correo.pk, correo.destinatario, correo.intentos, correo.ultimo_error)
+    else:
+        correo.estado = CorreoPendiente.ESTADO_PENDIENTE
+        correo.proximo_intento = timezone.now() + espera_reintento(correo.intentos)
+        logger.warning("[mail_queue] Falló correo #%s a %s (intento %s): %s",
+                       correo.pk, correo.destinatario, correo.intentos, correo.ultimo_error)
+    correo.save(update_fields=["estado", "intentos", "ultimo_error", "proximo_intento"])
+
+
+def procesar_correos(batch_size: int = BATCH_SIZE, chunk: int = ENVIO_CHUNK) -> tuple[int, int]:
+    """Envía un lote del outbox. Devuelve (enviados, fallidos en este lote)."""
+    lote = tomar_lote(batch_size)
+    if not lote:
+        return 0, 0
+
+    resultados = enviar_lote(lote, chunk=chunk)
+    enviados, fallidos = [], 0
+    for correo in lote:
+        error = resultados.get(correo.pk)
+        if error is None:
+            enviados.append(correo.pk)
+        else:
+            _registrar_fallo(correo, error)
+            fallidos += 1
+
+    if enviados:
+        CorreoPendiente.objects.filter(id__in=enviados).update(
+            estado=CorreoPendiente.ESTADO_ENVIADO, enviado=timezone.now(), ultimo_error=""
+        )
+    return len(enviados), fallidos
+
+
+def reintentar_fallidos(ids=None) -> int:
+    """Vuelve a poner en cola correos FALLIDOS (todos, o los de `ids`) con el contador en cero."""
+    qs = CorreoPendiente.objects.filter(estado=CorreoPendiente.ESTADO_FALLIDO)
+    if ids is not None:
+        qs = qs.filter(id__in=ids)
+    return qs.update(estado=CorreoPendiente.ESTADO_PENDIENTE, intentos=0, proximo_intento=timezone.now())
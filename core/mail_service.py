@@ -1,19 +1,16 @@
 # core/mail_service.py
-from django.core.mail import send_mail
-from django.conf import settings
+from core import mail_queue
 
 class EmailService:
+    """
+    Arma los correos de la aplicación y los deja en el outbox (core/mail_queue.py).
+    Ningún método envía en el momento: llamalos dentro de la transacción del request
+    y el comando `procesar_correos` los entrega cuando se confirma.
+    """
+
     @staticmethod
     def send_email(subject: str, message: str, recipients: list[str]):
-        from_email = getattr(settings, "DEFAULT_FROM_EMAIL", "no-reply@localhost")
-        for recipient in recipients:
-            send_mail(
-                subject,
-                message,
-                from_email,
-                [recipient],
-                fail_silently=False,
-            )
+        return mail_queue.encolar(subject, message, recipients)
 
     @staticmethod
     def send_verification(email: str, code: str, minutos: int = 15):
@@ -59,3 +56,49 @@ class EmailService:
         )
 
         EmailService.send_email(subject, message, [email])
+
+    @staticmethod
+    def send_new_donations(email: str, comedor_nombre: str, donante: str, publicaciones: list[tuple[str, list[str]]]):
+        """
+        Una sola notificación para varias donaciones del mismo donante al mismo comedor
+        (envío por lote). Cada elemento de `publicaciones`: (titulo, articulos).
+        """
+        subject = f"Nuevas donaciones recibidas en {comedor_nombre}"
+
+        detalle = "\n\n".join(
+            f"📦 {titulo}\n" + "\n".join(f"• {a}" for a in articulos)
+            for titulo, articulos in publicaciones
+        )
+        message = (
+            f"Hola,\n\n"
+            f"{donante} te envió donaciones para {len(publicaciones)} publicaciones de tu comedor '{comedor_nombre}'.\n\n"
+            f"🧺 Artículos donados:\n\n{detalle}\n\n"
+            f"¡Gracias por seguir ayudando a la comunidad!\n\n"
+            f"Equipo Comedores Comunitarios"
+        )
+
+        EmailService.send_email(subject, message, [email])
+
+    @staticmethod
+    def send_donation_digest(email: str, nombre: str, filas: list[dict]):
+        """
+        Resumen periódico de donaciones para dueños que lo activaron.
+        Cada fila: {"comedor", "publicacion", "donaciones", "articulos"}.
+        """
+        total = sum(f["donaciones"] for f in filas)
+        subject = f"Resumen: recibiste {total} donación(es)"
+
+        detalle = "\n".join(
+            f"• {f['comedor']} – {f['publicacion']}: {f['donaciones']} donación(es), {f['articulos']} artículo(s)"
+            for f in filas
+        )
+        message = (
+            f"Hola {nombre},\n\n"
+            f"Desde el último resumen recibiste {total} donación(es) en tus comedores:\n\n"
+            f"{detalle}\n\n"
+            f"Podés ver el detalle de cada una en el libro de donaciones.\n\n"
+            f"¡Gracias por seguir ayudando a la comunidad!\n\n"
+            f"Equipo Comedores Comunitarios"
+        )
+
+        EmailService.send_email(subject, message, [email])
@@ -0,0 +1,125 @@
+import random
+import shutil
+import statistics
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from haystack import connections
+from haystack.query import SearchQuerySet
+
+from core.models import Comedor, Publicacion, PublicacionArticulo, TipoPublicacion
+
+
+class _Rollback(Exception):
+    pass
+
+
+PALABRAS = [
+    "olla", "popular", "merendero", "esperanza", "sol", "barrio", "unidos", "caritas",
+    "san", "martin", "rayito", "luz", "madres", "vecinos", "copa", "leche",
+]
+ARTICULOS = [
+    "Leche en polvo", "Arroz", "Fideos", "Aceite", "Azúcar", "Yerba", "Harina",
+    "Lentejas", "Pañales", "Abrigo", "Garrafa", "Puré de tomate",
+]
+BARRIOS = ["Palermo", "Flores", "Boedo", "Constitución", "Barracas", "La Boca", "Lugano", "Once"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara el backend Whoosh con el backend en base (FTS5 / Postgres): tiempo de armado "
+        "del índice y latencia de consultas, con datos de prueba que se descartan al final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--comedores", type=int, default=20_000)
+        parser.add_argument("--consultas", type=int, default=200)
+        parser.add_argument("--lote", type=int, default=1000, help="Documentos por update() al indexar")
+        parser.add_argument("--seed", type=int, default=42)
+
+    def _crear_datos(self, rnd, n):
+        tipo = TipoPublicacion.objects.first() or TipoPublicacion.objects.create(descripcion="Benchmark")
+        comedores = [
+            Comedor(
+                nombre=" ".join(rnd.sample(PALABRAS, 3)).title(),
+                descripcion=" ".join(rnd.choices(PALABRAS, k=12)),
+                barrio=rnd.choice(BARRIOS), tipo="Otro", capacidad=50,
+            )
+            for _ in range(n)
+        ]
+        Comedor.objects.bulk_create(comedores, batch_size=2000)
+        publicaciones = [
+            Publicacion(id_comedor=c, titulo="Necesitamos ayuda", id_tipo_publicacion=tipo)
+            for c in comedores[: n // 2]
+        ]
+        Publicacion.objects.bulk_create(publicaciones, batch_size=2000)
+        PublicacionArticulo.objects.bulk_create(
+            [
+                PublicacionArticulo(id_publicacion=p, nombre_articulo=a)
+                for p in publicaciones
+                for a in rnd.sample(ARTICULOS, 2)
+            ],
+            batch_size=2000,
+        )
+
+    def _indexar(self, alias, lote):
+        backend = connections[alias].get_backend()
+        unified = connections[alias].get_unified_index()
+        backend.clear()
+        t0 = time.perf_counter()
+        for model in unified.get_indexed_models():
+            index = unified.get_index(model)
+            qs = index.index_queryset(using=alias).order_by("pk")
+            ultimo = 0
+            while True:
+                objs = list(qs.filter(pk__gt=ultimo)[:lote])
+                if not objs:
+                    break
+                backend.update(index, objs)
+                ultimo = objs[-1].pk
+        return time.perf_counter() - t0
+
+    def _consultar(self, alias, consultas):
+        tiempos = []
+        for q in consultas:
+            t = time.perf_counter()
+            sqs = SearchQuerySet(using=alias).models(Comedor).filter(content=q)
+            list(sqs[:12])
+            sqs.count()
+            tiempos.append((time.perf_counter() - t) * 1000)
+        tiempos.sort()
+        p99 = tiempos[min(len(tiempos) - 1, int(len(tiempos) * 0.99))]
+        return statistics.mean(tiempos), statistics.median(tiempos), p99
+
+    def handle(self, *args, **options):
+        rnd = random.Random(options["seed"])
+        directorio = tempfile.mkdtemp(prefix="benchmark_whoosh_")
+        connections.connections_info["benchmark_whoosh"] = {
+            "ENGINE": "haystack.backends.whoosh_backend.WhooshEngine",
+            "PATH": directorio,
+        }
+        connections.connections_info["benchmark_db"] = {"ENGINE": "core.search_backend.DBSearchEngine"}
+
+        consultas = [rnd.choice(PALABRAS) for _ in range(options["consultas"] // 2)]
+        consultas += [" ".join(rnd.sample(PALABRAS, 2)) for _ in range(options["consultas"] - len(consultas))]
+
+        try:
+            with transaction.atomic():
+                t0 = time.perf_counter()
+                self._crear_datos(rnd, options["comedores"])
+                self.stdout.write(f"Datos de prueba: {options['comedores']} comedores en {time.perf_counter() - t0:.2f}s")
+
+                for alias, nombre in (("benchmark_whoosh", "Whoosh"), ("benchmark_db", "Base (FTS)")):
+                    armado = self._indexar(alias, options["lote"])
+                    media, mediana, p99 = self._consultar(alias, consultas)
+                    self.stdout.write(
+                        f"{nombre:>11}: índice armado en {armado:.2f}s | {len(consultas)} consultas: "
+                        f"media {media:.2f} ms, mediana {mediana:.2f} ms, p99 {p99:.2f} ms"
+                    )
+                raise _Rollback
+        except _Rollback:
+            self.stdout.write("Datos de prueba descartados.")
+        finally:
+            shutil.rmtree(directorio, ignore_errors=True)
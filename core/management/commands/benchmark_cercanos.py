@@ -0,0 +1,66 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.geo import celda, cercanos
+from core.models import Comedor
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide la búsqueda de comedores cercanos con N comedores de prueba repartidos en CABA. "
+        "Todo corre dentro de una transacción que se descarta al final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--comedores", type=int, default=50_000)
+        parser.add_argument("--consultas", type=int, default=200)
+        parser.add_argument("--k", type=int, default=10)
+        parser.add_argument("--radio", type=float, default=None, help="Radio en km (por defecto, k vecinos)")
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        rnd = random.Random(options["seed"])
+        # Caja aproximada de la Ciudad de Buenos Aires
+        lat_min, lat_max, lon_min, lon_max = -34.705, -34.527, -58.531, -58.335
+
+        try:
+            with transaction.atomic():
+                t0 = time.perf_counter()
+                lote = []
+                for i in range(options["comedores"]):
+                    lat = rnd.uniform(lat_min, lat_max)
+                    lon = rnd.uniform(lon_min, lon_max)
+                    lote.append(Comedor(
+                        nombre=f"Benchmark {i}", descripcion="-", barrio="Benchmark", tipo="Otro",
+                        capacidad=50, latitud=lat, longitud=lon, geo_celda=celda(lat, lon),
+                    ))
+                Comedor.objects.bulk_create(lote, batch_size=2000)
+                self.stdout.write(f"Insertados {len(lote)} comedores en {time.perf_counter() - t0:.2f}s")
+
+                tiempos = []
+                for _ in range(options["consultas"]):
+                    lat = rnd.uniform(lat_min, lat_max)
+                    lon = rnd.uniform(lon_min, lon_max)
+                    t = time.perf_counter()
+                    resultados = cercanos(lat, lon, k=options["k"], radio_km=options["radio"])
+                    tiempos.append((time.perf_counter() - t) * 1000)
+                    assert options["radio"] or len(resultados) == options["k"]
+
+                tiempos.sort()
+                p99 = tiempos[min(len(tiempos) - 1, int(len(tiempos) * 0.99))]
+                self.stdout.write(
+                    f"{options['consultas']} consultas (k={options['k']}, radio={options['radio']}): "
+                    f"media {statistics.mean(tiempos):.2f} ms, mediana {statistics.median(tiempos):.2f} ms, "
+                    f"p99 {p99:.2f} ms"
+                )
+                raise _Rollback
+        except _Rollback:
+            self.stdout.write("Datos de prueba descartados.")
@@ -0,0 +1,114 @@
+import socketserver
+import threading
+import time
+
+from django.core.mail import send_mail
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from core.mail_queue import ENVIO_CHUNK, enviar_lote
+from core.models import CorreoPendiente
+
+
+class _SesionSMTP(socketserver.StreamRequestHandler):
+    """SMTP mínimo: acepta todo y descarta los mensajes. Cuenta sesiones y mensajes."""
+
+    def _responder(self, linea):
+        self.wfile.write(linea.encode() + b"\r\n")
+
+    def handle(self):
+        servidor = self.server
+        time.sleep(servidor.latencia)   # handshake (TCP + TLS + saludo) de un servidor real
+        servidor.sesiones += 1
+        self._responder("220 benchmark ESMTP")
+        while True:
+            linea = self.rfile.readline()
+            if not linea:
+                return
+            comando = linea.decode(errors="replace").strip().upper()
+            if comando.startswith("EHLO"):
+                self._responder("250-benchmark")
+                self._responder("250 8BITMIME")
+            elif comando.startswith("DATA"):
+                self._responder("354 fin con <CRLF>.<CRLF>")
+                while self.rfile.readline() not in (b".\r\n", b".\n", b""):
+                    pass
+                servidor.mensajes += 1
+                self._responder("250 OK")
+            elif comando.startswith("QUIT"):
+                self._responder("221 chau")
+                return
+            else:   # HELO, MAIL, RCPT, RSET, NOOP
+                self._responder("250 OK")
+
+
+class _ServidorSMTP(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, latencia):
+        super().__init__(("127.0.0.1", 0), _SesionSMTP)
+        self.latencia = latencia
+        self.sesiones = 0
+        self.mensajes = 0
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide mensajes/segundo contra un SMTP local de prueba: un send_mail por destinatario "
+        "(envío anterior) contra el envío por lotes del outbox, que reutiliza la conexión."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--mensajes", type=int, default=2000)
+        parser.add_argument("--chunk", type=int, default=ENVIO_CHUNK, help="Mensajes por conexión")
+        parser.add_argument(
+            "--latencia-ms", type=float, default=20.0,
+            help="Demora simulada al abrir cada sesión SMTP (0 = sólo el costo local)",
+        )
+
+    def _medir(self, servidor, nombre, funcion, n):
+        servidor.sesiones = servidor.mensajes = 0
+        t0 = time.perf_counter()
+        funcion()
+        duracion = time.perf_counter() - t0
+        self.stdout.write(
+            f"{nombre:>22}: {servidor.mensajes}/{n} mensajes en {duracion:.2f}s "
+            f"({servidor.mensajes / duracion:,.0f} msg/s, {servidor.sesiones} conexiones)"
+        )
+
+    def handle(self, *args, **options):
+        n = options["mensajes"]
+        servidor = _ServidorSMTP(options["latencia_ms"] / 1000)
+        hilo = threading.Thread(target=servidor.serve_forever, daemon=True)
+        hilo.start()
+        host, port = servidor.server_address
+
+        # Correos sin guardar: se mide sólo el envío, no la base
+        correos = [
+            CorreoPendiente(pk=i, destinatario=f"favorito{i}@example.com",
+                            asunto="Nueva publicación en Comedor de prueba", mensaje="Hola!\n" * 20)
+            for i in range(1, n + 1)
+        ]
+
+        def uno_por_destinatario():
+            for correo in correos:
+                send_mail(correo.asunto, correo.mensaje, "no-reply@example.com", [correo.destinatario])
+
+        def por_lotes():
+            errores = [e for e in enviar_lote(correos, chunk=options["chunk"]).values() if e is not None]
+            if errores:
+                self.stderr.write(f"{len(errores)} errores, ej.: {errores[0]!r}")
+
+        smtp = dict(
+            EMAIL_BACKEND="django.core.mail.backends.smtp.EmailBackend",
+            EMAIL_HOST=host, EMAIL_PORT=port, EMAIL_USE_TLS=False, EMAIL_USE_SSL=False,
+            EMAIL_HOST_USER="", EMAIL_HOST_PASSWORD="", EMAIL_TIMEOUT=10,
+        )
+        try:
+            with override_settings(**smtp):
+                self._medir(servidor, "send_mail por correo", uno_por_destinatario, n)
+                self._medir(servidor, f"lotes de {options['chunk']}", por_lotes, n)
+        finally:
+            servidor.shutdown()
+            servidor.server_close()
@@ -0,0 +1,130 @@
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from core import verificacion
+from core.models import UserProfile
+
+CODIGO = "123456"
+
+
+def _verificar_anterior(email: str, code: str) -> str:
+    """El flujo anterior de verificar_email: select_for_update + F() + refresh_from_db."""
+    with transaction.atomic():
+        user = User.objects.select_for_update().filter(email__iexact=email).first()
+        if not user:
+            return verificacion.SIN_CUENTA
+        profile, _ = UserProfile.objects.select_for_update().get_or_create(user=user)
+        if profile.email_verified:
+            return verificacion.YA_VERIFICADO
+        if not profile.verification_expires_at or timezone.now() > profile.verification_expires_at:
+            return verificacion.VENCIDO
+        if profile.email_verification_code != code:
+            profile.verification_tries = F("verification_tries") + 1
+            profile.save(update_fields=["verification_tries"])
+            profile.refresh_from_db(fields=["verification_tries"])
+            if profile.verification_tries >= verificacion.MAX_TRIES:
+                profile.verification_tries = 0
+                profile.save(update_fields=["verification_tries"])
+                return verificacion.BLOQUEADO
+            return verificacion.INCORRECTO
+        profile.email_verified = True
+        profile.email_verification_code = None
+        profile.verification_expires_at = None
+        profile.verification_tries = 0
+        profile.save(update_fields=[
+            "email_verified", "email_verification_code", "verification_expires_at", "verification_tries"
+        ])
+        return verificacion.VERIFICADO
+
+
+def _verificar_cas(email: str, code: str) -> str:
+    return verificacion.verificar_codigo(email, code).estado
+
+
+class Command(BaseCommand):
+    help = (
+        "Dispara en paralelo códigos correctos e incorrectos contra una misma cuenta de prueba "
+        "y compara el flujo anterior (select_for_update) con los UPDATEs condicionales de "
+        "core/verificacion.py: tiempo, errores y resultados. La cuenta se borra al final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hilos", type=int, default=8, help="Requests simultáneos por ronda")
+        parser.add_argument("--rondas", type=int, default=50)
+
+    def _correr(self, funcion, email, codigos, rondas, preparar):
+        """Cada hilo manda su código una vez por ronda, todos a la vez. Devuelve (estados, segundos)."""
+        inicio = threading.Barrier(len(codigos) + 1)
+        fin = threading.Barrier(len(codigos) + 1)
+        estados = Counter()
+        lock = threading.Lock()
+
+        def trabajador(codigo):
+            try:
+                for _ in range(rondas):
+                    inicio.wait()
+                    try:
+                        estado = funcion(email, codigo)
+                    except Exception as e:
+                        estado = f"error ({type(e).__name__}: {e})"
+                    with lock:
+                        estados[estado] += 1
+                    fin.wait()
+            finally:
+                connection.close()
+
+        hilos = [threading.Thread(target=trabajador, args=(c,), daemon=True) for c in codigos]
+        for hilo in hilos:
+            hilo.start()
+        duracion = 0.0
+        for _ in range(rondas):
+            preparar()
+            inicio.wait()
+            t0 = time.perf_counter()
+            fin.wait()
+            duracion += time.perf_counter() - t0
+        for hilo in hilos:
+            hilo.join()
+        return estados, duracion
+
+    def handle(self, *args, **options):
+        n, rondas = options["hilos"], options["rondas"]
+        nombre = f"benchmark-verificacion-{uuid.uuid4().hex[:8]}"
+        email = f"{nombre}@example.com"
+        user = User.objects.create_user(username=nombre, email=email, password=None)
+        profile = UserProfile.objects.create(user=user)
+
+        def preparar():
+            UserProfile.objects.filter(pk=profile.pk).update(
+                email_verified=False, email_verification_code=CODIGO,
+                verification_expires_at=timezone.now() + timedelta(minutes=15), verification_tries=0,
+            )
+
+        escenarios = {
+            "correctos": [CODIGO] * n,
+            "incorrectos": ["000000"] * n,
+            "mixtos": [CODIGO if i % 2 else "000000" for i in range(n)],
+        }
+        flujos = {"select_for_update": _verificar_anterior, "UPDATE condicional": _verificar_cas}
+        try:
+            for escenario, codigos in escenarios.items():
+                self.stdout.write(f"\n{escenario}: {n} requests simultáneos x {rondas} rondas "
+                                  f"(VERIFICATION_MAX_TRIES={verificacion.MAX_TRIES})")
+                for flujo, funcion in flujos.items():
+                    estados, duracion = self._correr(funcion, email, codigos, rondas, preparar)
+                    detalle = ", ".join(f"{estado}={cantidad}" for estado, cantidad in sorted(estados.items()))
+                    self.stdout.write(
+                        f"  {flujo:>18}: {duracion / rondas * 1000:6.1f} ms/ronda, "
+                        f"{verificacion.VERIFICADO}/ronda={estados[verificacion.VERIFICADO] / rondas:.2f} | {detalle}"
+                    )
+        finally:
+            user.delete()
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from core.resumen_donaciones import RESUMEN_MINUTOS, enviar_resumenes
+
+
+class Command(BaseCommand):
+    help = (
+        "Encola el resumen de donaciones de los dueños de comedores que lo activaron. "
+        "El worker procesar_correos ya lo hace solo; esto sirve para forzarlo (ej. con --todo). "
+        "Cada dueño recibe como mucho uno por intervalo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--minutos", type=int, default=RESUMEN_MINUTOS,
+            help="Antigüedad mínima del aviso más viejo de un dueño para mandarle el resumen.",
+        )
+        parser.add_argument("--todo", action="store_true", help="Manda todo lo pendiente sin esperar el intervalo.")
+
+    def handle(self, *args, **options):
+        n = enviar_resumenes(minutos=0 if options["todo"] else options["minutos"])
+        self.stdout.write(self.style.SUCCESS(f"Resúmenes encolados: {n}."))
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+from haystack import connections
+
+
+class Command(BaseCommand):
+    help = (
+        "Fusiona los segmentos del índice de búsqueda. Con Whoosh cada lote del worker "
+        "agrega segmentos y las consultas se vuelven más lentas; conviene correrlo periódicamente (cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--min-segmentos", type=int, default=2,
+            help="Sólo optimiza si el índice Whoosh tiene al menos esta cantidad de segmentos.",
+        )
+
+    def handle(self, *args, **options):
+        backend = connections["default"].get_backend()
+        segmentos = backend.segmentos() if hasattr(backend, "segmentos") else None
+
+        if segmentos is not None and segmentos < options["min_segmentos"]:
+            self.stdout.write(f"El índice tiene {segmentos} segmento(s); no hace falta optimizar.")
+            return
+
+        t0 = time.perf_counter()
+        backend.optimize()
+        detalle = f" ({segmentos} -> {backend.segmentos()} segmentos)" if segmentos is not None else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"Índice optimizado en {time.perf_counter() - t0:.2f}s{detalle}."
+        ))
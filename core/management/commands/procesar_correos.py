@@ -0,0 +1,58 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.difusion import procesar_difusiones
+from core.mail_queue import BATCH_SIZE, ENVIO_CHUNK, procesar_correos
+from core.resumen_donaciones import enviar_resumenes
+
+
+class Command(BaseCommand):
+    help = (
+        "Worker del outbox de correos: reparte los avisos de publicaciones nuevas, encola los "
+        "resúmenes de donaciones que ya cumplieron su intervalo, envía en lotes "
+        "los correos encolados por los requests, reintenta con backoff los que fallan y deja como "
+        "fallidos los que agotan los intentos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Vacía la cola una vez y termina.")
+        parser.add_argument("--batch", type=int, default=BATCH_SIZE, help="Correos por lote.")
+        parser.add_argument("--chunk", type=int, default=ENVIO_CHUNK, help="Correos por conexión SMTP.")
+        parser.add_argument("--sleep", type=float, default=2.0, help="Segundos de espera cuando no hay correos.")
+        parser.add_argument(
+            "--resumenes-cada", type=float, default=60.0,
+            help="Cada cuántos segundos revisa si hay resúmenes de donaciones para encolar.",
+        )
+
+    def handle(self, *args, **options):
+        batch = max(options["batch"], 1)
+        proximo_resumen = 0.0
+        while True:
+            total_enviados = total_fallidos = 0
+            # enviar_resumenes respeta DONACIONES_RESUMEN_MINUTOS por dueño: revisar seguido
+            # sólo acorta la demora, no manda más de un resumen por intervalo
+            if time.monotonic() >= proximo_resumen:
+                resumenes = enviar_resumenes()
+                proximo_resumen = time.monotonic() + options["resumenes_cada"]
+                if resumenes and options["verbosity"] > 1:
+                    self.stdout.write(f"Resúmenes de donaciones encolados: {resumenes}")
+            difusiones = procesar_difusiones()
+            if difusiones and options["verbosity"] > 1:
+                self.stdout.write(f"Difusiones procesadas: {difusiones}")
+            while True:
+                enviados, fallidos = procesar_correos(batch_size=batch, chunk=options["chunk"])
+                if not enviados and not fallidos:
+                    break
+                total_enviados += enviados
+                total_fallidos += fallidos
+                if options["verbosity"] > 1:
+                    self.stdout.write(f"Lote: {enviados} enviados, {fallidos} con error")
+
+            if options["once"]:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Outbox procesado: {total_enviados} enviados, {total_fallidos} con error."
+                ))
+                return
+            if not (difusiones or total_enviados or total_fallidos):
+                time.sleep(options["sleep"])
@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.search_queue import (
+    BATCH_SIZE,
+    ejecutar_reconstruccion,
+    procesar_cola,
+    tomar_reconstruccion_pendiente,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Worker del índice de búsqueda: aplica en lotes los cambios encolados por los "
+        "save/delete y ejecuta las reconstrucciones pedidas desde /rebuild_index/."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Vacía la cola una vez y termina.")
+        parser.add_argument("--batch", type=int, default=BATCH_SIZE, help="Cambios por lote.")
+        parser.add_argument("--sleep", type=float, default=2.0, help="Segundos de espera cuando no hay trabajo.")
+
+    def handle(self, *args, **options):
+        batch = max(options["batch"], 1)
+        while True:
+            trabajo = False
+
+            job = tomar_reconstruccion_pendiente()
+            if job is not None:
+                trabajo = True
+                ejecutar_reconstruccion(job, batch_size=batch)
+                self.stdout.write(f"Reconstrucción #{job.pk}: {job.estado} ({job.procesados}/{job.total})")
+
+            while True:
+                n = procesar_cola(batch_size=batch)
+                if not n:
+                    break
+                trabajo = True
+                if options["verbosity"] > 1:
+                    self.stdout.write(f"Aplicados {n} cambios de la cola")
+
+            if options["once"]:
+                self.stdout.write(self.style.SUCCESS("Cola de indexación procesada."))
+                return
+            if not trabajo:
+                time.sleep(options["sleep"])
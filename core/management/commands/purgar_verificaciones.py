@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.purga import PURGA_DIAS, PURGA_LOTE, borrar_cuentas, expirar_codigos, reporte
+
+
+class Command(BaseCommand):
+    help = (
+        "Limpia los códigos de verificación vencidos y borra las cuentas que nunca se verificaron "
+        "ni iniciaron sesión, de a lotes cortos. Con --dry-run sólo informa qué haría."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="No modifica nada: muestra el reporte.")
+        parser.add_argument("--dias", type=int, default=PURGA_DIAS,
+                            help="Antigüedad mínima (en días) de las cuentas sin verificar a borrar.")
+        parser.add_argument("--lote", type=int, default=PURGA_LOTE, help="Filas por lote (una transacción cada uno).")
+        parser.add_argument("--pausa", type=float, default=0.05, help="Segundos de espera entre lotes.")
+        parser.add_argument("--muestra", type=int, default=10, help="Cuentas de ejemplo en el reporte.")
+        parser.add_argument("--sin-cuentas", action="store_true", help="Sólo expira códigos, no borra cuentas.")
+
+    def handle(self, *args, **options):
+        ahora = timezone.now()
+        dias = max(options["dias"], 1)
+        lote = max(options["lote"], 1)
+
+        if options["dry_run"]:
+            datos = reporte(dias, ahora, muestra=options["muestra"])
+            self.stdout.write(f"Códigos vencidos a limpiar: {datos['codigos']}")
+            if options["sin_cuentas"]:
+                return
+            self.stdout.write(f"Cuentas sin verificar de más de {dias} días a borrar: {datos['cuentas']}")
+            for username, email, alta in datos["ejemplos"]:
+                self.stdout.write(f"  {alta:%Y-%m-%d}  {username}  <{email}>")
+            if datos["cuentas"] > len(datos["ejemplos"]):
+                self.stdout.write(f"  ... y {datos['cuentas'] - len(datos['ejemplos'])} más")
+            return
+
+        t0 = time.perf_counter()
+        # Primero las cuentas: así no se limpian códigos de perfiles que se borran igual
+        cuentas = 0 if options["sin_cuentas"] else borrar_cuentas(dias, ahora, lote=lote, pausa=options["pausa"])
+        codigos = expirar_codigos(ahora, lote=lote, pausa=options["pausa"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Purga terminada en {time.perf_counter() - t0:.1f}s: {cuentas} cuentas borradas, "
+            f"{codigos} códigos vencidos limpiados."
+        ))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from core.stats import rebuild_snapshot
+
+
+class Command(BaseCommand):
+    help = "Reconstruye desde cero el snapshot de estadísticas de comedores (home/privada)."
+
+    def handle(self, *args, **options):
+        snapshot = rebuild_snapshot()
+        self.stdout.write(self.style.SUCCESS(
+            f"Estadísticas recalculadas: {snapshot.comedores_count} comedores, "
+            f"capacidad {snapshot.total_capacity}, {snapshot.barrios_count} barrios, "
+            f"{snapshot.tipos_count} tipos."
+        ))
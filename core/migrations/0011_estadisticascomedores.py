@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_donacion_telefono'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstadisticasComedores',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('comedores_count', models.PositiveIntegerField(default=0)),
+                ('total_capacity', models.BigIntegerField(default=0)),
+                ('barrios', models.JSONField(default=dict)),
+                ('tipos', models.JSONField(default=dict)),
+                ('recientes', models.JSONField(default=list)),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Estadísticas de comedores',
+                'verbose_name_plural': 'Estadísticas de comedores',
+            },
+        ),
+    ]
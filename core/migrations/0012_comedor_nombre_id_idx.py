@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_estadisticascomedores'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comedor',
+            index=models.Index(fields=['nombre', 'id'], name='comedor_nombre_id_idx'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:25
+
+import unicodedata
+
+from django.db import migrations, models
+
+
+def normalizar_texto(valor):
+    # Copia de core.utils.normalizar_texto al momento de esta migración: no tiene
+    # que cambiar aunque cambie la de la app
+    if not valor:
+        return ""
+    descompuesto = unicodedata.normalize("NFKD", valor.casefold())
+    sin_acentos = "".join(c for c in descompuesto if not unicodedata.combining(c))
+    return " ".join(sin_acentos.split())
+
+
+def poblar_normalizados(apps, schema_editor):
+    Comedor = apps.get_model('core', 'Comedor')
+    pendientes = []
+    for comedor in Comedor.objects.only('id', 'barrio', 'tipo').iterator(chunk_size=500):
+        comedor.barrio_norm = normalizar_texto(comedor.barrio)
+        comedor.tipo_norm = normalizar_texto(comedor.tipo)
+        pendientes.append(comedor)
+        if len(pendientes) >= 500:
+            Comedor.objects.bulk_update(pendientes, ['barrio_norm', 'tipo_norm'])
+            pendientes = []
+    if pendientes:
+        Comedor.objects.bulk_update(pendientes, ['barrio_norm', 'tipo_norm'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_comedor_nombre_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comedor',
+            name='barrio_norm',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=50),
+        ),
+        migrations.AddField(
+            model_name='comedor',
+            name='tipo_norm',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=50),
+        ),
+        migrations.RunPython(poblar_normalizados, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_comedor_latitud_longitud_geo_celda'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='donacion',
+            index=models.Index(fields=['fecha_alta', 'id'], name='donacion_fecha_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='donacion',
+            index=models.Index(fields=['id_usuario', 'fecha_alta', 'id'], name='donacion_usuario_fecha_idx'),
+        ),
+    ]
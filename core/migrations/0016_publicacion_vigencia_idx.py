@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_donacion_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='publicacion',
+            index=models.Index(fields=['id_comedor', 'fecha_fin', 'fecha_inicio'], name='publicacion_vigencia_idx'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:38
+
+from django.db import migrations, models
+
+# Índice de texto del backend de búsqueda en base (core/search_backend.py), según el motor
+SQLITE_CREAR = [
+    "CREATE VIRTUAL TABLE core_documentobusqueda_fts USING fts5("
+    "texto, tokenize = 'unicode61 remove_diacritics 2')",
+]
+SQLITE_BORRAR = ["DROP TABLE IF EXISTS core_documentobusqueda_fts"]
+POSTGRES_CREAR = [
+    "ALTER TABLE core_documentobusqueda ADD COLUMN busqueda_vector tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('spanish', coalesce(texto, ''))) STORED",
+    "CREATE INDEX core_documentobusqueda_vector_idx ON core_documentobusqueda USING GIN (busqueda_vector)",
+]
+POSTGRES_BORRAR = [
+    "DROP INDEX IF EXISTS core_documentobusqueda_vector_idx",
+    "ALTER TABLE core_documentobusqueda DROP COLUMN IF EXISTS busqueda_vector",
+]
+
+
+def _ejecutar(schema_editor, por_motor):
+    for sql in por_motor.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+def crear_indice_texto(apps, schema_editor):
+    _ejecutar(schema_editor, {"sqlite": SQLITE_CREAR, "postgresql": POSTGRES_CREAR})
+
+
+def borrar_indice_texto(apps, schema_editor):
+    _ejecutar(schema_editor, {"sqlite": SQLITE_BORRAR, "postgresql": POSTGRES_BORRAR})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_colaindexacion_reconstruccionindice'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentoBusqueda',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('doc_id', models.CharField(max_length=255, unique=True)),
+                ('django_ct', models.CharField(db_index=True, max_length=100)),
+                ('django_id', models.CharField(max_length=64)),
+                ('texto', models.TextField(blank=True)),
+                ('campos', models.JSONField(default=dict)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='VersionIndiceBusqueda',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(crear_indice_texto, borrar_indice_texto),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:56
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_difusionpublicacion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='resumen_donaciones',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.CreateModel(
+            name='AvisoDonacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('creado', models.DateTimeField(default=django.utils.timezone.now)),
+                ('destinatario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+                ('donacion', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.donacion')),
+            ],
+            options={
+                'verbose_name': 'Aviso de donación pendiente',
+                'verbose_name_plural': 'Avisos de donación pendientes',
+                'indexes': [models.Index(fields=['destinatario', 'creado'], name='aviso_donacion_dest_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0023_clave_idempotencia'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reconstruccionindice',
+            name='tomado',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
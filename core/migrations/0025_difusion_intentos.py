@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:35
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0024_reconstruccionindice_tomado'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='difusionpublicacion',
+            name='intentos',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='difusionpublicacion',
+            name='proximo_intento',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AlterField(
+            model_name='difusionpublicacion',
+            name='estado',
+            field=models.CharField(choices=[('pendiente', 'Pendiente'), ('en_curso', 'En curso'), ('terminado', 'Terminado'), ('fallido', 'Fallido')], db_index=True, default='pendiente', max_length=10),
+        ),
+    ]
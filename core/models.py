@@ -1,11 +1,14 @@
 # models.py
 from django.contrib.auth.models import User
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 from django.conf import settings
 from django.utils import timezone
 from datetime import timedelta
 import secrets
 
+from .utils import normalizar_texto
+
 class Comedor(models.Model):
     nombre = models.CharField(max_length=100)
     descripcion = models.TextField()
@@ -14,6 +17,21 @@ class Comedor(models.Model):
     tipo = models.CharField(max_length=50)
     capacidad = models.IntegerField()
 
+    # Versiones normalizadas (minúsculas, sin acentos) para filtrar por prefijo con índice
+    barrio_norm = models.CharField(max_length=50, db_index=True, editable=False, default='')
+    tipo_norm = models.CharField(max_length=50, db_index=True, editable=False, default='')
+
+    # Ubicación (opcional) y celda de la grilla para búsquedas por cercanía (ver core/geo.py)
+    latitud = models.FloatField(
+        null=True, blank=True,
+        validators=[MinValueValidator(-90), MaxValueValidator(90)],
+    )
+    longitud = models.FloatField(
+        null=True, blank=True,
+        validators=[MinValueValidator(-180), MaxValueValidator(180)],
+    )
+    geo_celda = models.CharField(max_length=20, db_index=True, editable=False, blank=True, default='')
+
     usuario = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
@@ -22,13 +40,69 @@ class Comedor(models.Model):
         null=True, blank=True
     )
 
+    class Meta:
+        indexes = [
+            # Orden estable del listado paginado por cursor (ver core/pagination.py)
+            models.Index(fields=['nombre', 'id'], name='comedor_nombre_id_idx'),
+        ]
+
     def __str__(self):
         return self.nombre
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.recordar_valores_originales()
+        return instance
+
+    def recordar_valores_originales(self):
+        """Guarda barrio/tipo/capacidad tal como están en la base (para las estadísticas)."""
+        self._valores_originales = {
+            campo: self.__dict__.get(campo)
+            for campo in ('barrio', 'tipo', 'capacidad')
+        }
+
     def save(self, *args, **kwargs):
+        from .geo import celda
+
+        self.barrio_norm = normalizar_texto(self.barrio)
+        self.tipo_norm = normalizar_texto(self.tipo)
+        self.geo_celda = celda(self.latitud, self.longitud)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            extra = {'barrio': 'barrio_norm', 'tipo': 'tipo_norm', 'latitud': 'geo_celda', 'longitud': 'geo_celda'}
+            kwargs['update_fields'] = set(update_fields) | {extra[f] for f in update_fields if f in extra}
         # Guardar el modelo
         super().save(*args, **kwargs)
 
+class EstadisticasComedores(models.Model):
+    """
+    Snapshot materializado de las estadísticas de comedores (una sola fila).
+    Se actualiza incrementalmente al guardar/eliminar un Comedor (ver core/stats.py)
+    y se puede reconstruir con `manage.py recalcular_estadisticas`.
+    """
+    comedores_count = models.PositiveIntegerField(default=0)
+    total_capacity = models.BigIntegerField(default=0)
+    barrios = models.JSONField(default=dict)     # {barrio: cantidad de comedores}
+    tipos = models.JSONField(default=dict)       # {tipo: cantidad de comedores}
+    recientes = models.JSONField(default=list)   # ids de los últimos comedores, del más nuevo al más viejo
+    actualizado = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Estadísticas de comedores'
+        verbose_name_plural = 'Estadísticas de comedores'
+
+    def __str__(self):
+        return f"Estadísticas ({self.comedores_count} comedores)"
+
+    @property
+    def barrios_count(self):
+        return len(self.barrios)
+
+    @property
+    def tipos_count(self):
+        return len(self.tipos)
+
 class UserProfile(models.Model):
     """
     Perfil de usuario extendido para manejar validación de email
@@ -41,6 +115,19 @@ class UserProfile(models.Model):
     verification_expires_at = models.DateTimeField(blank=True, null=True)
     verification_tries = models.PositiveSmallIntegerField(default=0)
 
+    # Dueños de comedor: recibir las donaciones en un resumen periódico en vez de un mail por donación
+    resumen_donaciones = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [
+            # Códigos vencidos sin verificar (purga por lotes, core/purga.py). Parcial: sólo los
+            # perfiles sin verificar, y usable aunque Django escriba el filtro como NOT email_verified
+            models.Index(
+                fields=['verification_expires_at'], condition=models.Q(email_verified=False),
+                name='perfil_verif_vence_idx',
+            ),
+        ]
+
     def __str__(self):
         return f"Perfil de {self.user.username}"
 
@@ -68,6 +155,19 @@ class TipoPublicacion(models.Model):
     def __str__(self):
         return self.descripcion
 
+class PublicacionQuerySet(models.QuerySet):
+    def vigentes(self, now=None):
+        """Publicaciones ya iniciadas y sin vencer (fecha_fin vacía o futura)."""
+        now = now or timezone.now()
+        return self.filter(
+            models.Q(fecha_fin__isnull=True) | models.Q(fecha_fin__gte=now),
+            fecha_inicio__lte=now,
+        )
+
+    def vencidas(self, now=None):
+        now = now or timezone.now()
+        return self.filter(fecha_fin__lt=now)
+
 class Publicacion(models.Model):
     id_comedor = models.ForeignKey('Comedor', on_delete=models.CASCADE)
     titulo = models.CharField(max_length=255)
@@ -77,6 +177,14 @@ class Publicacion(models.Model):
     fecha_inicio = models.DateTimeField(default=timezone.now)  # se setea al crear
     fecha_fin = models.DateTimeField(null=True, blank=True)  # lo carga el usuario
 
+    objects = PublicacionQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Vigentes/vencidas de un comedor sin recorrer todo su historial
+            models.Index(fields=['id_comedor', 'fecha_fin', 'fecha_inicio'], name='publicacion_vigencia_idx'),
+        ]
+
     def __str__(self):
         return self.titulo
 
@@ -110,6 +218,11 @@ class Donacion(models.Model):
 
     class Meta:
         db_table = 'Donacion'
+        indexes = [
+            # Libro de donaciones paginado por (fecha_alta, id), general y por usuario
+            models.Index(fields=['fecha_alta', 'id'], name='donacion_fecha_id_idx'),
+            models.Index(fields=['id_usuario', 'fecha_alta', 'id'], name='donacion_usuario_fecha_idx'),
+        ]
 
     def __str__(self):
         return f"Donación {self.id} de {self.usuario} en {self.comedor}"
@@ -124,3 +237,197 @@ class DonacionItem(models.Model):
 
     def __str__(self):
         return f"{self.nombre_articulo} x{self.cantidad}"
+
+class ColaIndexacion(models.Model):
+    """
+    Cambios pendientes de aplicar en el índice de búsqueda.
+    Los encola el signal processor de Haystack (core/search_queue.py) en la misma
+    transacción que el cambio, y los aplica en lotes `manage.py procesar_indice_busqueda`.
+    """
+    ACCION_ACTUALIZAR = 'update'
+    ACCION_ELIMINAR = 'delete'
+    ACCIONES = [
+        (ACCION_ACTUALIZAR, 'Actualizar'),
+        (ACCION_ELIMINAR, 'Eliminar'),
+    ]
+
+    modelo = models.CharField(max_length=100)    # app_label.model, ej: core.comedor
+    objeto_id = models.CharField(max_length=64)
+    accion = models.CharField(max_length=10, choices=ACCIONES)
+    creado = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = 'Cambio pendiente de indexar'
+        verbose_name_plural = 'Cola de indexación'
+
+    def __str__(self):
+        return f"{self.accion} {self.modelo}.{self.objeto_id}"
+
+class ReconstruccionIndice(models.Model):
+    """Pedido de reconstrucción completa del índice, con su progreso."""
+    ESTADO_PENDIENTE = 'pendiente'
+    ESTADO_EN_CURSO = 'en_curso'
+    ESTADO_TERMINADO = 'terminado'
+    ESTADO_ERROR = 'error'
+    ESTADOS = [
+        (ESTADO_PENDIENTE, 'Pendiente'),
+        (ESTADO_EN_CURSO, 'En curso'),
+        (ESTADO_TERMINADO, 'Terminado'),
+        (ESTADO_ERROR, 'Error'),
+    ]
+
+    estado = models.CharField(max_length=10, choices=ESTADOS, default=ESTADO_PENDIENTE)
+    total = models.PositiveIntegerField(default=0)
+    procesados = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    solicitado_por = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True
+    )
+    creado = models.DateTimeField(default=timezone.now)
+    iniciado = models.DateTimeField(null=True, blank=True)
+    tomado = models.DateTimeField(null=True, blank=True)   # último avance del worker que la tiene
+    terminado = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Reconstrucción del índice'
+        verbose_name_plural = 'Reconstrucciones del índice'
+
+    def __str__(self):
+        return f"Reconstrucción #{self.pk} ({self.estado})"
+
+    @property
+    def porcentaje(self):
+        if not self.total:
+            return 100 if self.estado == self.ESTADO_TERMINADO else 0
+        return round(100 * self.procesados / self.total)
+
+class DocumentoBusqueda(models.Model):
+    """
+    Documento del buscador cuando se usa el backend en base de datos
+    (BUSQUEDA_BACKEND = "db", ver core/search_backend.py). El texto se indexa
+    aparte: tabla FTS5 en SQLite, columna tsvector generada en Postgres.
+    """
+    doc_id = models.CharField(max_length=255, unique=True)     # core.comedor.5
+    django_ct = models.CharField(max_length=100, db_index=True)
+    django_id = models.CharField(max_length=64)
+    texto = models.TextField(blank=True)
+    campos = models.JSONField(default=dict)                     # campos guardados del SearchIndex
+
+    def __str__(self):
+        return self.doc_id
+
+class VersionIndiceBusqueda(models.Model):
+    """Contador (fila única) que sube con cada cambio del índice en base: invalida caches de resultados."""
+    version = models.PositiveBigIntegerField(default=0)
+
+class CorreoPendiente(models.Model):
+    """
+    Outbox de correos: los requests sólo insertan acá (en su misma transacción)
+    y el comando `procesar_correos` los envía aparte, con reintentos.
+    """
+    ESTADO_PENDIENTE = 'pendiente'
+    ESTADO_ENVIANDO = 'enviando'
+    ESTADO_ENVIADO = 'enviado'
+    ESTADO_FALLIDO = 'fallido'
+    ESTADOS = [
+        (ESTADO_PENDIENTE, 'Pendiente'),
+        (ESTADO_ENVIANDO, 'Enviando'),
+        (ESTADO_ENVIADO, 'Enviado'),
+        (ESTADO_FALLIDO, 'Fallido'),
+    ]
+
+    destinatario = models.EmailField()
+    asunto = models.CharField(max_length=255)
+    mensaje = models.TextField()
+    estado = models.CharField(max_length=10, choices=ESTADOS, default=ESTADO_PENDIENTE)
+    intentos = models.PositiveIntegerField(default=0)
+    proximo_intento = models.DateTimeField(default=timezone.now)
+    ultimo_error = models.TextField(blank=True)
+    lote = models.CharField(max_length=32, blank=True, db_index=True)   # worker que lo tomó
+    tomado = models.DateTimeField(null=True, blank=True)
+    creado = models.DateTimeField(default=timezone.now)
+    enviado = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Correo pendiente'
+        verbose_name_plural = 'Correos pendientes'
+        indexes = [
+            models.Index(fields=['estado', 'proximo_intento'], name='correo_estado_proximo_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.asunto} -> {self.destinatario} ({self.estado})"
+
+class DifusionPublicacion(models.Model):
+    """
+    Aviso de una publicación nueva a quienes tienen el comedor en favoritos.
+    El request sólo crea esta fila; el worker de correos recorre los favoritos
+    por tramos y deja en `ultimo_email` hasta dónde encoló, para retomar si se corta.
+    Si falla se reintenta con backoff, y tras EMAIL_OUTBOX_MAX_INTENTOS queda fallida.
+    """
+    ESTADO_PENDIENTE = 'pendiente'
+    ESTADO_EN_CURSO = 'en_curso'
+    ESTADO_TERMINADO = 'terminado'
+    ESTADO_FALLIDO = 'fallido'
+    ESTADOS = [
+        (ESTADO_PENDIENTE, 'Pendiente'),
+        (ESTADO_EN_CURSO, 'En curso'),
+        (ESTADO_TERMINADO, 'Terminado'),
+        (ESTADO_FALLIDO, 'Fallido'),
+    ]
+
+    publicacion = models.ForeignKey(Publicacion, on_delete=models.CASCADE)
+    autor = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    estado = models.CharField(max_length=10, choices=ESTADOS, default=ESTADO_PENDIENTE, db_index=True)
+    ultimo_email = models.CharField(max_length=254, blank=True)   # cursor: los favoritos van ordenados por email
+    encolados = models.PositiveIntegerField(default=0)
+    intentos = models.PositiveIntegerField(default=0)   # fallos seguidos sin avanzar
+    proximo_intento = models.DateTimeField(default=timezone.now)
+    ultimo_error = models.TextField(blank=True)
+    tomado = models.DateTimeField(null=True, blank=True)
+    creado = models.DateTimeField(default=timezone.now)
+    terminado = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Difusión de publicación'
+        verbose_name_plural = 'Difusiones de publicaciones'
+
+    def __str__(self):
+        return f"Difusión de publicación #{self.publicacion_id} ({self.estado})"
+
+class AvisoDonacion(models.Model):
+    """Donación recibida por un dueño con resumen activado, a la espera del próximo resumen."""
+    destinatario = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    donacion = models.ForeignKey(Donacion, on_delete=models.CASCADE)
+    creado = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = 'Aviso de donación pendiente'
+        verbose_name_plural = 'Avisos de donación pendientes'
+        indexes = [
+            models.Index(fields=['destinatario', 'creado'], name='aviso_donacion_dest_idx'),
+        ]
+
+    def __str__(self):
+        return f"Donación #{self.donacion_id} para {self.destinatario_id}"
+
+class ClaveIdempotencia(models.Model):
+    """
+    Respuesta ya dada a un pedido con header Idempotency-Key (ver core/idempotencia.py).
+    Un reintento con la misma clave recibe esta respuesta en vez de repetir la operación.
+    """
+    usuario = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    clave = models.CharField(max_length=255)
+    huella = models.CharField(max_length=64)   # sha256 del cuerpo del pedido original
+    estado_http = models.PositiveSmallIntegerField(default=0)
+    tipo_contenido = models.CharField(max_length=100, blank=True)
+    cuerpo = models.TextField(blank=True)
+    creado = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = 'Clave de idempotencia'
+        verbose_name_plural = 'Claves de idempotencia'
+        unique_together = ('usuario', 'clave')
+
+    def __str__(self):
+        return f"{self.clave} de {self.usuario_id} ({self.estado_http})"
@@ -0,0 +1,121 @@
+# core/pagination.py
+"""
+Paginación por cursor (keyset).
+
+En vez de OFFSET, cada página arranca después (o antes) de la última clave
+vista, así que la página 500 cuesta lo mismo que la primera siempre que
+exista un índice sobre las columnas de orden.
+"""
+import base64
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+
+class KeysetPage:
+    """Una página de resultados con los cursores para ir a la siguiente/anterior."""
+
+    def __init__(self, items, next_cursor=None, prev_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.prev_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def encode_cursor(direccion: str, valores) -> str:
+    raw = json.dumps([direccion, list(valores)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, campos: tuple[str, ...], modelo):
+    """
+    Devuelve (direccion, valores) o (None, None) si el cursor es inválido.
+    Cada valor pasa por el to_python() de su campo en `modelo`: el cursor viene del
+    cliente, y un valor de otro tipo haría fallar el filtro (500) en vez de ignorarse.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        direccion, valores = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if direccion not in ("n", "p") or not isinstance(valores, list) or len(valores) != len(campos):
+            return None, None
+        valores = [
+            modelo._meta.get_field(campo.lstrip("-")).to_python(valor)
+            for campo, valor in zip(campos, valores)
+        ]
+    except (ValueError, TypeError, ValidationError, FieldDoesNotExist):
+        return None, None
+    if any(valor is None for valor in valores):
+        return None, None
+    return direccion, valores
+
+
+def _despues_de(campos, valores, hacia_adelante: bool):
+    """
+    Arma la condición de tupla (a, b, c) > (x, y, z) expandida en OR/AND,
+    que el motor puede resolver con un rango sobre el índice compuesto.
+    Un campo con prefijo '-' se ordena descendente, así que su comparación se invierte.
+    """
+    condicion = Q()
+    for i, campo in enumerate(campos):
+        nombre = campo.lstrip("-")
+        ascendente = not campo.startswith("-")
+        lookup = "gt" if ascendente == hacia_adelante else "lt"
+        parcial = Q(**{f"{nombre}__{lookup}": valores[i]})
+        for previo, valor in zip(campos[:i], valores[:i]):
+            parcial &= Q(**{previo.lstrip("-"): valor})
+        condicion |= parcial
+    return condicion
+
+
+def _invertir(campo: str) -> str:
+    return campo[1:] if campo.startswith("-") else f"-{campo}"
+
+
+def _valor_cursor(valor):
+    # Las fechas viajan en el cursor como ISO 8601
+    return valor.isoformat() if hasattr(valor, "isoformat") else valor
+
+
+def paginar_keyset(queryset, cursor: str | None, campos: tuple[str, ...], page_size: int) -> KeysetPage:
+    """
+    Pagina `queryset` ordenado por `campos` (admite '-campo'; el último debe ser único, ej. 'id').
+    Un cursor inválido o adulterado se ignora: se sirve la primera página.
+    """
+    direccion, valores = decode_cursor(cursor, campos, queryset.model) if cursor else (None, None)
+
+    if direccion == "p":
+        # Hacia atrás: orden inverso, y después se da vuelta la página
+        qs = queryset.filter(_despues_de(campos, valores, hacia_adelante=False)).order_by(*[_invertir(c) for c in campos])
+        filas = list(qs[:page_size + 1])
+        hay_mas_atras = len(filas) > page_size
+        items = list(reversed(filas[:page_size]))
+        hay_mas_adelante = True
+    else:
+        qs = queryset
+        if direccion == "n":
+            qs = qs.filter(_despues_de(campos, valores, hacia_adelante=True))
+        filas = list(qs.order_by(*campos)[:page_size + 1])
+        hay_mas_adelante = len(filas) > page_size
+        items = filas[:page_size]
+        hay_mas_atras = direccion == "n"
+
+    def _clave(obj):
+        return [_valor_cursor(getattr(obj, c.lstrip("-"))) for c in campos]
+
+    next_cursor = encode_cursor("n", _clave(items[-1])) if items and hay_mas_adelante else None
+    prev_cursor = encode_cursor("p", _clave(items[0])) if items and hay_mas_atras else None
+    return KeysetPage(items, next_cursor=next_cursor, prev_cursor=prev_cursor)
@@ -0,0 +1,67 @@
+# core/perfiles.py
+"""
+Usuario y perfil en una sola consulta por request.
+
+BackendConPerfil carga el auth.User con select_related("userprofile"), tanto
+al autenticar como al resolver request.user desde la sesión. Así
+request.user.userprofile ya viene resuelto (o se sabe que no existe) y el
+context processor, los decoradores y las vistas lo leen sin consultas extra.
+
+perfil_de(request) es el acceso a usar desde el código: devuelve el perfil o
+None, y opcionalmente lo crea si falta (dejándolo cacheado en request.user).
+"""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.exceptions import PermissionDenied
+
+from .models import UserProfile
+
+# Para auth_login() con un usuario que no salió de authenticate() (hay más de un backend)
+BACKEND_CON_PERFIL = "core.perfiles.BackendConPerfil"
+
+
+class BackendConPerfil(ModelBackend):
+    """ModelBackend que trae el perfil en el mismo SELECT del usuario."""
+
+    def _usuarios(self):
+        return get_user_model()._default_manager.select_related("userprofile")
+
+    def get_user(self, user_id):
+        try:
+            user = self._usuarios().get(pk=user_id)
+        except get_user_model().DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = self._usuarios().get(**{UserModel.USERNAME_FIELD: username})
+        except UserModel.DoesNotExist:
+            # Mismo costo que con un usuario existente (no revela cuáles existen)
+            UserModel().set_password(password)
+            user = None
+        if user is not None and user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        # Corta la cadena de backends: ModelBackend (que sigue en la lista sólo para las
+        # sesiones viejas) volvería a hashear la misma contraseña
+        raise PermissionDenied
+
+
+def perfil_de(request, crear: bool = False) -> UserProfile | None:
+    """Perfil de request.user (None si es anónimo o no tiene). Con crear=True lo crea si falta."""
+    user = request.user
+    if not user.is_authenticated:
+        return None
+    try:
+        return user.userprofile
+    except UserProfile.DoesNotExist:
+        if not crear:
+            return None
+    profile, _ = UserProfile.objects.get_or_create(user=user)
+    user.userprofile = profile   # queda cacheado para el resto del request
+    return profile
@@ -0,0 +1,106 @@
+# core/purga.py
+"""
+Purga de códigos de verificación vencidos y de cuentas que nunca se verificaron.
+
+Los códigos quedaban en UserProfile para siempre, y cada registro abandonado
+dejaba un auth_user más que recorren las búsquedas por email (email__iexact
+en el registro y la verificación).
+
+- expirar_codigos() borra código, vencimiento e intentos de los perfiles sin
+  verificar cuyo código ya venció (índice perfil_verif_vence_idx).
+- borrar_cuentas() elimina los usuarios que nunca verificaron ni iniciaron
+  sesión, registrados hace más de VERIFICACION_PURGA_DIAS días, que no tienen
+  un código vigente ni comedores o donaciones a su nombre.
+
+Las dos avanzan por pk de a VERIFICACION_PURGA_LOTE filas: eligen los ids del
+lote y escriben con un filtro que repite las condiciones, así una cuenta que se
+verifica (o pide un código nuevo) en el medio queda afuera. Cada lote es una
+transacción corta; con SQLite eso deja pasar a los requests entre lote y lote.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import UserProfile
+
+PURGA_DIAS = getattr(settings, "VERIFICACION_PURGA_DIAS", 30)
+PURGA_LOTE = getattr(settings, "VERIFICACION_PURGA_LOTE", 500)
+
+
+def codigos_vencidos(ahora=None):
+    """Perfiles sin verificar con un código que ya venció."""
+    ahora = ahora or timezone.now()
+    return UserProfile.objects.filter(email_verified=False, verification_expires_at__lt=ahora)
+
+
+def cuentas_abandonadas(dias: int = PURGA_DIAS, ahora=None):
+    """Usuarios que nunca verificaron ni entraron, registrados hace más de `dias` días."""
+    ahora = ahora or timezone.now()
+    return User.objects.filter(
+        Q(userprofile__verification_expires_at__isnull=True) | Q(userprofile__verification_expires_at__lt=ahora),
+        userprofile__email_verified=False,
+        last_login__isnull=True,
+        date_joined__lt=ahora - timedelta(days=dias),
+        is_staff=False,
+        is_superuser=False,
+        comedores__isnull=True,
+        userprofile__donacion__isnull=True,
+    )
+
+
+def _por_lotes(qs, procesar, lote: int, pausa: float) -> int:
+    """Aplica `procesar(ids)` a `qs` de a `lote` pks, en orden. Devuelve el total procesado."""
+    total = 0
+    ultimo = 0
+    while True:
+        ids = list(qs.filter(pk__gt=ultimo).order_by("pk").values_list("pk", flat=True)[:lote])
+        if not ids:
+            return total
+        total += procesar(ids)
+        if len(ids) < lote:
+            return total
+        ultimo = ids[-1]
+        if pausa:
+            time.sleep(pausa)
+
+
+def expirar_codigos(ahora=None, lote: int = PURGA_LOTE, pausa: float = 0) -> int:
+    """Limpia los códigos vencidos. Devuelve cuántos perfiles cambió."""
+    qs = codigos_vencidos(ahora or timezone.now())
+    return _por_lotes(
+        qs,
+        lambda ids: qs.filter(pk__in=ids).update(
+            email_verification_code=None, verification_expires_at=None, verification_tries=0
+        ),
+        lote, pausa,
+    )
+
+
+def borrar_cuentas(dias: int = PURGA_DIAS, ahora=None, lote: int = PURGA_LOTE, pausa: float = 0) -> int:
+    """Borra las cuentas abandonadas (con su perfil). Devuelve cuántos usuarios borró."""
+    qs = cuentas_abandonadas(dias, ahora or timezone.now())
+
+    def borrar(ids):
+        with transaction.atomic():
+            _, por_modelo = qs.filter(pk__in=ids).delete()
+        return por_modelo.get(User._meta.label, 0)
+
+    return _por_lotes(qs, borrar, lote, pausa)
+
+
+def reporte(dias: int = PURGA_DIAS, ahora=None, muestra: int = 10) -> dict:
+    """Lo que haría la purga, sin escribir nada (para --dry-run)."""
+    ahora = ahora or timezone.now()
+    cuentas = cuentas_abandonadas(dias, ahora)
+    return {
+        "codigos": codigos_vencidos(ahora).count(),
+        "cuentas": cuentas.count(),
+        "ejemplos": list(
+            cuentas.order_by("date_joined").values_list("username", "email", "date_joined")[:muestra]
+        ),
+    }
@@ -0,0 +1,123 @@
+# core/resumen_donaciones.py
+"""
+Resumen de donaciones para dueños de comedores.
+
+Por defecto cada donación manda un mail al dueño (un envío por lote manda uno solo). Si el dueño activó
+UserProfile.resumen_donaciones, la donación queda como AvisoDonacion y el
+worker de correos (`procesar_correos`, que llama a enviar_resumenes cada minuto)
+le manda un único mail con todo lo acumulado, como mucho uno cada
+DONACIONES_RESUMEN_MINUTOS. `enviar_resumen_donaciones` hace lo mismo a mano.
+
+Los datos del resumen salen de una sola consulta agrupada por dueño,
+comedor y publicación.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Min, Sum
+from django.utils import timezone
+
+from .mail_service import EmailService
+from .models import AvisoDonacion, UserProfile
+
+RESUMEN_MINUTOS = getattr(settings, "DONACIONES_RESUMEN_MINUTOS", 60)
+
+
+def avisar_donacion(donacion, owner, comedor_nombre: str, publicacion_titulo: str,
+                    donante: str, articulos: list[str]) -> None:
+    """Avisa al dueño de una donación: mail inmediato, o acumulada para el resumen si lo pidió."""
+    avisar_donaciones([(donacion, publicacion_titulo, articulos)], owner, comedor_nombre, donante)
+
+
+def avisar_donaciones(donaciones: list[tuple], owner, comedor_nombre: str, donante: str) -> None:
+    """
+    Avisa al dueño de varias donaciones de un mismo donante a su comedor con UN solo mail
+    (o las acumula para el resumen). Cada elemento: (donacion, publicacion_titulo, articulos).
+    """
+    email = (getattr(owner, "email", "") or "").strip()
+    if not email or not donaciones:
+        return
+    if UserProfile.objects.filter(user_id=owner.pk, resumen_donaciones=True).exists():
+        AvisoDonacion.objects.bulk_create([
+            AvisoDonacion(destinatario_id=owner.pk, donacion=donacion) for donacion, _, _ in donaciones
+        ])
+        return
+    if len(donaciones) == 1:
+        _, publicacion_titulo, articulos = donaciones[0]
+        EmailService.send_new_donation(
+            email=email,
+            comedor_nombre=comedor_nombre,
+            publicacion_titulo=publicacion_titulo,
+            donante=donante,
+            articulos=articulos,
+        )
+        return
+    EmailService.send_new_donations(
+        email=email,
+        comedor_nombre=comedor_nombre,
+        donante=donante,
+        publicaciones=[(titulo, articulos) for _, titulo, articulos in donaciones],
+    )
+
+
+def _filas_pendientes(tope: int):
+    """Avisos hasta `tope`, agrupados por dueño / comedor / publicación (una sola consulta)."""
+    return (
+        AvisoDonacion.objects
+        .filter(id__lte=tope)
+        .values(
+            "destinatario_id",
+            "destinatario__email",
+            "destinatario__first_name",
+            "destinatario__username",
+            "donacion__id_comedor__nombre",
+            "donacion__id_publicacion__titulo",
+        )
+        .annotate(
+            donaciones=Count("donacion", distinct=True),
+            articulos=Sum("donacion__items__cantidad"),
+            primero=Min("creado"),
+        )
+        .order_by("destinatario_id", "donacion__id_comedor__nombre", "donacion__id_publicacion__titulo")
+    )
+
+
+def enviar_resumenes(minutos: int = RESUMEN_MINUTOS, ahora=None) -> int:
+    """
+    Encola un resumen por cada dueño cuyo aviso más viejo tiene al menos `minutos`
+    (así cada dueño recibe como mucho un resumen por intervalo). Devuelve cuántos se encolaron.
+    """
+    ahora = ahora or timezone.now()
+    corte = ahora - timedelta(minutes=minutos)
+    tope = AvisoDonacion.objects.aggregate(tope=Max("id"))["tope"]
+    if tope is None:
+        return 0
+
+    por_dueno = {}
+    for fila in _filas_pendientes(tope):
+        dueno = por_dueno.setdefault(fila["destinatario_id"], {
+            "email": fila["destinatario__email"],
+            "nombre": fila["destinatario__first_name"] or fila["destinatario__username"],
+            "primero": fila["primero"],
+            "filas": [],
+        })
+        dueno["primero"] = min(dueno["primero"], fila["primero"])
+        dueno["filas"].append({
+            "comedor": fila["donacion__id_comedor__nombre"],
+            "publicacion": fila["donacion__id_publicacion__titulo"],
+            "donaciones": fila["donaciones"],
+            "articulos": fila["articulos"] or 0,
+        })
+
+    listos = [pk for pk, d in por_dueno.items() if d["primero"] <= corte]
+    if not listos:
+        return 0
+
+    with transaction.atomic():
+        for pk in listos:
+            dueno = por_dueno[pk]
+            if (dueno["email"] or "").strip():
+                EmailService.send_donation_digest(dueno["email"].strip(), dueno["nombre"], dueno["filas"])
+        AvisoDonacion.objects.filter(id__lte=tope, destinatario_id__in=listos).delete()
+    return len(listos)
@@ -0,0 +1,309 @@
+# core/search_backend.py
+"""
+Backend de Haystack sobre la misma base de datos de la aplicación.
+
+- SQLite: el texto se indexa en una tabla FTS5 (core_documentobusqueda_fts,
+  rowid = id del documento), sin acentos ni mayúsculas, con ranking bm25.
+- Postgres: columna tsvector generada (configuración 'spanish') con índice GIN
+  y ranking ts_rank.
+
+Los campos guardados del SearchIndex van en DocumentoBusqueda.campos (JSON),
+y sobre ellos se resuelven los filtros (fechas, ids, etc.). Como el índice
+vive en la base, lo comparten todas las instancias de la app.
+
+Se activa con BUSQUEDA_BACKEND = "db" (ver settings). `buscar` y el worker de
+indexación no cambian: usan la API de Haystack.
+"""
+import datetime
+import decimal
+import re
+
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.db.models.expressions import RawSQL
+from haystack import connections
+from haystack.backends import BaseEngine, BaseSearchBackend, BaseSearchQuery, SearchNode, log_query
+from haystack.constants import DJANGO_CT, DJANGO_ID, ID
+from haystack.models import SearchResult
+from haystack.utils import get_identifier, get_model_ct
+
+from .models import DocumentoBusqueda, VersionIndiceBusqueda
+
+TABLA = DocumentoBusqueda._meta.db_table
+TABLA_FTS = f"{TABLA}_fts"
+CAMPO_CONTENIDO = "content"
+FORMATO_FECHA = "%Y-%m-%dT%H:%M:%S.%f"   # ancho fijo: las fechas se comparan como texto
+
+_PALABRA = re.compile(r"\w+", re.UNICODE)
+
+
+def _a_json(valor):
+    """Valor preparado por el SearchIndex -> valor guardable/comparable en JSON."""
+    if isinstance(valor, datetime.datetime):
+        if valor.tzinfo is not None:
+            valor = valor.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+        return valor.strftime(FORMATO_FECHA)
+    if isinstance(valor, datetime.date):
+        return datetime.datetime(valor.year, valor.month, valor.day).strftime(FORMATO_FECHA)
+    if isinstance(valor, decimal.Decimal):
+        return str(valor)
+    if isinstance(valor, (list, tuple, set)):
+        return [_a_json(v) for v in valor]
+    return valor
+
+
+def _texto_consulta(valor) -> str:
+    # Haystack puede pasar inputs (AutoQuery, Clean, ...) o un string directo
+    return str(getattr(valor, "query_string", valor) or "")
+
+
+class _TextoSQLite:
+    """MATCH de FTS5: cada palabra como prefijo, todas obligatorias."""
+
+    @staticmethod
+    def expresion(texto):
+        palabras = _PALABRA.findall(texto.casefold())
+        return " AND ".join(f'"{p}"*' for p in palabras)
+
+    @staticmethod
+    def filtro(expresion):
+        return Q(pk__in=RawSQL(f"SELECT rowid FROM {TABLA_FTS} WHERE {TABLA_FTS} MATCH %s", [expresion]))
+
+    @staticmethod
+    def por_relevancia(qs, expresion):
+        # El puntaje sólo existe dentro del MATCH: se une la tabla FTS (con .extra, que el ORM
+        # no sabe expresar de otra forma). rank de FTS5 es bm25 negado: más chico = más relevante.
+        return qs.extra(
+            tables=[TABLA_FTS],
+            where=[f"{TABLA_FTS}.rowid = {TABLA}.id", f"{TABLA_FTS} MATCH %s"],
+            params=[expresion],
+            select={"puntaje": f"{TABLA_FTS}.rank"},
+        ).order_by("puntaje", "id")
+
+
+class _TextoPostgres:
+    """to_tsquery en español sobre la columna generada, también con prefijos."""
+
+    @staticmethod
+    def expresion(texto):
+        palabras = _PALABRA.findall(texto.casefold())
+        return " & ".join(f"{p}:*" for p in palabras)
+
+    @staticmethod
+    def filtro(expresion):
+        return Q(pk__in=RawSQL(
+            f"SELECT id FROM {TABLA} WHERE busqueda_vector @@ to_tsquery('spanish', %s)", [expresion]
+        ))
+
+    @staticmethod
+    def por_relevancia(qs, expresion):
+        return qs.annotate(
+            puntaje=RawSQL(f"-ts_rank({TABLA}.busqueda_vector, to_tsquery('spanish', %s))", [expresion])
+        ).order_by("puntaje", "id")
+
+
+def _motor_texto():
+    if connection.vendor == "postgresql":
+        return _TextoPostgres
+    if connection.vendor == "sqlite":
+        return _TextoSQLite
+    raise NotImplementedError(f"El backend de búsqueda en base no soporta {connection.vendor}")
+
+
+class DBSearchBackend(BaseSearchBackend):
+
+    def _subir_version(self):
+        actualizadas = VersionIndiceBusqueda.objects.filter(pk=1).update(version=F("version") + 1)
+        if not actualizadas:
+            VersionIndiceBusqueda.objects.get_or_create(pk=1, defaults={"version": 1})
+
+    def generacion(self):
+        """Versión actual del índice (la usa core.busqueda para invalidar su cache)."""
+        return VersionIndiceBusqueda.objects.filter(pk=1).values_list("version", flat=True).first() or 0
+
+    # --- escritura
+
+    def _borrar_docs(self, docs_qs):
+        ids = list(docs_qs.values_list("id", flat=True))
+        if not ids:
+            return
+        if connection.vendor == "sqlite":
+            with connection.cursor() as cursor:
+                for i in range(0, len(ids), 500):
+                    parte = ids[i:i + 500]
+                    cursor.execute(
+                        f"DELETE FROM {TABLA_FTS} WHERE rowid IN ({', '.join(['%s'] * len(parte))})", parte
+                    )
+        DocumentoBusqueda.objects.filter(id__in=ids).delete()
+
+    def update(self, index, iterable, commit=True):
+        contenido = index.get_content_field()
+        nuevos = []
+        for obj in iterable:
+            datos = index.full_prepare(obj)
+            texto = datos.pop(contenido, "") or ""
+            nuevos.append(DocumentoBusqueda(
+                doc_id=datos.pop(ID),
+                django_ct=datos.pop(DJANGO_CT),
+                django_id=datos.pop(DJANGO_ID),
+                texto=texto,
+                campos={k: _a_json(v) for k, v in datos.items()},
+            ))
+        if not nuevos:
+            return
+
+        with transaction.atomic():
+            self._borrar_docs(DocumentoBusqueda.objects.filter(doc_id__in=[d.doc_id for d in nuevos]))
+            DocumentoBusqueda.objects.bulk_create(nuevos, batch_size=self.batch_size)
+            if connection.vendor == "sqlite":
+                with connection.cursor() as cursor:
+                    cursor.executemany(
+                        f"INSERT INTO {TABLA_FTS}(rowid, texto) VALUES (%s, %s)",
+                        [(d.pk, d.texto) for d in nuevos],
+                    )
+            self._subir_version()
+
+    def remove(self, obj_or_string, commit=True):
+        with transaction.atomic():
+            self._borrar_docs(DocumentoBusqueda.objects.filter(doc_id=get_identifier(obj_or_string)))
+            self._subir_version()
+
+    def clear(self, models=None, commit=True):
+        with transaction.atomic():
+            if models:
+                self._borrar_docs(DocumentoBusqueda.objects.filter(django_ct__in=[get_model_ct(m) for m in models]))
+            else:
+                if connection.vendor == "sqlite":
+                    with connection.cursor() as cursor:
+                        cursor.execute(f"DELETE FROM {TABLA_FTS}")
+                DocumentoBusqueda.objects.all().delete()
+            self._subir_version()
+
+    def ids_indexados(self, model) -> set[str]:
+        """Pks de `model` que hay en el índice."""
+        return set(
+            DocumentoBusqueda.objects.filter(django_ct=get_model_ct(model)).values_list("django_id", flat=True)
+        )
+
+    def optimize(self):
+        """Fusiona los segmentos del índice FTS5 (en Postgres alcanza con actualizar estadísticas)."""
+        with connection.cursor() as cursor:
+            if connection.vendor == "sqlite":
+                cursor.execute(f"INSERT INTO {TABLA_FTS}({TABLA_FTS}) VALUES ('optimize')")
+            else:
+                cursor.execute(f"ANALYZE {TABLA}")
+
+    # --- consulta
+
+    def _q_hoja(self, expresion, valor, motor, textos):
+        campo, tipo = SearchNode().split_expression(expresion)
+        if campo == CAMPO_CONTENIDO:
+            consulta = motor.expresion(_texto_consulta(valor))
+            if not consulta:
+                return Q(pk__in=[])
+            textos.append(consulta)
+            return motor.filtro(consulta)
+
+        columna = {ID: "doc_id", DJANGO_CT: "django_ct", DJANGO_ID: "django_id"}.get(campo, f"campos__{campo}")
+        if tipo in ("content", "contains"):
+            tipo = "icontains"
+        elif tipo == "startswith":
+            tipo = "istartswith"
+        elif tipo == "in":
+            valor = [_a_json(v) for v in valor]
+        elif tipo == "range":
+            desde, hasta = valor
+            return Q(**{f"{columna}__gte": _a_json(desde), f"{columna}__lte": _a_json(hasta)})
+        elif tipo not in ("exact", "gt", "gte", "lt", "lte"):
+            raise NotImplementedError(f"Filtro no soportado por el backend en base: {tipo}")
+        if tipo != "in":
+            valor = _a_json(getattr(valor, "query_string", valor))
+        return Q(**{f"{columna}__{tipo}": valor})
+
+    def _q_nodo(self, nodo, motor, textos):
+        q = Q()
+        for hijo in nodo.children:
+            if isinstance(hijo, SearchNode):
+                parte = self._q_nodo(hijo, motor, textos)
+            else:
+                parte = self._q_hoja(hijo[0], hijo[1], motor, textos)
+            q = (q | parte) if nodo.connector == SearchNode.OR and q else (q & parte)
+        return ~q if nodo.negated else q
+
+    @log_query
+    def search(self, query_string, filtros=None, models=None, start_offset=0, end_offset=None,
+               sort_by=None, result_class=None, limit_to_registered_models=None, **kwargs):
+        motor = _motor_texto()
+        unified = connections[self.connection_alias].get_unified_index()
+        result_class = result_class or SearchResult
+
+        if models:
+            cts = [get_model_ct(m) for m in models]
+        else:
+            cts = self.build_models_list()
+        qs = DocumentoBusqueda.objects.filter(django_ct__in=cts)
+
+        textos = []
+        if filtros is not None and len(filtros):
+            qs = qs.filter(self._q_nodo(filtros, motor, textos))
+
+        hits = qs.count()
+        if not hits:
+            return {"results": [], "hits": 0}
+
+        if sort_by:
+            orden = []
+            for campo in sort_by:
+                desc = campo.startswith("-")
+                nombre = campo.lstrip("-")
+                columna = {ID: "doc_id", DJANGO_CT: "django_ct", DJANGO_ID: "django_id"}.get(nombre, f"campos__{nombre}")
+                orden.append(f"-{columna}" if desc else columna)
+            qs = qs.annotate(puntaje=RawSQL("0", [])).order_by(*orden, "id")
+        elif textos:
+            # Relevancia según el primer término de texto (en `buscar` hay uno solo)
+            qs = motor.por_relevancia(qs, textos[0])
+        else:
+            qs = qs.annotate(puntaje=RawSQL("0", [])).order_by("id")
+
+        qs = qs[start_offset:end_offset] if end_offset is not None else qs[start_offset:]
+
+        indices = {get_model_ct(m): unified.get_index(m) for m in unified.get_indexed_models()}
+        resultados = []
+        for doc in qs:
+            index = indices.get(doc.django_ct)
+            if index is None:
+                continue
+            app_label, model_name = doc.django_ct.split(".")
+            campos = {}
+            for clave, valor in doc.campos.items():
+                campo = index.fields.get(clave)
+                campos[clave] = campo.convert(valor) if campo is not None and hasattr(campo, "convert") else valor
+            puntaje = -(doc.puntaje or 0)
+            resultados.append(result_class(app_label, model_name, doc.django_id, puntaje, **campos))
+        return {"results": resultados, "hits": hits}
+
+    def prep_value(self, value):
+        return value
+
+    def more_like_this(self, model_instance, additional_query_string=None, result_class=None, **kwargs):
+        return {"results": [], "hits": 0}
+
+
+class DBSearchQuery(BaseSearchQuery):
+    """Pasa al backend el árbol de filtros tal cual, en vez de un string de consulta."""
+
+    def build_query(self):
+        return str(self.query_filter) if self.query_filter else "*"
+
+    def build_params(self, spelling_query=None):
+        kwargs = super().build_params(spelling_query=spelling_query)
+        kwargs["filtros"] = self.query_filter
+        return kwargs
+
+    def build_query_fragment(self, field, filter_type, value):
+        return f"{field}__{filter_type}={_texto_consulta(value)}"
+
+
+class DBSearchEngine(BaseEngine):
+    backend = DBSearchBackend
+    query = DBSearchQuery
@@ -1,5 +1,20 @@
+from datetime import datetime, timezone as dt_timezone
+
 from haystack import indexes
-from .models import Comedor
+from .models import Comedor, Publicacion
+
+# Publicaciones sin fecha_fin: se indexan con un "vence" muy lejano para poder filtrar por rango
+SIN_VENCIMIENTO = datetime(2999, 12, 31)
+
+
+def fecha_indice(valor):
+    """Las fechas van al índice en UTC y sin tzinfo (Whoosh no maneja zonas horarias)."""
+    if valor is None:
+        return None
+    if valor.tzinfo is not None:
+        valor = valor.astimezone(dt_timezone.utc).replace(tzinfo=None)
+    return valor
+
 
 class ComedorIndex(indexes.SearchIndex, indexes.Indexable):
     text = indexes.CharField(document=True, use_template=True)
@@ -7,4 +22,43 @@ class ComedorIndex(indexes.SearchIndex, indexes.Indexable):
     barrio = indexes.CharField(model_attr='barrio')
 
     def get_model(self):
-        return Comedor
\ No newline at end of file
+        return Comedor
+
+
+class PublicacionIndex(indexes.SearchIndex, indexes.Indexable):
+    """
+    Una publicación con sus artículos pedidos y los datos del comedor guardados
+    en el índice, así el buscador arma el resultado sin ir a la base.
+    """
+    text = indexes.CharField(document=True, use_template=True)
+    titulo = indexes.CharField(model_attr='titulo')
+    articulos = indexes.MultiValueField()
+    comedor_id = indexes.IntegerField(model_attr='id_comedor_id')
+    comedor_nombre = indexes.CharField(model_attr='id_comedor__nombre')
+    comedor_barrio = indexes.CharField(model_attr='id_comedor__barrio')
+    fecha_inicio = indexes.DateTimeField(model_attr='fecha_inicio')
+    fecha_fin = indexes.DateTimeField(model_attr='fecha_fin', null=True)
+    vence = indexes.DateTimeField()
+
+    def get_model(self):
+        return Publicacion
+
+    def index_queryset(self, using=None):
+        return (
+            self.get_model().objects
+            .select_related('id_comedor')
+            .prefetch_related('publicacionarticulo_set')
+        )
+
+    def prepare_articulos(self, obj):
+        # Whoosh guarda los multivalores separados por coma
+        return [a.nombre_articulo.replace(',', ' ') for a in obj.publicacionarticulo_set.all()]
+
+    def prepare_fecha_inicio(self, obj):
+        return fecha_indice(obj.fecha_inicio)
+
+    def prepare_fecha_fin(self, obj):
+        return fecha_indice(obj.fecha_fin)
+
+    def prepare_vence(self, obj):
+        return fecha_indice(obj.fecha_fin) or SIN_VENCIMIENTO
@@ -0,0 +1,241 @@
+# core/search_queue.py
+"""
+Indexación incremental y asincrónica para Haystack.
+
+- ColaSignalProcessor (HAYSTACK_SIGNAL_PROCESSOR) no toca el índice: sólo
+  encola en ColaIndexacion, dentro de la misma transacción que el save/delete.
+- procesar_cola() aplica la cola en lotes (lo llama el comando
+  `procesar_indice_busqueda`, que corre como proceso aparte).
+- ejecutar_reconstruccion() rehace el índice completo por partes, dejando
+  el progreso en ReconstruccionIndice. Actualiza los documentos en el lugar
+  y al final saca los que ya no existen: la búsqueda sigue respondiendo
+  completa mientras tanto.
+"""
+import logging
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+from haystack import connections
+from haystack.exceptions import NotHandled
+from haystack.query import SearchQuerySet
+from haystack.signals import BaseSignalProcessor
+
+from .models import ColaIndexacion, Comedor, Publicacion, PublicacionArticulo, ReconstruccionIndice
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 200
+# Una reconstrucción "en_curso" sin latido (tomado) hace más que esto es de un worker que murió
+RECONSTRUCCION_VENCE_SEGUNDOS = getattr(settings, "BUSQUEDA_RECONSTRUCCION_VENCE_SEGUNDOS", 600)
+
+
+def _label(model) -> str:
+    return f"{model._meta.app_label}.{model._meta.model_name}"
+
+
+def _unified_index(using="default"):
+    return connections[using].get_unified_index()
+
+
+def _esta_indexado(model) -> bool:
+    try:
+        _unified_index().get_index(model)
+    except NotHandled:
+        return False
+    return True
+
+
+def encolar(model, pks, accion) -> None:
+    pks = [pk for pk in pks if pk is not None]
+    if not pks or not _esta_indexado(model):
+        return
+    ColaIndexacion.objects.bulk_create(
+        ColaIndexacion(modelo=_label(model), objeto_id=str(pk), accion=accion) for pk in pks
+    )
+
+
+def _dependientes(sender, instance, created=False):
+    """
+    Documentos de otros modelos que guardan datos de `instance` y hay que reindexar:
+    la publicación de un artículo, y las publicaciones de un comedor que cambió
+    (llevan su nombre y barrio).
+    """
+    if sender is PublicacionArticulo:
+        return [(Publicacion, [instance.id_publicacion_id])]
+    if sender is Comedor and not created:
+        return [(Publicacion, list(Publicacion.objects.filter(id_comedor_id=instance.pk).values_list("id", flat=True)))]
+    return []
+
+
+class ColaSignalProcessor(BaseSignalProcessor):
+    """Encola los cambios de los modelos indexados en vez de actualizar el índice en el request."""
+
+    def setup(self):
+        models.signals.post_save.connect(self.handle_save)
+        models.signals.post_delete.connect(self.handle_delete)
+
+    def teardown(self):
+        models.signals.post_save.disconnect(self.handle_save)
+        models.signals.post_delete.disconnect(self.handle_delete)
+
+    def handle_save(self, sender, instance, raw=False, created=False, **kwargs):
+        if raw:
+            return
+        encolar(sender, [instance.pk], ColaIndexacion.ACCION_ACTUALIZAR)
+        for model, pks in _dependientes(sender, instance, created):
+            encolar(model, pks, ColaIndexacion.ACCION_ACTUALIZAR)
+
+    def handle_delete(self, sender, instance, **kwargs):
+        encolar(sender, [instance.pk], ColaIndexacion.ACCION_ELIMINAR)
+        if sender is PublicacionArticulo:
+            for model, pks in _dependientes(sender, instance):
+                encolar(model, pks, ColaIndexacion.ACCION_ACTUALIZAR)
+
+
+def procesar_cola(batch_size: int = BATCH_SIZE, using: str = "default") -> int:
+    """
+    Aplica hasta `batch_size` cambios encolados. Si un objeto aparece varias veces
+    en el lote vale la última acción. Devuelve cuántas entradas de la cola se consumieron.
+    """
+    lote = list(ColaIndexacion.objects.order_by("id")[:batch_size])
+    if not lote:
+        return 0
+
+    # (modelo, id) -> última acción
+    ultimas = {}
+    for tarea in lote:
+        ultimas[(tarea.modelo, tarea.objeto_id)] = tarea.accion
+
+    por_modelo = {}
+    for (modelo, objeto_id), accion in ultimas.items():
+        por_modelo.setdefault(modelo, {ColaIndexacion.ACCION_ACTUALIZAR: [], ColaIndexacion.ACCION_ELIMINAR: []})
+        por_modelo[modelo][accion].append(objeto_id)
+
+    backend = connections[using].get_backend()
+    ui = _unified_index(using)
+    for modelo, acciones in por_modelo.items():
+        try:
+            model = apps.get_model(modelo)
+            index = ui.get_index(model)
+        except (LookupError, NotHandled):
+            logger.warning("[search_queue] Modelo no indexado en la cola: %s", modelo)
+            continue
+
+        a_eliminar = set(acciones[ColaIndexacion.ACCION_ELIMINAR])
+        ids = acciones[ColaIndexacion.ACCION_ACTUALIZAR]
+        if ids:
+            objetos = list(index.index_queryset(using=using).filter(pk__in=ids))
+            if objetos:
+                # Un solo update (un solo writer/commit de Whoosh) por modelo y lote
+                backend.update(index, objetos)
+            # Los que ya no existen (o quedaron fuera de index_queryset) se sacan del índice
+            encontrados = {str(obj.pk) for obj in objetos}
+            a_eliminar.update(pk for pk in ids if pk not in encontrados)
+        for pk in a_eliminar:
+            backend.remove(f"{modelo}.{pk}")
+
+    ColaIndexacion.objects.filter(id__in=[t.id for t in lote]).delete()
+    return len(lote)
+
+
+def _reconstruccion_disponible(ahora):
+    """Pendiente, o en curso sin señales de vida (el worker que la tenía se cayó)."""
+    return (
+        Q(estado=ReconstruccionIndice.ESTADO_PENDIENTE)
+        | Q(estado=ReconstruccionIndice.ESTADO_EN_CURSO, tomado__lt=ahora - timedelta(seconds=RECONSTRUCCION_VENCE_SEGUNDOS))
+    )
+
+
+def solicitar_reconstruccion(usuario=None) -> ReconstruccionIndice:
+    """
+    Crea un pedido de reconstrucción, o devuelve el que ya está pendiente/en curso.
+    Uno en curso abandonado también se devuelve: el próximo worker lo retoma.
+    """
+    activo = (
+        ReconstruccionIndice.objects
+        .filter(estado__in=[ReconstruccionIndice.ESTADO_PENDIENTE, ReconstruccionIndice.ESTADO_EN_CURSO])
+        .order_by("id")
+        .first()
+    )
+    if activo:
+        return activo
+    return ReconstruccionIndice.objects.create(solicitado_por=usuario)
+
+
+def tomar_reconstruccion_pendiente() -> ReconstruccionIndice | None:
+    """
+    Reserva el pedido pendiente más viejo, o uno en curso cuyo worker dejó de avanzar
+    hace más de RECONSTRUCCION_VENCE_SEGUNDOS (UPDATE condicional, así dos workers no toman el mismo).
+    """
+    ahora = timezone.now()
+    disponibles = _reconstruccion_disponible(ahora)
+    candidatos = ReconstruccionIndice.objects.filter(disponibles).order_by("id")
+    for pk in candidatos.values_list("id", flat=True)[:5]:
+        tomados = ReconstruccionIndice.objects.filter(disponibles, pk=pk).update(
+            estado=ReconstruccionIndice.ESTADO_EN_CURSO, iniciado=ahora, tomado=ahora
+        )
+        if tomados:
+            return ReconstruccionIndice.objects.get(pk=pk)
+    return None
+
+
+def _quitar_sobrantes(model, vigentes: set[str], using: str = "default") -> int:
+    """Saca del índice los documentos de `model` cuyo pk no está en `vigentes`. Devuelve cuántos sacó."""
+    backend = connections[using].get_backend()
+    if hasattr(backend, "ids_indexados"):   # core/search_whoosh.py y core/search_backend.py
+        indexados = backend.ids_indexados(model)
+    else:
+        indexados = {str(pk) for pk in SearchQuerySet(using=using).models(model).values_list("pk", flat=True)}
+    sobrantes = indexados - vigentes
+    for pk in sobrantes:
+        backend.remove(f"{_label(model)}.{pk}")
+    return len(sobrantes)
+
+
+def ejecutar_reconstruccion(job: ReconstruccionIndice, batch_size: int = BATCH_SIZE, using: str = "default") -> None:
+    """
+    Rehace el índice completo, modelo por modelo y en lotes, actualizando el progreso del job.
+    No vacía el índice antes: cada lote reemplaza sus documentos y, al terminar un modelo,
+    se sacan los que quedaron sin fila en la base (o fuera de index_queryset).
+    """
+    backend = connections[using].get_backend()
+    indices = [(model, _unified_index(using).get_index(model)) for model in _unified_index(using).get_indexed_models()]
+
+    job.estado = ReconstruccionIndice.ESTADO_EN_CURSO
+    job.iniciado = job.iniciado or timezone.now()
+    job.tomado = timezone.now()
+    job.procesados = 0
+    try:
+        job.total = sum(index.index_queryset(using=using).count() for _, index in indices)
+        job.save(update_fields=["estado", "iniciado", "tomado", "total", "procesados"])
+        for model, index in indices:
+            qs = index.index_queryset(using=using).order_by("pk")
+            vigentes = set()
+            ultimo_pk = None
+            while True:
+                lote_qs = qs if ultimo_pk is None else qs.filter(pk__gt=ultimo_pk)
+                lote = list(lote_qs[:batch_size])
+                if not lote:
+                    break
+                backend.update(index, lote)
+                vigentes.update(str(obj.pk) for obj in lote)
+                ultimo_pk = lote[-1].pk
+                job.procesados += len(lote)
+                job.tomado = timezone.now()   # sigue viva: que otro worker no la retome
+                job.save(update_fields=["procesados", "tomado"])
+            _quitar_sobrantes(model, vigentes, using)
+    except Exception as e:
+        logger.exception("[search_queue] Falló la reconstrucción #%s", job.pk)
+        job.estado = ReconstruccionIndice.ESTADO_ERROR
+        job.error = str(e)
+        job.terminado = timezone.now()
+        job.save(update_fields=["estado", "error", "terminado"])
+        return
+
+    job.estado = ReconstruccionIndice.ESTADO_TERMINADO
+    job.terminado = timezone.now()
+    job.save(update_fields=["estado", "terminado"])
@@ -0,0 +1,99 @@
+# core/search_whoosh.py
+"""
+Backend Whoosh con searcher reutilizable.
+
+El backend de Haystack abre un searcher nuevo (y relee los segmentos de
+whoosh_index/) en cada consulta, y otro más para contar documentos. Acá el
+índice queda envuelto en _IndiceConSearcher, que mantiene un único searcher
+abierto y lo reabre sólo cuando cambió la generación del TOC (o sea, cuando
+el worker de indexación comiteó algo). Searcher.refresh() además reutiliza
+los segmentos que no cambiaron.
+
+Las conexiones de Haystack son por hilo, así que cada hilo del proceso tiene
+su propio searcher y no hace falta sincronizar.
+"""
+from haystack.backends.whoosh_backend import WhooshEngine, WhooshSearchBackend
+from haystack.constants import DJANGO_CT, DJANGO_ID
+from haystack.utils import get_model_ct
+
+
+class _SearcherSinCerrar:
+    """Delega todo en el searcher compartido, salvo close(): Haystack lo cierra al terminar cada consulta."""
+
+    def __init__(self, searcher):
+        self._searcher = searcher
+
+    def close(self):
+        pass
+
+    def __getattr__(self, nombre):
+        return getattr(self._searcher, nombre)
+
+
+class _IndiceConSearcher:
+    """Envuelve el índice de Whoosh: mismas operaciones, pero searcher() devuelve siempre el mismo."""
+
+    def __init__(self, index):
+        self._index = index
+        self._searcher = None
+
+    def refresh(self):
+        # Haystack hace `self.index = self.index.refresh()` antes de cada operación
+        self._index = self._index.refresh()
+        return self
+
+    def searcher(self, **kwargs):
+        if kwargs:
+            return self._index.searcher(**kwargs)
+        if self._searcher is None:
+            self._searcher = self._index.searcher()
+        else:
+            # Sólo relee si cambió la generación del TOC; si no, devuelve el mismo searcher
+            self._searcher = self._searcher.refresh()
+        return _SearcherSinCerrar(self._searcher)
+
+    def doc_count(self):
+        return self.searcher().doc_count()
+
+    def cerrar(self):
+        if self._searcher is not None:
+            self._searcher.close()
+            self._searcher = None
+
+    def __getattr__(self, nombre):
+        return getattr(self._index, nombre)
+
+
+class PooledWhooshSearchBackend(WhooshSearchBackend):
+
+    def setup(self):
+        if isinstance(getattr(self, "index", None), _IndiceConSearcher):
+            self.index.cerrar()   # delete_index() vuelve a llamar a setup()
+        super().setup()
+        self.index = _IndiceConSearcher(self.index)
+
+    def segmentos(self) -> int:
+        """Cantidad de segmentos del índice (cada commit incremental suma uno hasta que se fusionan)."""
+        if not self.setup_complete:
+            self.setup()
+        return len(self.index.refresh()._segments())
+
+    def ids_indexados(self, model) -> set[str]:
+        """
+        Pks de `model` que hay en el índice. Se leen los campos guardados: una búsqueda
+        de "*" sólo trae los documentos con algún término en el texto.
+        """
+        if not self.setup_complete:
+            self.setup()
+        searcher = self.index.refresh().searcher()
+        return {doc[DJANGO_ID] for doc in searcher.documents(**{DJANGO_CT: get_model_ct(model)})}
+
+    def optimize(self):
+        if not self.setup_complete:
+            self.setup()
+        self.index.cerrar()
+        super().optimize()
+
+
+class PooledWhooshEngine(WhooshEngine):
+    backend = PooledWhooshSearchBackend
@@ -0,0 +1,78 @@
+# core/signals.py
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import stats, sugerencias
+from .favoritos import invalidar_favoritos
+from .models import Comedor, Favoritos, PublicacionArticulo, UserProfile
+
+
+# Snapshot de estadísticas (core/stats.py): se ajusta por instancia.
+# QuerySet.delete() también pasa por acá (con receivers conectados Django borra de a
+# una instancia), pero QuerySet.update(), bulk_create() y bulk_update() NO mandan
+# señales: el código que escriba comedores así tiene que llamar a
+# stats.rebuild_snapshot() al terminar (o correr `manage.py recalcular_estadisticas`).
+# Hoy sólo lo hacen los benchmarks, dentro de una transacción que se descarta.
+@receiver(post_save, sender=Comedor, dispatch_uid="stats_comedor_guardado")
+def actualizar_estadisticas_al_guardar(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return  # loaddata: se recalcula con `recalcular_estadisticas`
+    anteriores = getattr(instance, "_valores_originales", None)
+    if created:
+        stats.registrar_alta(instance)
+    elif anteriores is None:
+        # Instancia armada a mano (sin pasar por la base): no sabemos qué cambió
+        stats.rebuild_snapshot()
+    else:
+        stats.registrar_cambio(instance, anteriores)
+    instance.recordar_valores_originales()
+
+
+@receiver(post_delete, sender=Comedor, dispatch_uid="stats_comedor_eliminado")
+def actualizar_estadisticas_al_eliminar(sender, instance, **kwargs):
+    stats.registrar_baja(instance)
+
+
+@receiver(post_save, sender=Favoritos, dispatch_uid="favoritos_guardado")
+@receiver(post_delete, sender=Favoritos, dispatch_uid="favoritos_eliminado")
+def invalidar_cache_favoritos(sender, instance, **kwargs):
+    # id_usuario es un UserProfile: se invalida por el auth.User dueño del perfil
+    if Favoritos.id_usuario.is_cached(instance):
+        user_id = instance.id_usuario.user_id
+    else:
+        user_id = (
+            UserProfile.objects
+            .filter(pk=instance.id_usuario_id)
+            .values_list("user_id", flat=True)
+            .first()
+        )
+    if user_id is not None:
+        # Al confirmar: borrarla antes dejaría que otro request vuelva a cachear el conjunto
+        # viejo (todavía sin el cambio) hasta que venza FAVORITOS_CACHE_TIMEOUT
+        transaction.on_commit(lambda: invalidar_favoritos(user_id))
+
+
+# Autocompletado: se aplica recién al confirmar, para no sugerir algo que después se revierte
+@receiver(post_save, sender=Comedor, dispatch_uid="sugerencias_comedor_guardado")
+def sugerencias_comedor_guardado(sender, instance, raw=False, **kwargs):
+    if not raw:
+        transaction.on_commit(lambda: sugerencias.comedor_cambiado(instance))
+
+
+@receiver(post_delete, sender=Comedor, dispatch_uid="sugerencias_comedor_eliminado")
+def sugerencias_comedor_eliminado(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: sugerencias.comedor_eliminado(pk))
+
+
+@receiver(post_save, sender=PublicacionArticulo, dispatch_uid="sugerencias_articulo_guardado")
+def sugerencias_articulo_guardado(sender, instance, raw=False, **kwargs):
+    if not raw:
+        transaction.on_commit(lambda: sugerencias.articulo_cambiado(instance))
+
+
+@receiver(post_delete, sender=PublicacionArticulo, dispatch_uid="sugerencias_articulo_eliminado")
+def sugerencias_articulo_eliminado(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: sugerencias.articulo_eliminado(pk))
@@ -0,0 +1,132 @@
+# core/stats.py
+"""
+Snapshot de estadísticas del dashboard (home y privada).
+
+En lugar de correr count/Sum/distinct en cada request, se mantiene una fila
+de EstadisticasComedores que se ajusta con cada alta, cambio o baja de Comedor.
+
+Los ajustes vienen de las señales post_save/post_delete (core/signals.py).
+Las escrituras masivas (QuerySet.update(), bulk_create(), bulk_update()) no
+mandan señales: después de usarlas hay que llamar a rebuild_snapshot().
+"""
+from django.db import models, transaction
+
+from .models import Comedor, EstadisticasComedores
+
+SNAPSHOT_PK = 1
+RECIENTES_N = 6
+
+
+def _contar(mapa: dict, clave, delta: int) -> None:
+    if clave is None:
+        return
+    total = mapa.get(clave, 0) + delta
+    if total > 0:
+        mapa[clave] = total
+    else:
+        mapa.pop(clave, None)
+
+
+def rebuild_snapshot() -> EstadisticasComedores:
+    """Recalcula el snapshot completo desde la tabla de comedores."""
+    with transaction.atomic():
+        agregados = Comedor.objects.aggregate(
+            total=models.Count('id'),
+            capacidad=models.Sum('capacidad'),
+        )
+        barrios = {
+            row['barrio']: row['n']
+            for row in Comedor.objects.values('barrio').annotate(n=models.Count('id')).order_by()
+        }
+        tipos = {
+            row['tipo']: row['n']
+            for row in Comedor.objects.values('tipo').annotate(n=models.Count('id')).order_by()
+        }
+        recientes = list(Comedor.objects.order_by('-id').values_list('id', flat=True)[:RECIENTES_N])
+
+        snapshot, _ = EstadisticasComedores.objects.update_or_create(
+            pk=SNAPSHOT_PK,
+            defaults={
+                'comedores_count': agregados['total'] or 0,
+                'total_capacity': agregados['capacidad'] or 0,
+                'barrios': barrios,
+                'tipos': tipos,
+                'recientes': recientes,
+            },
+        )
+    return snapshot
+
+
+def get_snapshot() -> EstadisticasComedores:
+    """Devuelve el snapshot (una sola consulta). Si todavía no existe, lo construye."""
+    snapshot = EstadisticasComedores.objects.filter(pk=SNAPSHOT_PK).first()
+    if snapshot is None:
+        snapshot = rebuild_snapshot()
+    return snapshot
+
+
+def _aplicar(cambio) -> None:
+    """Aplica `cambio(snapshot)` con la fila bloqueada, dentro de la transacción actual."""
+    with transaction.atomic():
+        snapshot = (
+            EstadisticasComedores.objects
+            .select_for_update()
+            .filter(pk=SNAPSHOT_PK)
+            .first()
+        )
+        if snapshot is None:
+            # Primera vez: el rebuild ya ve el cambio que se está registrando
+            rebuild_snapshot()
+            return
+        cambio(snapshot)
+        snapshot.save()
+
+
+def registrar_alta(comedor: Comedor) -> None:
+    def cambio(snapshot):
+        snapshot.comedores_count += 1
+        snapshot.total_capacity += comedor.capacidad or 0
+        _contar(snapshot.barrios, comedor.barrio, +1)
+        _contar(snapshot.tipos, comedor.tipo, +1)
+        recientes = [comedor.pk] + [pk for pk in snapshot.recientes if pk != comedor.pk]
+        snapshot.recientes = sorted(recientes, reverse=True)[:RECIENTES_N]
+    _aplicar(cambio)
+
+
+def registrar_cambio(comedor: Comedor, anteriores: dict) -> None:
+    nuevos = {'barrio': comedor.barrio, 'tipo': comedor.tipo, 'capacidad': comedor.capacidad}
+    if nuevos == anteriores:
+        return
+
+    def cambio(snapshot):
+        snapshot.total_capacity += (nuevos['capacidad'] or 0) - (anteriores.get('capacidad') or 0)
+        if nuevos['barrio'] != anteriores.get('barrio'):
+            _contar(snapshot.barrios, anteriores.get('barrio'), -1)
+            _contar(snapshot.barrios, nuevos['barrio'], +1)
+        if nuevos['tipo'] != anteriores.get('tipo'):
+            _contar(snapshot.tipos, anteriores.get('tipo'), -1)
+            _contar(snapshot.tipos, nuevos['tipo'], +1)
+    _aplicar(cambio)
+
+
+def registrar_baja(comedor: Comedor) -> None:
+    def cambio(snapshot):
+        snapshot.comedores_count = max(snapshot.comedores_count - 1, 0)
+        snapshot.total_capacity -= comedor.capacidad or 0
+        _contar(snapshot.barrios, comedor.barrio, -1)
+        _contar(snapshot.tipos, comedor.tipo, -1)
+        if comedor.pk in snapshot.recientes:
+            # Se fue uno de los recientes: se vuelve a pedir la lista (caso poco frecuente)
+            snapshot.recientes = list(
+                Comedor.objects.exclude(pk=comedor.pk)
+                .order_by('-id').values_list('id', flat=True)[:RECIENTES_N]
+            )
+    _aplicar(cambio)
+
+
+def comedores_recientes(snapshot: EstadisticasComedores) -> list[Comedor]:
+    """Trae los comedores recientes del snapshot, en el orden guardado."""
+    if not snapshot.recientes:
+        return []
+    por_id = Comedor.objects.in_bulk(snapshot.recientes)
+    return [por_id[pk] for pk in snapshot.recientes if pk in por_id]
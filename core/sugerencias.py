@@ -0,0 +1,199 @@
+# core/sugerencias.py
+"""
+Autocompletado (typeahead) servido desde memoria.
+
+Se arma una lista ordenada de claves normalizadas (sin acentos ni
+mayúsculas) con los nombres de comedores, barrios y artículos pedidos, y
+cada consulta es un bisect + un recorrido corto: no toca la base ni el
+índice de búsqueda. Cada término entra también por cada palabra interna,
+así "popu" encuentra "Olla Popular".
+
+Los cambios hechos en este proceso se aplican al toque (señales); los de
+otros procesos se detectan por la generación del índice de búsqueda y se
+recargan en un hilo aparte, sin frenar las consultas.
+"""
+import bisect
+import threading
+import time
+
+from django.conf import settings
+
+from .busqueda import generacion_indice
+from .models import Comedor, PublicacionArticulo
+from .utils import normalizar_texto
+
+SUGERENCIAS_MAX = 10
+SUGERENCIAS_REFRESCO = getattr(settings, "SUGERENCIAS_REFRESCO_SEGUNDOS", 60)
+
+TIPO_COMEDOR = "comedor"
+TIPO_BARRIO = "barrio"
+TIPO_ARTICULO = "articulo"
+
+
+def _claves(texto: str) -> list[str]:
+    """Clave del término completo y de cada palabra interna en adelante."""
+    norm = normalizar_texto(texto)
+    if not norm:
+        return []
+    palabras = norm.split(" ")
+    return [" ".join(palabras[i:]) for i in range(len(palabras))]
+
+
+def _terminos_comedor(nombre, barrio, pk):
+    terminos = []
+    if nombre:
+        terminos.append((TIPO_COMEDOR, nombre, pk))
+    if barrio:
+        terminos.append((TIPO_BARRIO, barrio, 0))
+    return terminos
+
+
+def _terminos_articulo(nombre):
+    return [(TIPO_ARTICULO, nombre, 0)] if nombre else []
+
+
+class IndicePrefijos:
+    """
+    Multiconjunto de términos sobre una lista ordenada de (clave, tipo, texto, ref).
+    `ref` es el id del comedor para sugerencias de comedor (0 para el resto) y
+    `_cuentas` lleva cuántas filas aportan cada término (un barrio lo comparten muchos comedores).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entradas = []
+        self._cuentas = {}
+        self._por_origen = {}
+        self._listo = False
+        self._generacion = None
+        self._ultimo_chequeo = 0.0
+        self._recargando = False
+
+    # --- armado
+
+    def _cargar(self):
+        entradas, cuentas, por_origen = [], {}, {}
+
+        def agregar(origen, terminos):
+            por_origen[origen] = terminos
+            for termino in terminos:
+                cuentas[termino] = cuentas.get(termino, 0) + 1
+                if cuentas[termino] == 1:
+                    entradas.extend((clave, *termino) for clave in _claves(termino[1]))
+
+        for pk, nombre, barrio in Comedor.objects.values_list("id", "nombre", "barrio").iterator(chunk_size=2000):
+            agregar(("comedor", pk), _terminos_comedor(nombre, barrio, pk))
+        for pk, nombre in PublicacionArticulo.objects.values_list("id", "nombre_articulo").iterator(chunk_size=2000):
+            agregar(("articulo", pk), _terminos_articulo(nombre))
+
+        entradas.sort()
+        return entradas, cuentas, por_origen
+
+    def reconstruir(self, generacion=None):
+        entradas, cuentas, por_origen = self._cargar()
+        with self._lock:
+            self._entradas, self._cuentas, self._por_origen = entradas, cuentas, por_origen
+            self._generacion = generacion
+            self._ultimo_chequeo = time.monotonic()
+            self._listo = True
+            self._recargando = False
+
+    def _recargar_en_segundo_plano(self, generacion):
+        def correr():
+            try:
+                self.reconstruir(generacion)
+            finally:
+                self._recargando = False
+        threading.Thread(target=correr, name="sugerencias-recarga", daemon=True).start()
+
+    def _asegurar_fresco(self):
+        if not self._listo:
+            self.reconstruir(generacion_indice())
+            return
+        ahora = time.monotonic()
+        if self._recargando or ahora - self._ultimo_chequeo < SUGERENCIAS_REFRESCO:
+            return
+        self._ultimo_chequeo = ahora
+        generacion = generacion_indice()
+        if generacion is not None and generacion != self._generacion:
+            self._recargando = True
+            self._recargar_en_segundo_plano(generacion)
+
+    # --- cambios incrementales
+
+    def _sumar(self, termino):
+        n = self._cuentas.get(termino, 0) + 1
+        self._cuentas[termino] = n
+        if n == 1:
+            for clave in _claves(termino[1]):
+                bisect.insort(self._entradas, (clave, *termino))
+
+    def _restar(self, termino):
+        n = self._cuentas.get(termino, 0) - 1
+        if n > 0:
+            self._cuentas[termino] = n
+            return
+        self._cuentas.pop(termino, None)
+        for clave in _claves(termino[1]):
+            entrada = (clave, *termino)
+            i = bisect.bisect_left(self._entradas, entrada)
+            if i < len(self._entradas) and self._entradas[i] == entrada:
+                del self._entradas[i]
+
+    def reemplazar(self, origen, terminos):
+        """Cambia los términos que aporta `origen` (ej. ("comedor", 5)); [] lo saca."""
+        with self._lock:
+            if not self._listo:
+                return  # se arma completo en la primera consulta
+            anteriores = self._por_origen.pop(origen, [])
+            for termino in anteriores:
+                self._restar(termino)
+            for termino in terminos:
+                self._sumar(termino)
+            if terminos:
+                self._por_origen[origen] = terminos
+
+    # --- consulta
+
+    def sugerir(self, prefijo: str, limite: int = SUGERENCIAS_MAX) -> list[dict]:
+        prefijo = normalizar_texto(prefijo)
+        if not prefijo:
+            return []
+        self._asegurar_fresco()
+
+        vistos, resultado = set(), []
+        with self._lock:
+            entradas = self._entradas
+            i = bisect.bisect_left(entradas, (prefijo,))
+            while i < len(entradas) and len(resultado) < limite:
+                clave, tipo, texto, ref = entradas[i]
+                if not clave.startswith(prefijo):
+                    break
+                i += 1
+                if (tipo, texto, ref) in vistos:
+                    continue
+                vistos.add((tipo, texto, ref))
+                sugerencia = {"texto": texto, "tipo": tipo}
+                if tipo == TIPO_COMEDOR:
+                    sugerencia["id"] = ref
+                resultado.append(sugerencia)
+        return resultado
+
+
+indice = IndicePrefijos()
+
+
+def comedor_cambiado(comedor) -> None:
+    indice.reemplazar(("comedor", comedor.pk), _terminos_comedor(comedor.nombre, comedor.barrio, comedor.pk))
+
+
+def comedor_eliminado(pk) -> None:
+    indice.reemplazar(("comedor", pk), [])
+
+
+def articulo_cambiado(articulo) -> None:
+    indice.reemplazar(("articulo", articulo.pk), _terminos_articulo(articulo.nombre_articulo))
+
+
+def articulo_eliminado(pk) -> None:
+    indice.reemplazar(("articulo", pk), [])
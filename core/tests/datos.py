@@ -0,0 +1,69 @@
+# core/tests/datos.py
+"""Datos de prueba compartidos por los tests de core."""
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from haystack import connections
+
+from core.models import Comedor, Publicacion, PublicacionArticulo, TipoPublicacion, UserProfile
+
+# Cache por proceso: los tests no escriben en el cache compartido (cache/cache.sqlite3)
+CACHE_LOCAL = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+BACKEND = "core.perfiles.BackendConPerfil"
+
+
+def crear_usuario(username="ana", password="Clave-segura-123", verificado=True, **extra) -> User:
+    user = User.objects.create_user(username=username, email=f"{username}@example.com", password=password, **extra)
+    UserProfile.objects.create(user=user, email_verified=verificado)
+    return user
+
+
+def crear_comedor(nombre="Comedor Norte", barrio="Centro", tipo="Comunitario", capacidad=50, **extra) -> Comedor:
+    extra.setdefault("descripcion", f"Descripción de {nombre}")
+    return Comedor.objects.create(nombre=nombre, barrio=barrio, tipo=tipo, capacidad=capacidad, **extra)
+
+
+def crear_publicacion(comedor, titulo="Necesitamos alimentos", articulos=("Arroz", "Leche"), dias=7,
+                      **extra) -> Publicacion:
+    tipo, _ = TipoPublicacion.objects.get_or_create(descripcion="Donación")
+    extra.setdefault("fecha_fin", timezone.now() + timedelta(days=dias))
+    publicacion = Publicacion.objects.create(id_comedor=comedor, titulo=titulo, id_tipo_publicacion=tipo, **extra)
+    PublicacionArticulo.objects.bulk_create(
+        PublicacionArticulo(id_publicacion=publicacion, nombre_articulo=nombre) for nombre in articulos
+    )
+    return publicacion
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class PruebaCore(TestCase):
+    """TestCase con cache local vacío en cada test."""
+
+    def setUp(self):
+        cache.clear()
+
+    def entrar(self, user):
+        self.client.force_login(user, backend=BACKEND)
+
+
+class IndiceEnBase:
+    """
+    Mixin: el índice de búsqueda usa el backend en base (core/search_backend.py)
+    durante el test, así nada escribe en whoosh_index/.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self._haystack = mock.patch.dict(
+            connections.connections_info, {"default": {"ENGINE": "core.search_backend.DBSearchEngine"}}
+        )
+        self._haystack.start()
+        connections.reload("default")
+
+    def tearDown(self):
+        self._haystack.stop()
+        connections.reload("default")
+        super().tearDown()
@@ -0,0 +1,79 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.utils import timezone
+
+from core import busqueda, search_queue
+from core.models import ReconstruccionIndice
+
+from .datos import IndiceEnBase, PruebaCore, crear_comedor, crear_publicacion, crear_usuario
+
+
+class BuscarPaginaTests(IndiceEnBase, PruebaCore):
+
+    def setUp(self):
+        super().setUp()
+        busqueda._cache.clear()
+        self.comedores = [crear_comedor(f"Comedor Solidario {i}") for i in range(5)]
+        search_queue.procesar_cola()
+
+    def test_pagina_los_resultados(self):
+        with mock.patch.object(busqueda, "BUSCAR_PAGE_SIZE", 2):
+            primera = busqueda.buscar_pagina("solidario")
+            ultima = busqueda.buscar_pagina("solidario", page=3)
+        self.assertEqual(primera["comedores_total"], 5)
+        self.assertEqual(len(primera["comedores"]), 2)
+        self.assertTrue(primera["has_next"])
+        self.assertFalse(primera["has_previous"])
+        self.assertEqual(len(ultima["comedores"]), 1)
+        self.assertFalse(ultima["has_next"])
+
+    def test_cache_se_invalida_con_el_indice(self):
+        busqueda.buscar_pagina("solidario")
+        with mock.patch.object(busqueda, "_consultar_indice") as consultar:
+            busqueda.buscar_pagina("  SOLIDARIO ")
+        consultar.assert_not_called()
+
+        crear_comedor("Comedor Solidario nuevo")
+        search_queue.procesar_cola()
+        self.assertEqual(busqueda.buscar_pagina("solidario")["comedores_total"], 6)
+
+    def test_cache_vence_con_el_reloj(self):
+        crear_publicacion(self.comedores[0], "Campaña solidaria", fecha_fin=timezone.now() + timedelta(hours=1))
+        search_queue.procesar_cola()
+        self.assertEqual(busqueda.buscar_pagina("campaña")["publicaciones_total"], 1)
+
+        # Vence sin que cambie el índice: la página cacheada no sobrevive a su tramo de tiempo
+        dentro_de_2h = timezone.now() + timedelta(hours=2)
+        with mock.patch.object(busqueda.timezone, "now", return_value=dentro_de_2h), \
+                mock.patch.object(busqueda.time, "time", return_value=dentro_de_2h.timestamp()):
+            self.assertEqual(busqueda.buscar_pagina("campaña")["publicaciones"], [])
+
+    def test_vista_con_pagina_invalida(self):
+        response = self.client.get("/buscar/", {"q": "solidario", "page": "dos"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["resultado"]["page"], 1)
+
+
+class ReconstruccionVistasTests(PruebaCore):
+
+    def test_staff_pide_y_consulta_la_reconstruccion(self):
+        self.entrar(crear_usuario("admin", is_staff=True))
+        response = self.client.post("/rebuild_index/")
+        self.assertEqual(response.status_code, 202)
+        datos = response.json()
+        self.assertEqual(datos["estado"], ReconstruccionIndice.ESTADO_PENDIENTE)
+        self.assertEqual(datos["status_url"], f"/rebuild_index/{datos['id']}/")
+
+        # Un segundo pedido reutiliza el pendiente
+        self.assertEqual(self.client.post("/rebuild_index/").json()["id"], datos["id"])
+
+        response = self.client.get(datos["status_url"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["porcentaje"], 0)
+        self.assertEqual(self.client.get("/rebuild_index/999999/").status_code, 404)
+
+    def test_solo_staff(self):
+        self.entrar(crear_usuario())
+        self.assertEqual(self.client.post("/rebuild_index/").status_code, 302)
+        self.assertFalse(ReconstruccionIndice.objects.exists())
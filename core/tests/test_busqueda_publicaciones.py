@@ -0,0 +1,39 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+from core import busqueda, search_queue
+from core.models import PublicacionArticulo
+
+from .datos import IndiceEnBase, PruebaCore, crear_comedor, crear_publicacion
+
+
+class IndicePublicacionesTests(IndiceEnBase, PruebaCore):
+
+    def setUp(self):
+        super().setUp()
+        busqueda._cache.clear()
+        self.comedor = crear_comedor("Comedor Esperanza", barrio="Boedo")
+        self.vigente = crear_publicacion(self.comedor, "Campaña de invierno", articulos=("Frazadas", "Leche"))
+        crear_publicacion(self.comedor, "Campaña vieja", articulos=("Frazadas",),
+                          fecha_inicio=timezone.now() - timedelta(days=20),
+                          fecha_fin=timezone.now() - timedelta(days=1))
+        crear_publicacion(self.comedor, "Campaña futura", articulos=("Frazadas",),
+                          fecha_inicio=timezone.now() + timedelta(days=1))
+        search_queue.procesar_cola()
+
+    def test_busca_vigentes_por_articulo(self):
+        resultado = busqueda.buscar_pagina("frazadas")
+        self.assertEqual(resultado["publicaciones_total"], 1)
+        publicacion = resultado["publicaciones"][0]
+        self.assertEqual(publicacion["id"], self.vigente.pk)
+        self.assertEqual(publicacion["comedor_nombre"], "Comedor Esperanza")
+        self.assertEqual(publicacion["comedor_barrio"], "Boedo")
+        self.assertEqual(sorted(publicacion["articulos"]), ["Frazadas", "Leche"])
+        self.assertEqual(publicacion["fecha_fin"], self.vigente.fecha_fin.replace(microsecond=0))
+
+    def test_quitar_un_articulo_reindexa_la_publicacion(self):
+        PublicacionArticulo.objects.get(id_publicacion=self.vigente, nombre_articulo="Leche").delete()
+        search_queue.procesar_cola()
+        busqueda._cache.clear()
+        self.assertEqual(busqueda.buscar_pagina("leche")["publicaciones"], [])
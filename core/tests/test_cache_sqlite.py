@@ -0,0 +1,93 @@
+import os
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from core import utils
+from core.cache_sqlite import SQLiteCache
+
+from .datos import PruebaCore
+
+
+class SQLiteCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory(prefix="cache-test-")
+        self.addCleanup(directorio.cleanup)
+        self.ruta = os.path.join(directorio.name, "cache.sqlite3")
+        self.cache = SQLiteCache(self.ruta, {})
+
+    def _otro_proceso(self):
+        return SQLiteCache(self.ruta, {})
+
+    def test_get_set_y_tipos(self):
+        for valor in (5, True, "texto", {"a": [1, 2]}):
+            with self.subTest(valor=valor):
+                self.cache.set("clave", valor)
+                self.assertEqual(self._otro_proceso().get("clave"), valor)
+                self.assertIs(type(self.cache.get("clave")), type(valor))
+        self.assertIsNone(self.cache.get("no-existe"))
+        self.assertTrue(self.cache.delete("clave"))
+        self.assertFalse(self.cache.has_key("clave"))
+
+    def test_add_solo_pisa_entradas_vencidas(self):
+        ahora = time.time()
+        with mock.patch("core.cache_sqlite.time.time", return_value=ahora):
+            self.assertTrue(self.cache.add("cd", 1, timeout=60))
+            self.assertFalse(self._otro_proceso().add("cd", 2, timeout=60))
+        self.assertEqual(self.cache.get("cd"), 1)
+
+        with mock.patch("core.cache_sqlite.time.time", return_value=ahora + 61):
+            self.assertIsNone(self.cache.get("cd"))
+            self.assertTrue(self.cache.add("cd", 2, timeout=60))
+            self.assertEqual(self.cache.get("cd"), 2)
+
+    def test_incr_es_atomico_entre_conexiones(self):
+        self.cache.set("contador", 0)
+        instancias = [self._otro_proceso() for _ in range(4)]
+
+        def sumar(cache):
+            for _ in range(50):
+                cache.incr("contador")
+
+        hilos = [threading.Thread(target=sumar, args=(c,)) for c in instancias]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        self.assertEqual(self.cache.get("contador"), 200)
+
+        with self.assertRaises(ValueError):
+            self.cache.incr("no-existe")
+        self.cache.set("pickle", 1.5)
+        self.assertEqual(self.cache.incr("pickle", 2), 3.5)
+
+
+class ReenvioVerificacionTests(PruebaCore):
+
+    def test_limite_de_reenvios_y_devolucion(self):
+        # Reloj fijo a mitad de ventana, para que no cambie de tramo en medio del test
+        reloj = mock.patch("core.limites.time.time", return_value=utils.RESEND_WINDOW_S * 1000.5)
+        reloj.start()
+        self.addCleanup(reloj.stop)
+        email = "Ana@Example.com "
+        for _ in range(utils.RESEND_MAX_NO_WAIT):
+            self.assertEqual(utils.can_reenviar_now(email), (True, 0))
+        permitido, espera = utils.can_reenviar_now("ana@example.com")
+        self.assertFalse(permitido)
+        self.assertGreater(espera, 0)
+
+        utils.liberar_reenvio(email)
+        self.assertEqual(utils.can_reenviar_now(email), (True, 0))
+        # Otro correo tiene su propio contador
+        self.assertEqual(utils.can_reenviar_now("otro@example.com"), (True, 0))
+
+    def test_cooldown(self):
+        self.assertEqual(utils.cooldown_remaining("ana@example.com"), 0)
+        utils.start_cooldown("ana@example.com")
+        restante = utils.cooldown_remaining("ANA@example.com")
+        self.assertGreater(restante, 0)
+        self.assertLessEqual(restante, utils.COOLDOWN_S)
@@ -0,0 +1,83 @@
+from unittest import mock
+
+from django.utils import timezone
+
+from core import difusion
+from core.mail_queue import MAX_INTENTOS
+from core.mail_service import EmailService
+from core.models import CorreoPendiente, DifusionPublicacion, Favoritos
+
+from .datos import PruebaCore, crear_comedor, crear_publicacion, crear_usuario
+
+
+class DifusionPublicacionTests(PruebaCore):
+
+    def setUp(self):
+        super().setUp()
+        comedor = crear_comedor()
+        self.autor = crear_usuario("autor")
+        seguidores = [crear_usuario(f"seguidor{i}") for i in range(5)] + [
+            self.autor,
+            crear_usuario("sinverificar", verificado=False),
+            crear_usuario("inactivo", is_active=False),
+        ]
+        for user in seguidores:
+            Favoritos.objects.create(id_usuario=user.userprofile, id_comedor=comedor)
+        self.esperados = [f"seguidor{i}@example.com" for i in range(5)]
+        self.publicacion = crear_publicacion(comedor)
+
+    def _destinatarios_encolados(self):
+        return sorted(CorreoPendiente.objects.values_list("destinatario", flat=True))
+
+    def test_avisa_solo_a_los_favoritos_que_corresponde(self):
+        self.assertEqual(list(difusion.destinatarios(self.publicacion.id_comedor_id, self.autor)), self.esperados)
+
+        difusion.difundir_publicacion(self.publicacion, autor=self.autor)
+        self.assertEqual(difusion.procesar_difusiones(chunk=2), 1)
+        self.assertEqual(self._destinatarios_encolados(), self.esperados)
+        estado = DifusionPublicacion.objects.get()
+        self.assertEqual(estado.estado, DifusionPublicacion.ESTADO_TERMINADO)
+        self.assertEqual(estado.encolados, 5)
+
+    def test_sigue_desde_el_ultimo_tramo_confirmado(self):
+        difusion.difundir_publicacion(self.publicacion, autor=self.autor)
+        original = EmailService.send_new_publication
+        llamadas = []
+
+        def falla_en_el_segundo_tramo(**kwargs):
+            llamadas.append(kwargs["emails"])
+            if len(llamadas) == 2:
+                raise RuntimeError("se cortó la base")
+            return original(**kwargs)
+
+        with mock.patch.object(EmailService, "send_new_publication", side_effect=falla_en_el_segundo_tramo), \
+                self.assertLogs("core.difusion", "WARNING"):
+            difusion.procesar_difusiones(chunk=2)
+        estado = DifusionPublicacion.objects.get()
+        self.assertEqual(estado.estado, DifusionPublicacion.ESTADO_PENDIENTE)
+        self.assertEqual((estado.encolados, estado.intentos), (2, 1))
+        self.assertIn("se cortó", estado.ultimo_error)
+        self.assertGreater(estado.proximo_intento, timezone.now())
+        # Todavía no toca reintentarla
+        self.assertEqual(difusion.procesar_difusiones(chunk=2), 0)
+
+        DifusionPublicacion.objects.update(proximo_intento=timezone.now())
+        difusion.procesar_difusiones(chunk=2)
+        self.assertEqual(self._destinatarios_encolados(), self.esperados)
+        self.assertEqual(DifusionPublicacion.objects.get().estado, DifusionPublicacion.ESTADO_TERMINADO)
+
+    def test_queda_fallida_tras_agotar_los_intentos(self):
+        difusion.difundir_publicacion(self.publicacion, autor=self.autor)
+        with mock.patch.object(EmailService, "send_new_publication", side_effect=RuntimeError("sin base")), \
+                self.assertLogs("core.difusion", "WARNING") as logs:
+            for _ in range(MAX_INTENTOS):
+                DifusionPublicacion.objects.update(proximo_intento=timezone.now())
+                self.assertEqual(difusion.procesar_difusiones(chunk=2), 1)
+        self.assertEqual(logs.records[-1].levelname, "ERROR")
+        estado = DifusionPublicacion.objects.get()
+        self.assertEqual((estado.estado, estado.intentos), (DifusionPublicacion.ESTADO_FALLIDO, MAX_INTENTOS))
+        self.assertEqual(difusion.procesar_difusiones(chunk=2), 0)
+
+        self.assertEqual(difusion.reintentar_difusiones(), 1)
+        self.assertEqual(difusion.procesar_difusiones(chunk=2), 1)
+        self.assertEqual(self._destinatarios_encolados(), self.esperados)
@@ -0,0 +1,59 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.utils import timezone
+
+from core.models import Donacion, DonacionItem
+from core.pagination import encode_cursor
+
+from .datos import PruebaCore, crear_comedor, crear_publicacion, crear_usuario
+
+
+class LedgerDonacionesTests(PruebaCore):
+
+    def setUp(self):
+        super().setUp()
+        self.user = crear_usuario()
+        otro = crear_usuario("beto")
+        norte = crear_comedor("Norte")
+        sur = crear_comedor("Sur")
+        pub_norte = crear_publicacion(norte)
+        pub_sur = crear_publicacion(sur)
+        ahora = timezone.now()
+        self.donaciones = []
+        for i in range(5):
+            perfil = self.user.userprofile if i % 2 == 0 else otro.userprofile
+            pub = pub_norte if i < 3 else pub_sur
+            donacion = Donacion.objects.create(
+                id_usuario=perfil, id_comedor=pub.id_comedor, id_publicacion=pub,
+                fecha_alta=ahora - timedelta(hours=i),
+            )
+            DonacionItem.objects.create(id_donacion=donacion, nombre_articulo="Arroz", cantidad=i + 1)
+            self.donaciones.append(donacion)
+
+    def test_pagina_y_totales(self):
+        with mock.patch("core.views.DONACIONES_PAGE_SIZE", 2):
+            response = self.client.get("/donaciones/")
+            self.assertEqual(list(response.context["pagina"]), self.donaciones[:2])
+            self.assertEqual(response.context["total_donaciones"], 5)
+            self.assertEqual(response.context["total_comedores"], 2)
+            self.assertEqual(response.context["total_cantidad"], 15)
+            self.assertEqual(response.context["donaciones_por_comedor"][0]["id_comedor__nombre"], "Norte")
+
+            siguiente = self.client.get("/donaciones/" + response.context["next_url"])
+            self.assertEqual(list(siguiente.context["pagina"]), self.donaciones[2:4])
+            self.assertEqual(siguiente.context["pagina"].items[0].total_cantidad, 3)
+
+    def test_cursor_adulterado_vuelve_a_la_primera_pagina(self):
+        with mock.patch("core.views.DONACIONES_PAGE_SIZE", 2):
+            for cursor in ["basura", encode_cursor("n", ["no-es-fecha", 1])]:
+                with self.subTest(cursor=cursor):
+                    response = self.client.get("/donaciones/", {"cursor": cursor})
+                    self.assertEqual(response.status_code, 200)
+                    self.assertEqual(list(response.context["pagina"]), self.donaciones[:2])
+
+    def test_mis_donaciones_solo_las_del_usuario(self):
+        self.entrar(self.user)
+        response = self.client.get("/donaciones/mis-donaciones/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context["pagina"]), self.donaciones[0::2])
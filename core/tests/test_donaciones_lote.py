@@ -0,0 +1,95 @@
+import json
+from datetime import timedelta
+
+from django.utils import timezone
+
+from core.models import CorreoPendiente, Donacion, DonacionItem
+
+from .datos import PruebaCore, crear_comedor, crear_publicacion, crear_usuario
+
+
+class DonacionesLoteTests(PruebaCore):
+
+    def setUp(self):
+        super().setUp()
+        self.comedor = crear_comedor(usuario=crear_usuario("duena"))
+        self.leche = crear_publicacion(self.comedor, titulo="Leche", articulos=("Leche", "Cacao"))
+        self.abrigo = crear_publicacion(self.comedor, titulo="Abrigo", articulos=("Frazadas",))
+        self.entrar(crear_usuario())
+
+    def _enviar(self, donaciones, clave=None):
+        headers = {"Idempotency-Key": clave} if clave else {}
+        return self.client.post(
+            "/api/donaciones/enviar-lote/",
+            json.dumps({"telefono": "1155550000", "donaciones": donaciones}),
+            content_type="application/json", headers=headers,
+        )
+
+    def _errores(self, donaciones):
+        with self.assertLogs("django.request", "WARNING"):
+            response = self._enviar(donaciones)
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Donacion.objects.exists())
+        self.assertFalse(DonacionItem.objects.exists())
+        self.assertFalse(CorreoPendiente.objects.exists())
+        return response.json()["errores"]
+
+    def test_crea_todas_con_un_solo_aviso(self):
+        response = self._enviar([
+            {"publicacion_id": self.leche.pk, "articulos": [{"nombre": "leche", "cantidad": 2}]},
+            {"publicacion_id": self.abrigo.pk, "articulos": ["Frazadas"]},
+            {"publicacion_id": self.leche.pk, "articulos": ["Cacao", "Leche"]},
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["donacion_ids"]), 2)
+        self.assertEqual(
+            sorted(DonacionItem.objects.values_list("id_donacion__id_publicacion__titulo", "nombre_articulo", "cantidad")),
+            [("Abrigo", "Frazadas", 1), ("Leche", "Cacao", 1), ("Leche", "Leche", 3)],
+        )
+        self.assertEqual(list(CorreoPendiente.objects.values_list("asunto", flat=True)),
+                         [f"Nuevas donaciones recibidas en {self.comedor.nombre}"])
+
+    def test_un_conjunto_invalido_no_guarda_ninguno(self):
+        vencida = crear_publicacion(self.comedor, titulo="Vieja", articulos=("Arroz",))
+        vencida.fecha_fin = timezone.now() - timedelta(days=1)
+        vencida.save()
+        errores = self._errores([
+            {"publicacion_id": self.leche.pk, "articulos": ["Leche"]},
+            {"publicacion_id": self.abrigo.pk, "articulos": ["Televisor"]},
+            {"publicacion_id": vencida.pk, "articulos": ["Arroz"]},
+            {"publicacion_id": "x", "articulos": ["Leche"]},
+            {"publicacion_id": self.leche.pk, "articulos": [{"nombre": "Cacao", "cantidad": 0}]},
+        ])
+        self.assertEqual(errores, [
+            "Donación 4: publicación o artículos inválidos.",
+            "Donación 5: las cantidades deben ser mayores a cero.",
+            f"Publicación {self.abrigo.pk}: Televisor no pertenece(n) a la publicación.",
+            f"Publicación {vencida.pk}: no está vigente.",
+        ])
+
+    def test_todas_del_mismo_comedor(self):
+        otra = crear_publicacion(crear_comedor("Olla del Sur"), articulos=("Leche",))
+        errores = self._errores([
+            {"publicacion_id": self.leche.pk, "articulos": ["Leche"]},
+            {"publicacion_id": otra.pk, "articulos": ["Leche"]},
+            {"publicacion_id": 999999, "articulos": ["Leche"]},
+        ])
+        self.assertEqual(errores, ["Todas las publicaciones deben ser del mismo comedor.", "Publicación 999999: no existe."])
+
+    def test_ids_fuera_de_rango(self):
+        for publicacion_id in ("1e400", "Infinity", "-Infinity", "NaN", str(2 ** 63), "0", "-1"):
+            with self.subTest(publicacion_id=publicacion_id), self.assertLogs("django.request", "WARNING"):
+                cuerpo = ('{"telefono": "1155550000", "donaciones": [{"publicacion_id": %s, "articulos": ["Leche"]}]}'
+                          % publicacion_id)
+                response = self.client.post("/api/donaciones/enviar-lote/", cuerpo, content_type="application/json")
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json()["errores"], ["Donación 1: publicación o artículos inválidos."])
+
+    def test_reintento_idempotente(self):
+        donaciones = [{"publicacion_id": self.leche.pk, "articulos": ["Leche"]},
+                      {"publicacion_id": self.abrigo.pk, "articulos": ["Frazadas"]}]
+        primera = self._enviar(donaciones, clave="lote-1")
+        repetida = self._enviar(donaciones, clave="lote-1")
+        self.assertEqual(repetida["Idempotent-Replayed"], "true")
+        self.assertEqual(repetida.json(), primera.json())
+        self.assertEqual(Donacion.objects.count(), 2)
@@ -0,0 +1,43 @@
+from core import stats
+from core.models import Comedor
+
+from .datos import PruebaCore, crear_comedor
+
+
+class SnapshotEstadisticasTests(PruebaCore):
+
+    def test_altas_cambios_y_bajas_ajustan_el_snapshot(self):
+        norte = crear_comedor("Norte", barrio="Centro", tipo="Comunitario", capacidad=30)
+        sur = crear_comedor("Sur", barrio="Sur", tipo="Escolar", capacidad=20)
+
+        snapshot = stats.get_snapshot()
+        self.assertEqual(snapshot.comedores_count, 2)
+        self.assertEqual(snapshot.total_capacity, 50)
+        self.assertEqual(snapshot.barrios, {"Centro": 1, "Sur": 1})
+        self.assertEqual(snapshot.recientes, [sur.pk, norte.pk])
+
+        sur.barrio = "Centro"
+        sur.capacidad = 25
+        sur.save()
+        snapshot.refresh_from_db()
+        self.assertEqual(snapshot.barrios, {"Centro": 2})
+        self.assertEqual(snapshot.total_capacity, 55)
+
+        norte.delete()
+        snapshot.refresh_from_db()
+        self.assertEqual(snapshot.comedores_count, 1)
+        self.assertEqual(snapshot.recientes, [sur.pk])
+
+    def test_escritura_masiva_requiere_rebuild(self):
+        crear_comedor("Norte", capacidad=30)
+        Comedor.objects.update(capacidad=100)   # sin señales
+        self.assertEqual(stats.get_snapshot().total_capacity, 30)
+
+        self.assertEqual(stats.rebuild_snapshot().total_capacity, 100)
+
+    def test_home_lee_el_snapshot(self):
+        crear_comedor("Norte", capacidad=30)
+        response = self.client.get("/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["comedores_count"], 1)
+        self.assertEqual([c.nombre for c in response.context["comedores_recientes"]], ["Norte"])
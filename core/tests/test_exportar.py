@@ -0,0 +1,45 @@
+import csv
+import io
+import json
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .datos import PruebaCore, crear_comedor, crear_publicacion
+
+URL = "/api/comedores/exportar/"
+
+
+class ExportarComedoresTests(PruebaCore):
+
+    def setUp(self):
+        super().setUp()
+        self.norte = crear_comedor("Norte")
+        self.sur = crear_comedor("Sur")
+        crear_publicacion(self.norte, "Vigente", articulos=("Arroz", "Leche"))
+        crear_publicacion(self.norte, "Vencida", articulos=("Fideos",), fecha_fin=timezone.now() - timedelta(days=1))
+
+    def _contenido(self, response) -> str:
+        return b"".join(response.streaming_content).decode("utf-8")
+
+    def test_jsonl_con_publicaciones_vigentes(self):
+        response = self.client.get(URL, {"incluir": "publicaciones"})
+        self.assertEqual(response.status_code, 200)
+        filas = [json.loads(linea) for linea in self._contenido(response).splitlines()]
+
+        self.assertEqual([f["nombre"] for f in filas], ["Norte", "Sur"])
+        self.assertEqual([p["titulo"] for p in filas[0]["publicaciones"]], ["Vigente"])
+        self.assertEqual(filas[0]["publicaciones"][0]["articulos"], ["Arroz", "Leche"])
+        self.assertEqual(filas[1]["publicaciones"], [])
+
+    def test_csv(self):
+        response = self.client.get(URL, {"formato": "csv", "incluir": "publicaciones"})
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        filas = list(csv.DictReader(io.StringIO(self._contenido(response))))
+        self.assertEqual(filas[0]["nombre"], "Norte")
+        self.assertEqual(filas[0]["publicaciones_vigentes"], "1")
+        self.assertEqual(filas[0]["articulos"], "Arroz|Leche")
+
+    def test_formato_invalido(self):
+        response = self.client.get(URL, {"formato": "xml"})
+        self.assertEqual(response.status_code, 400)
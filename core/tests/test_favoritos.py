@@ -0,0 +1,48 @@
+from django.contrib.auth.models import AnonymousUser
+from django.test import RequestFactory
+
+from core.favoritos import ids_favoritos
+from core.models import Favoritos
+
+from .datos import PruebaCore, crear_comedor, crear_usuario
+
+
+class IdsFavoritosTests(PruebaCore):
+
+    def setUp(self):
+        super().setUp()
+        self.user = crear_usuario()
+        self.norte = crear_comedor("Norte")
+        self.sur = crear_comedor("Sur")
+
+    def _request(self, user):
+        request = RequestFactory().get("/comedores/")
+        request.user = user
+        return request
+
+    def test_cache_por_usuario_e_invalidacion(self):
+        Favoritos.objects.create(id_usuario=self.user.userprofile, id_comedor=self.norte)
+        self.assertEqual(ids_favoritos(self._request(self.user)), {self.norte.pk})
+
+        # Segunda vez sale del cache, sin consultas
+        with self.assertNumQueries(0):
+            self.assertEqual(ids_favoritos(self._request(self.user)), {self.norte.pk})
+
+        # Agregar o quitar un favorito invalida la entrada, recién al confirmar
+        with self.captureOnCommitCallbacks(execute=True):
+            favorito = Favoritos.objects.create(id_usuario=self.user.userprofile, id_comedor=self.sur)
+            self.assertEqual(ids_favoritos(self._request(self.user)), {self.norte.pk})
+        self.assertEqual(ids_favoritos(self._request(self.user)), {self.norte.pk, self.sur.pk})
+        with self.captureOnCommitCallbacks(execute=True):
+            favorito.delete()
+        self.assertEqual(ids_favoritos(self._request(self.user)), {self.norte.pk})
+
+    def test_anonimo_no_consulta(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(ids_favoritos(self._request(AnonymousUser())), frozenset())
+
+    def test_listado_marca_favoritos(self):
+        Favoritos.objects.create(id_usuario=self.user.userprofile, id_comedor=self.norte)
+        self.entrar(self.user)
+        response = self.client.get("/comedores/")
+        self.assertEqual(response.context["favoritos_ids"], {self.norte.pk})
@@ -0,0 +1,33 @@
+from core.utils import normalizar_texto, rango_prefijo
+
+from .datos import PruebaCore, crear_comedor
+
+
+class FiltrosComedoresTests(PruebaCore):
+
+    def setUp(self):
+        super().setUp()
+        crear_comedor("Norte", barrio="Constitución", tipo="Comunitario")
+        crear_comedor("Sur", barrio="constitucion ", tipo="Escolar")
+        crear_comedor("Oeste", barrio="Caballito", tipo="comunitario")
+
+    def test_normaliza_y_arma_el_rango(self):
+        self.assertEqual(normalizar_texto("  Constitución  Sur "), "constitucion sur")
+        self.assertEqual(normalizar_texto(None), "")
+        self.assertEqual(rango_prefijo("cons"), ("cons", "cont"))
+
+    def test_filtra_por_prefijo_sin_acentos_ni_mayusculas(self):
+        response = self.client.get("/comedores/", {"barrio": "CONSTITU"})
+        self.assertEqual(sorted(c.nombre for c in response.context["pagina"]), ["Norte", "Sur"])
+
+        response = self.client.get("/comedores/", {"tipo": "comuni"})
+        self.assertEqual(sorted(c.nombre for c in response.context["pagina"]), ["Norte", "Oeste"])
+
+    def test_facetas_agrupan_variantes(self):
+        response = self.client.get("/comedores/")
+        self.assertIn(("Constitución", 2), response.context["facetas_barrio"])
+
+    def test_filtros_sin_coincidencias_o_invalidos(self):
+        response = self.client.get("/comedores/", {"barrio": "Palermo", "capacidad": "muchos"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context["pagina"]), [])
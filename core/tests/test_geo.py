@@ -0,0 +1,51 @@
+import random
+
+from core.geo import celda, cercanos, haversine_km, parse_coordenadas
+from core.models import Comedor
+
+from .datos import PruebaCore, crear_comedor
+
+OBELISCO = (-34.6037, -58.3816)
+
+
+class CercanosTests(PruebaCore):
+
+    def setUp(self):
+        super().setUp()
+        self.cerca = crear_comedor("Cerca", latitud=-34.6040, longitud=-58.3820)
+        self.medio = crear_comedor("Medio", latitud=-34.6200, longitud=-58.3816)   # ~1,8 km
+        self.lejos = crear_comedor("Lejos", latitud=-34.7000, longitud=-58.3816)   # ~10,7 km
+        crear_comedor("Sin ubicación")
+
+    def test_celda_se_guarda_con_el_comedor(self):
+        self.assertEqual(self.cerca.geo_celda, celda(-34.6040, -58.3820))
+        self.assertEqual(Comedor.objects.get(nombre="Sin ubicación").geo_celda, "")
+
+    def test_ordena_por_distancia_y_respeta_el_radio(self):
+        self.assertEqual([c for c, _ in cercanos(*OBELISCO, k=10)], [self.cerca, self.medio, self.lejos])
+        self.assertEqual([c for c, _ in cercanos(*OBELISCO, k=10, radio_km=2)], [self.cerca, self.medio])
+        self.assertEqual([c for c, _ in cercanos(*OBELISCO, k=1)], [self.cerca])
+
+    def test_coincide_con_fuerza_bruta(self):
+        azar = random.Random(5)
+        for i in range(60):
+            crear_comedor(f"Azar {i}", latitud=OBELISCO[0] + azar.uniform(-0.05, 0.05),
+                          longitud=OBELISCO[1] + azar.uniform(-0.05, 0.05))
+        for radio in (0.5, 2, 4):
+            esperado = sorted(
+                c.pk for c in Comedor.objects.exclude(latitud=None)
+                if haversine_km(*OBELISCO, c.latitud, c.longitud) <= radio
+            )
+            with self.subTest(radio=radio):
+                obtenido = cercanos(*OBELISCO, k=1000, radio_km=radio)
+                self.assertEqual(sorted(c.pk for c, _ in obtenido), esperado)
+
+    def test_api_valida_parametros(self):
+        self.assertEqual(parse_coordenadas("100", "0"), (None, None))
+        self.assertEqual(self.client.get("/api/comedores/cercanos/", {"lat": "x", "lon": "1"}).status_code, 400)
+        self.assertEqual(
+            self.client.get("/api/comedores/cercanos/", {"lat": "1", "lon": "1", "k": "muchos"}).status_code, 400
+        )
+
+        response = self.client.get("/api/comedores/cercanos/", {"lat": OBELISCO[0], "lon": OBELISCO[1], "k": 2})
+        self.assertEqual([c["nombre"] for c in response.json()["comedores"]], ["Cerca", "Medio"])
@@ -0,0 +1,69 @@
+import json
+
+from core.models import ClaveIdempotencia, CorreoPendiente, Donacion
+
+from .datos import PruebaCore, crear_comedor, crear_publicacion, crear_usuario
+
+
+class DonacionIdempotenteTests(PruebaCore):
+
+    def setUp(self):
+        super().setUp()
+        self.publicacion = crear_publicacion(crear_comedor(usuario=crear_usuario("duena")))
+        self.entrar(crear_usuario())
+
+    def _enviar(self, clave=None, **cambios):
+        cuerpo = {
+            "publicacion_id": self.publicacion.pk,
+            "articulos": [{"nombre": "Arroz", "cantidad": 2}, "Leche"],
+            "telefono": "1155550000",
+            **cambios,
+        }
+        headers = {"Idempotency-Key": clave} if clave else {}
+        return self.client.post("/api/donaciones/enviar/", json.dumps(cuerpo),
+                                content_type="application/json", headers=headers)
+
+    def test_reintento_repite_la_respuesta_sin_duplicar(self):
+        primera = self._enviar("clave-1")
+        self.assertEqual(primera.status_code, 200)
+        self.assertNotIn("Idempotent-Replayed", primera)
+
+        repetida = self._enviar("clave-1")
+        self.assertEqual(repetida.status_code, 200)
+        self.assertEqual(repetida["Idempotent-Replayed"], "true")
+        self.assertEqual(repetida.json(), primera.json())
+        self.assertEqual(Donacion.objects.count(), 1)
+        self.assertEqual(CorreoPendiente.objects.count(), 1)
+
+        donacion = Donacion.objects.get()
+        self.assertEqual(sorted(donacion.items.values_list("nombre_articulo", "cantidad")),
+                         [("Arroz", 2), ("Leche", 1)])
+
+        # Sin el header cada pedido es una donación nueva
+        self._enviar()
+        self.assertEqual(Donacion.objects.count(), 2)
+
+    def test_misma_clave_con_otro_cuerpo(self):
+        self._enviar("clave-1")
+        with self.assertLogs("django.request", "WARNING"):
+            response = self._enviar("clave-1", telefono="1166660000")
+        self.assertEqual(response.status_code, 422)
+        self.assertIn("Idempotency-Key", response.json()["error"])
+        self.assertEqual(Donacion.objects.count(), 1)
+
+    def test_errores_no_se_guardan(self):
+        for articulos, mensaje in (
+            ([{"nombre": "Arroz", "cantidad": 0}], "mayores a cero"),
+            ([{"nombre": "Arroz", "cantidad": "dos"}], "Artículos inválidos"),
+            ([{"nombre": "Arroz", "cantidad": -1}, "Leche"], "mayores a cero"),
+        ):
+            with self.subTest(articulos=articulos), self.assertLogs("django.request", "WARNING"):
+                response = self._enviar("clave-1", articulos=articulos)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn(mensaje, response.json()["error"])
+        self.assertFalse(Donacion.objects.exists())
+        self.assertFalse(ClaveIdempotencia.objects.exists())
+
+        # La clave sigue libre para el pedido corregido
+        self.assertEqual(self._enviar("clave-1").status_code, 200)
+        self.assertEqual(Donacion.objects.count(), 1)
@@ -0,0 +1,93 @@
+import os
+import tempfile
+from unittest import mock
+
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core import limites
+
+from .datos import PruebaCore, crear_usuario
+
+
+class BaldeDeFichasTests(SimpleTestCase):
+
+    def test_rafaga_y_reposicion_en_ambos_backends(self):
+        directorio = tempfile.TemporaryDirectory(prefix="cache-test-")
+        self.addCleanup(directorio.cleanup)
+        backends = {
+            "locmem": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+            "sqlite": {"BACKEND": "core.cache_sqlite.SQLiteCache",
+                       "LOCATION": os.path.join(directorio.name, "cache.sqlite3")},
+        }
+        for nombre, backend in backends.items():
+            with self.subTest(backend=nombre), override_settings(CACHES={"default": backend}), \
+                    mock.patch("time.time", return_value=1_000_000.0) as reloj:
+                balde = limites.BaldeDeFichas("rl:test", *limites.parsear_tasa("3/m"))
+                self.assertEqual([balde.tomar("ip")[0] for _ in range(4)], [True, True, True, False])
+                self.assertEqual(balde.tomar("ip"), (False, 20))
+                self.assertTrue(balde.tomar("otra-ip")[0])
+
+                reloj.return_value += 20
+                self.assertEqual(balde.tomar("ip"), (True, 0))
+                self.assertFalse(balde.tomar("ip")[0])
+
+    def test_parsear_tasa(self):
+        self.assertEqual(limites.parsear_tasa("5/m"), (5, 60))
+        self.assertEqual(limites.parsear_tasa("10/30s"), (10, 30))
+        self.assertEqual(limites.parsear_tasa("100/d"), (100, 86400))
+
+    def test_ip_detras_de_proxies(self):
+        request = RequestFactory().get("/", REMOTE_ADDR="10.0.0.1", HTTP_X_FORWARDED_FOR="1.1.1.1, 2.2.2.2")
+        self.assertEqual(limites.ip_cliente(request), "10.0.0.1")
+        with mock.patch.object(limites, "PROXIES", 1):
+            self.assertEqual(limites.ip_cliente(request), "2.2.2.2")
+            # Sin X-Forwarded-For no se sabe quién es: REMOTE_ADDR es el proxy
+            self.assertIsNone(limites.ip_cliente(RequestFactory().get("/", REMOTE_ADDR="10.0.0.1")))
+        with mock.patch.object(limites, "PROXIES", 3):
+            self.assertIsNone(limites.ip_cliente(request))
+
+
+class LimitarVistasTests(PruebaCore):
+
+    def test_login_por_cuenta_atacada(self):
+        for _ in range(5):
+            self.assertEqual(self.client.post("/login/", {"username": "ana", "password": "mal"}).status_code, 200)
+        with self.assertLogs("django.request", "WARNING"):
+            response = self.client.post("/login/", {"username": "ANA ", "password": "mal"})
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response)
+        # Otra cuenta desde la misma IP sigue pudiendo entrar; un GET no consume
+        self.assertEqual(self.client.post("/login/", {"username": "beto", "password": "mal"}).status_code, 200)
+        self.assertEqual(self.client.get("/login/").status_code, 200)
+
+    def test_api_de_donaciones_responde_429_en_json(self):
+        self.entrar(crear_usuario())
+        with self.assertLogs("django.request", "WARNING"):
+            for _ in range(10):
+                self.client.post("/api/donaciones/enviar/", "{}", content_type="application/json")
+            response = self.client.post("/api/donaciones/enviar/", "{}", content_type="application/json")
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Demasiados intentos", response.json()["error"])
+        self.assertGreater(int(response["Retry-After"]), 0)
+
+    def test_detras_del_proxy_cada_cliente_tiene_su_balde(self):
+        vista = limites.limitar("prueba", ip="1/m")(lambda request: HttpResponse("ok"))
+        proxy = {"REMOTE_ADDR": "10.0.0.1"}
+        with mock.patch.object(limites, "PROXIES", 1):
+            for cliente in ("1.1.1.1", "2.2.2.2"):
+                request = RequestFactory().post("/", HTTP_X_FORWARDED_FOR=cliente, **proxy)
+                self.assertEqual(vista(request).status_code, 200)
+            request = RequestFactory().post("/", HTTP_X_FORWARDED_FOR="1.1.1.1", **proxy)
+            self.assertEqual(vista(request).status_code, 429)
+            # Sin IP determinable no se limita por IP (no se mezcla a todos en el balde del proxy)
+            for _ in range(3):
+                self.assertEqual(vista(RequestFactory().post("/", **proxy)).status_code, 200)
+
+    def test_desactivados(self):
+        vista = limites.limitar("prueba", total="1/m")(lambda request: HttpResponse("ok"))
+        request = RequestFactory().post("/")
+        self.assertEqual(vista(request).status_code, 200)
+        self.assertEqual(vista(request).status_code, 429)
+        with mock.patch.object(limites, "LIMITES_ACTIVOS", False):
+            self.assertEqual(vista(request).status_code, 200)
@@ -0,0 +1,140 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core import mail
+from django.db import transaction
+from django.utils import timezone
+
+from core import mail_queue
+from core.mail_service import EmailService
+from core.models import CorreoPendiente
+
+from .datos import PruebaCore
+
+
+def _rechaza(destinatario):
+    """send_messages del backend de tests, pero falla para `destinatario`."""
+    original = mail.get_connection().__class__.send_messages
+
+    def send_messages(self, mensajes):
+        if any(destinatario in m.to for m in mensajes):
+            raise ConnectionError("550 buzón inexistente")
+        return original(self, mensajes)
+    return send_messages
+
+
+class OutboxTests(PruebaCore):
+
+    def test_encola_en_la_transaccion_y_envia_aparte(self):
+        EmailService.send_verification("ana@example.com", "123456")
+        self.assertEqual(len(mail.outbox), 0)
+
+        self.assertEqual(mail_queue.procesar_correos(), (1, 0))
+        self.assertEqual(mail.outbox[0].to, ["ana@example.com"])
+        self.assertIn("123456", mail.outbox[0].body)
+        self.assertEqual(CorreoPendiente.objects.get().estado, CorreoPendiente.ESTADO_ENVIADO)
+        self.assertEqual(mail_queue.procesar_correos(), (0, 0))
+
+    def test_rollback_descarta_el_correo(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            EmailService.send_email("Asunto", "Cuerpo", ["ana@example.com"])
+            raise RuntimeError("falló el request")
+        self.assertFalse(CorreoPendiente.objects.exists())
+
+    def test_reintenta_con_backoff_y_despues_queda_fallido(self):
+        mail_queue.encolar("Asunto", "Cuerpo", ["ok@example.com", "rebota@example.com"])
+        backend = mail.get_connection().__class__
+        with mock.patch.object(backend, "send_messages", _rechaza("rebota@example.com")), \
+                self.assertLogs("core.mail_queue", "WARNING"):
+            self.assertEqual(mail_queue.procesar_correos(), (1, 1))
+
+            rebota = CorreoPendiente.objects.get(destinatario="rebota@example.com")
+            self.assertEqual(rebota.estado, CorreoPendiente.ESTADO_PENDIENTE)
+            self.assertEqual(rebota.intentos, 1)
+            self.assertIn("550", rebota.ultimo_error)
+            self.assertGreater(rebota.proximo_intento, timezone.now())
+            # Todavía no toca reintentarlo
+            self.assertEqual(mail_queue.procesar_correos(), (0, 0))
+
+            for _ in range(mail_queue.MAX_INTENTOS - 1):
+                CorreoPendiente.objects.filter(pk=rebota.pk).update(proximo_intento=timezone.now())
+                mail_queue.procesar_correos()
+        rebota.refresh_from_db()
+        self.assertEqual(rebota.estado, CorreoPendiente.ESTADO_FALLIDO)
+        self.assertEqual(len(mail.outbox), 1)
+
+        self.assertEqual(mail_queue.reintentar_fallidos(), 1)
+        self.assertEqual(mail_queue.procesar_correos(), (1, 0))
+
+    def test_retoma_correos_de_un_worker_caido(self):
+        mail_queue.encolar("Asunto", "Cuerpo", ["ana@example.com"])
+        self.assertEqual(len(mail_queue.tomar_lote()), 1)
+        self.assertEqual(mail_queue.tomar_lote(), [])
+
+        CorreoPendiente.objects.update(
+            tomado=timezone.now() - timedelta(seconds=mail_queue.TOMADO_VENCE_SEGUNDOS + 1)
+        )
+        self.assertEqual(mail_queue.procesar_correos(), (1, 0))
+
+    def test_espera_reintento(self):
+        self.assertEqual(mail_queue.espera_reintento(1), timedelta(seconds=mail_queue.BACKOFF_SEGUNDOS))
+        self.assertEqual(mail_queue.espera_reintento(3), timedelta(seconds=4 * mail_queue.BACKOFF_SEGUNDOS))
+        self.assertEqual(mail_queue.espera_reintento(50), timedelta(seconds=mail_queue.BACKOFF_MAX_SEGUNDOS))
+
+
+class _Conexion:
+    """Conexión de correo falsa que registra aperturas y envíos."""
+
+    def __init__(self, registro, falla_para=(), falla_open=False):
+        self.registro = registro
+        self.falla_para = falla_para
+        self.falla_open = falla_open
+
+    def open(self):
+        self.registro["aperturas"] += 1
+        if self.falla_open:
+            raise ConnectionRefusedError("sin servidor")
+
+    def close(self):
+        pass
+
+    def send_messages(self, mensajes):
+        for m in mensajes:
+            if set(m.to) & set(self.falla_para):
+                raise ConnectionError("550 buzón inexistente")
+            self.registro["enviados"].extend(m.to)
+        return len(mensajes)
+
+
+class EnvioPorConexionTests(PruebaCore):
+
+    def setUp(self):
+        super().setUp()
+        self.registro = {"aperturas": 0, "enviados": []}
+        destinatarios = [f"usuario{i}@example.com" for i in range(5)]
+        mail_queue.encolar("Asunto", "Cuerpo", destinatarios)
+        self.correos = list(CorreoPendiente.objects.order_by("id"))
+
+    def _enviar(self, **conexion):
+        with mock.patch.object(mail_queue, "get_connection",
+                               side_effect=lambda **kw: _Conexion(self.registro, **conexion)):
+            return mail_queue.enviar_lote(self.correos, chunk=2)
+
+    def test_una_conexion_por_tramo(self):
+        resultados = self._enviar()
+        self.assertEqual(self.registro["aperturas"], 3)
+        self.assertEqual(len(self.registro["enviados"]), 5)
+        self.assertEqual(set(resultados.values()), {None})
+
+    def test_un_rechazo_no_afecta_a_los_demas(self):
+        resultados = self._enviar(falla_para=["usuario1@example.com"])
+        self.assertIsInstance(resultados[self.correos[1].pk], ConnectionError)
+        self.assertEqual([pk for pk, error in resultados.items() if error is None],
+                         [c.pk for c in self.correos if c.pk != self.correos[1].pk])
+        # La sesión se reabre tras el error: 3 tramos + 1 reapertura
+        self.assertEqual(self.registro["aperturas"], 4)
+
+    def test_sin_servidor_falla_todo_el_tramo(self):
+        resultados = self._enviar(falla_open=True)
+        self.assertEqual(len(resultados), 5)
+        self.assertTrue(all(isinstance(e, ConnectionRefusedError) for e in resultados.values()))
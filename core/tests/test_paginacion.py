@@ -0,0 +1,51 @@
+from core.models import Comedor
+from core.pagination import decode_cursor, encode_cursor, paginar_keyset
+
+from .datos import PruebaCore, crear_comedor
+
+CAMPOS = ("nombre", "id")
+
+
+class PaginacionKeysetTests(PruebaCore):
+
+    def setUp(self):
+        super().setUp()
+        # Nombres repetidos: el id desempata
+        for nombre in ["Beta", "Alfa", "Beta", "Delta", "Gamma", "Alfa", "Epsilon"]:
+            crear_comedor(nombre)
+        self.ordenados = list(Comedor.objects.order_by(*CAMPOS))
+
+    def test_recorre_hacia_adelante_y_atras_sin_repetir(self):
+        vistos = []
+        pagina = paginar_keyset(Comedor.objects.all(), None, CAMPOS, page_size=3)
+        paginas = [pagina]
+        vistos.extend(pagina.items)
+        while pagina.has_next:
+            pagina = paginar_keyset(Comedor.objects.all(), pagina.next_cursor, CAMPOS, page_size=3)
+            paginas.append(pagina)
+            vistos.extend(pagina.items)
+        self.assertEqual(vistos, self.ordenados)
+        self.assertFalse(paginas[0].has_previous)
+
+        anterior = paginar_keyset(Comedor.objects.all(), paginas[-1].prev_cursor, CAMPOS, page_size=3)
+        self.assertEqual(anterior.items, paginas[-2].items)
+
+    def test_cursor_invalido_se_ignora(self):
+        for cursor in [
+            "no-es-base64!",
+            encode_cursor("x", ["Alfa", 1]),
+            encode_cursor("n", ["Alfa"]),
+            encode_cursor("n", ["Alfa", "no-es-un-id"]),
+            encode_cursor("n", ["Alfa", None]),
+        ]:
+            with self.subTest(cursor=cursor):
+                self.assertEqual(decode_cursor(cursor, CAMPOS, Comedor), (None, None))
+                pagina = paginar_keyset(Comedor.objects.all(), cursor, CAMPOS, page_size=3)
+                self.assertEqual(pagina.items, self.ordenados[:3])
+
+    def test_vista_con_cursor_adulterado_sirve_la_primera_pagina(self):
+        cursor = encode_cursor("n", ["Alfa", {"id": 1}])
+        response = self.client.get("/comedores/", {"cursor": cursor})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context["pagina"])[0], self.ordenados[0])
+        self.assertIsNone(response.context["prev_url"])
@@ -0,0 +1,68 @@
+from django.contrib.auth import authenticate
+from django.contrib.auth.models import AnonymousUser, User
+from django.contrib.messages import get_messages
+from django.test import RequestFactory
+
+from core.models import UserProfile
+from core.perfiles import BackendConPerfil, perfil_de
+
+from .datos import PruebaCore, crear_usuario
+
+
+class BackendConPerfilTests(PruebaCore):
+
+    def setUp(self):
+        super().setUp()
+        self.user = crear_usuario()
+
+    def test_autentica_con_el_perfil_en_el_mismo_select(self):
+        with self.assertNumQueries(1):
+            user = authenticate(username="ana", password="Clave-segura-123")
+            self.assertTrue(user.userprofile.email_verified)
+
+        with self.assertNumQueries(1):
+            user = BackendConPerfil().get_user(self.user.pk)
+            self.assertTrue(user.userprofile.email_verified)
+
+    def test_credenciales_invalidas(self):
+        for username, password in (("ana", "otra"), ("nadie", "Clave-segura-123")):
+            with self.subTest(username=username):
+                self.assertIsNone(authenticate(username=username, password=password))
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertIsNone(authenticate(username="ana", password="Clave-segura-123"))
+        self.assertIsNone(BackendConPerfil().get_user(self.user.pk))
+        self.assertIsNone(BackendConPerfil().get_user(0))
+
+    def test_perfil_de(self):
+        request = RequestFactory().get("/")
+        request.user = AnonymousUser()
+        self.assertIsNone(perfil_de(request, crear=True))
+
+        request.user = User.objects.create_user("sinperfil", password="x")
+        self.assertIsNone(perfil_de(request))
+        perfil = perfil_de(request, crear=True)
+        self.assertEqual(perfil.user, request.user)
+        with self.assertNumQueries(0):
+            self.assertIs(perfil_de(request), perfil)
+        self.assertEqual(UserProfile.objects.filter(user=request.user).count(), 1)
+
+
+class CustomLoginTests(PruebaCore):
+
+    def _mensajes(self, response):
+        return [str(m) for m in get_messages(response.wsgi_request)]
+
+    def test_login_y_aviso_de_email_sin_verificar(self):
+        crear_usuario("beto", verificado=False)
+        response = self.client.post("/login/?next=/donaciones/",
+                                    {"username": "beto", "password": "Clave-segura-123"})
+        self.assertRedirects(response, "/donaciones/", fetch_redirect_response=False)
+        self.assertIn("no está verificado", self._mensajes(response)[0])
+        self.assertRedirects(self.client.get("/login/"), "/privada/", fetch_redirect_response=False)
+
+    def test_contrasena_incorrecta(self):
+        crear_usuario()
+        response = self.client.post("/login/", {"username": "ana", "password": "otra"})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Usuario o contraseña incorrectos", self._mensajes(response)[0])
+        self.assertNotIn("_auth_user_id", self.client.session)
@@ -0,0 +1,52 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.utils import timezone
+
+from core.models import Publicacion
+from core.pagination import encode_cursor
+
+from .datos import PruebaCore, crear_comedor, crear_publicacion
+
+
+class PublicacionesVigentesVencidasTests(PruebaCore):
+
+    def setUp(self):
+        super().setUp()
+        self.comedor = crear_comedor()
+        ahora = timezone.now()
+        self.vigente = crear_publicacion(self.comedor, "Vigente")
+        self.sin_fin = crear_publicacion(self.comedor, "Sin fin", fecha_fin=None)
+        crear_publicacion(self.comedor, "Futura", fecha_inicio=ahora + timedelta(days=1))
+        self.vencidas = [
+            crear_publicacion(self.comedor, f"Vencida {i}", fecha_inicio=ahora - timedelta(days=30),
+                              fecha_fin=ahora - timedelta(days=i + 1))
+            for i in range(3)
+        ]
+
+    def test_queryset_vigentes_y_vencidas(self):
+        self.assertEqual(set(Publicacion.objects.vigentes()), {self.vigente, self.sin_fin})
+        self.assertEqual(set(Publicacion.objects.vencidas()), set(self.vencidas))
+
+    def test_detalle_muestra_solo_vigentes(self):
+        response = self.client.get(f"/comedores/{self.comedor.pk}/")
+        self.assertEqual(set(response.context["publicaciones"]), {self.vigente, self.sin_fin})
+        self.assertTrue(response.context["hay_vencidas"])
+
+    def test_listado_pagina_las_vencidas(self):
+        url = f"/publicaciones/{self.comedor.pk}/"
+        with mock.patch("core.views.PUBLICACIONES_VENCIDAS_PAGE_SIZE", 2):
+            primera = self.client.get(url)
+            self.assertEqual(primera.context["vigentes_count"], 2)
+            self.assertEqual(primera.context["pagina"].items, self.vencidas[:2])
+
+            segunda = self.client.get(url + primera.context["next_url"])
+            self.assertEqual(segunda.context["publicaciones"], self.vencidas[2:])
+
+            adulterado = self.client.get(url, {"cursor": encode_cursor("p", ["ayer", "x"])})
+            self.assertEqual(adulterado.status_code, 200)
+            self.assertEqual(adulterado.context["vigentes_count"], 2)
+            self.assertEqual(adulterado.context["pagina"].items, self.vencidas[:2])
+
+    def test_comedor_inexistente(self):
+        self.assertEqual(self.client.get("/publicaciones/999999/").status_code, 404)
@@ -0,0 +1,73 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.utils import timezone
+
+from core import purga
+from core.models import Donacion, UserProfile
+
+from .datos import PruebaCore, crear_comedor, crear_publicacion, crear_usuario
+
+
+class PurgaVerificacionesTests(PruebaCore):
+
+    def setUp(self):
+        super().setUp()
+        ahora = timezone.now()
+        viejo = ahora - timedelta(days=purga.PURGA_DIAS + 1)
+        self.abandonadas = [crear_usuario(f"abandonada{i}", verificado=False, date_joined=viejo) for i in range(3)]
+
+        con_comedor = crear_usuario("concomedor", verificado=False, date_joined=viejo)
+        comedor = crear_comedor(usuario=con_comedor)
+        donante = crear_usuario("donante", verificado=False, date_joined=viejo)
+        Donacion.objects.create(id_usuario=donante.userprofile, id_comedor=comedor,
+                                id_publicacion=crear_publicacion(comedor))
+        crear_usuario("entro", verificado=False, date_joined=viejo, last_login=ahora)
+        crear_usuario("verificada", date_joined=viejo)
+        crear_usuario("staff", verificado=False, date_joined=viejo, is_staff=True)
+        crear_usuario("reciente", verificado=False)
+
+        vigente = crear_usuario("codigovigente", verificado=False, date_joined=viejo)
+        UserProfile.objects.filter(user=vigente).update(
+            email_verification_code="123456", verification_expires_at=ahora + timedelta(minutes=10),
+        )
+        vencido = self.abandonadas[0]
+        UserProfile.objects.filter(user=vencido).update(
+            email_verification_code="654321", verification_expires_at=ahora - timedelta(minutes=10),
+        )
+        self.reciente_vencido = crear_usuario("recientevencido", verificado=False)
+        UserProfile.objects.filter(user=self.reciente_vencido).update(
+            email_verification_code="111111", verification_expires_at=ahora - timedelta(minutes=10),
+            verification_tries=2,
+        )
+
+    def test_borra_solo_cuentas_abandonadas(self):
+        antes = User.objects.count()
+        self.assertEqual(purga.borrar_cuentas(lote=2), 3)
+        self.assertEqual(User.objects.count(), antes - 3)
+        self.assertFalse(User.objects.filter(pk__in=[u.pk for u in self.abandonadas]).exists())
+        self.assertFalse(UserProfile.objects.filter(user_id__in=[u.pk for u in self.abandonadas]).exists())
+        self.assertEqual(purga.borrar_cuentas(), 0)
+
+    def test_expira_codigos_vencidos(self):
+        self.assertEqual(purga.expirar_codigos(lote=1), 2)
+        perfil = UserProfile.objects.get(user=self.reciente_vencido)
+        self.assertIsNone(perfil.email_verification_code)
+        self.assertEqual(perfil.verification_tries, 0)
+        self.assertEqual(UserProfile.objects.filter(email_verification_code="123456").count(), 1)
+
+    def test_dry_run_no_modifica(self):
+        datos = purga.reporte(muestra=2)
+        self.assertEqual((datos["codigos"], datos["cuentas"], len(datos["ejemplos"])), (2, 3, 2))
+
+        salida = StringIO()
+        antes = User.objects.count()
+        call_command("purgar_verificaciones", "--dry-run", "--muestra=1", stdout=salida)
+        self.assertIn("a borrar: 3", salida.getvalue())
+        self.assertIn("... y 2 más", salida.getvalue())
+        self.assertEqual(User.objects.count(), antes)
+
+        call_command("purgar_verificaciones", "--pausa=0", stdout=salida)
+        self.assertIn("3 cuentas borradas, 1 códigos vencidos limpiados", salida.getvalue())
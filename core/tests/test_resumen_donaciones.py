@@ -0,0 +1,91 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core import mail
+from django.core.management import call_command
+from django.utils import timezone
+
+from core.models import AvisoDonacion, CorreoPendiente, Donacion, DonacionItem
+from core.resumen_donaciones import avisar_donacion, avisar_donaciones, enviar_resumenes
+
+from .datos import BACKEND, PruebaCore, crear_comedor, crear_publicacion, crear_usuario
+
+
+class ResumenDonacionesTests(PruebaCore):
+
+    def setUp(self):
+        super().setUp()
+        self.dueno = crear_usuario("duena")
+        self.comedor = crear_comedor(usuario=self.dueno)
+        self.donante = crear_usuario("donante")
+        self.publicaciones = [crear_publicacion(self.comedor, titulo=t) for t in ("Leche", "Abrigo")]
+
+    def _donar(self, publicacion, cantidad=2):
+        donacion = Donacion.objects.create(
+            id_usuario=self.donante.userprofile, id_comedor=self.comedor, id_publicacion=publicacion,
+        )
+        DonacionItem.objects.create(id_donacion=donacion, nombre_articulo="Arroz", cantidad=cantidad)
+        return donacion
+
+    def _asuntos(self):
+        return list(CorreoPendiente.objects.order_by("id").values_list("asunto", flat=True))
+
+    def test_sin_resumen_manda_un_mail_por_aviso(self):
+        avisar_donacion(self._donar(self.publicaciones[0]), self.dueno, self.comedor.nombre,
+                        "Leche", "donante", ["Arroz x2"])
+        avisar_donaciones([(self._donar(p), p.titulo, ["Arroz x2"]) for p in self.publicaciones],
+                          self.dueno, self.comedor.nombre, "donante")
+        self.assertEqual(self._asuntos(), [
+            f"Nueva donación recibida en {self.comedor.nombre}",
+            f"Nuevas donaciones recibidas en {self.comedor.nombre}",
+        ])
+        self.assertFalse(AvisoDonacion.objects.exists())
+
+    def test_con_resumen_acumula_y_manda_uno_por_intervalo(self):
+        self.client.force_login(self.dueno, backend=BACKEND)
+        self.assertRedirects(self.client.post("/privada/resumen-donaciones/", {"activar": "1"}), "/privada/")
+
+        for publicacion in self.publicaciones + self.publicaciones[:1]:
+            avisar_donacion(self._donar(publicacion), self.dueno, self.comedor.nombre,
+                            publicacion.titulo, "donante", ["Arroz x2"])
+        self.assertEqual(AvisoDonacion.objects.count(), 3)
+        self.assertEqual(self._asuntos(), [])
+
+        # El aviso más viejo todavía no cumplió el intervalo
+        self.assertEqual(enviar_resumenes(minutos=60), 0)
+        self.assertEqual(enviar_resumenes(minutos=60, ahora=timezone.now() + timedelta(minutes=61)), 1)
+        self.assertEqual(self._asuntos(), ["Resumen: recibiste 3 donación(es)"])
+        self.assertIn("Leche", CorreoPendiente.objects.get().mensaje)
+        self.assertFalse(AvisoDonacion.objects.exists())
+        self.assertEqual(enviar_resumenes(minutos=0), 0)
+
+    def test_comando_todo_y_desactivar(self):
+        perfil = self.dueno.userprofile
+        perfil.resumen_donaciones = True
+        perfil.save()
+        avisar_donacion(self._donar(self.publicaciones[0]), self.dueno, self.comedor.nombre,
+                        "Leche", "donante", ["Arroz x2"])
+        salida = StringIO()
+        call_command("enviar_resumen_donaciones", "--todo", stdout=salida)
+        self.assertIn("Resúmenes encolados: 1.", salida.getvalue())
+
+        self.client.force_login(self.dueno, backend=BACKEND)
+        self.client.post("/privada/resumen-donaciones/", {"activar": "0"})
+        perfil.refresh_from_db()
+        self.assertFalse(perfil.resumen_donaciones)
+        with self.assertLogs("django.request", "WARNING"):
+            self.assertEqual(self.client.get("/privada/resumen-donaciones/").status_code, 405)
+
+    def test_el_worker_de_correos_manda_los_resumenes_vencidos(self):
+        perfil = self.dueno.userprofile
+        perfil.resumen_donaciones = True
+        perfil.save()
+        avisar_donacion(self._donar(self.publicaciones[0]), self.dueno, self.comedor.nombre,
+                        "Leche", "donante", ["Arroz x2"])
+        call_command("procesar_correos", "--once", stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 0)
+
+        AvisoDonacion.objects.update(creado=timezone.now() - timedelta(minutes=61))
+        call_command("procesar_correos", "--once", stdout=StringIO())
+        self.assertEqual([m.subject for m in mail.outbox], ["Resumen: recibiste 1 donación(es)"])
+        self.assertFalse(AvisoDonacion.objects.exists())
@@ -0,0 +1,48 @@
+from haystack import connections
+from haystack.query import SearchQuerySet
+
+from core.models import Comedor, DocumentoBusqueda
+
+from .datos import IndiceEnBase, PruebaCore, crear_comedor
+
+
+class BackendEnBaseTests(IndiceEnBase, PruebaCore):
+
+    def setUp(self):
+        super().setUp()
+        self.backend = connections["default"].get_backend()
+        self.index = connections["default"].get_unified_index().get_index(Comedor)
+        self.norte = crear_comedor("Comedor Norte", barrio="Constitución")
+        self.sur = crear_comedor("Olla del Sur", barrio="Barracas", descripcion="Comedor chico")
+        self.backend.update(self.index, [self.norte, self.sur])
+
+    def _buscar(self, texto):
+        return [int(r.pk) for r in SearchQuerySet().models(Comedor).filter(content=texto)]
+
+    def test_busca_por_prefijo_sin_acentos_y_ordena_por_relevancia(self):
+        self.assertEqual(self._buscar("CONSTITUCION"), [self.norte.pk])
+        self.assertEqual(self._buscar("barr"), [self.sur.pk])
+        # "comedor" aparece dos veces en uno (nombre y descripción) y una en el otro
+        self.assertEqual(self._buscar("comedor"), [self.norte.pk, self.sur.pk])
+        self.assertEqual(self._buscar("norte comedor"), [self.norte.pk])
+
+    def test_consultas_sin_palabras_o_con_sintaxis_fts(self):
+        self.assertEqual(self._buscar('"*)'), [])
+        # OR no es un operador: es una palabra más, y todas son obligatorias
+        self.assertEqual(self._buscar('norte" OR "sur'), [])
+        self.assertEqual(self._buscar('"norte"'), [self.norte.pk])
+
+    def test_update_reemplaza_y_remove_saca(self):
+        generacion = self.backend.generacion()
+        self.norte.nombre = "Merendero Norte"
+        self.backend.update(self.index, [self.norte])
+        self.assertGreater(self.backend.generacion(), generacion)
+        self.assertEqual(DocumentoBusqueda.objects.filter(django_id=str(self.norte.pk)).count(), 1)
+        self.assertEqual(self._buscar("merendero"), [self.norte.pk])
+
+        self.backend.remove(self.norte)
+        self.assertEqual(self._buscar("merendero"), [])
+        self.assertEqual(self.backend.ids_indexados(Comedor), {str(self.sur.pk)})
+
+        self.backend.clear(models=[Comedor])
+        self.assertEqual(self._buscar("olla"), [])
@@ -0,0 +1,94 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.utils import timezone
+from haystack import connections
+from haystack.query import SearchQuerySet
+
+from core import search_queue
+from core.models import ColaIndexacion, Comedor, Publicacion, ReconstruccionIndice
+from core.search_backend import DBSearchBackend
+
+from .datos import IndiceEnBase, PruebaCore, crear_comedor, crear_publicacion
+
+
+def _ids(model, **filtros):
+    return sorted(int(pk) for pk in SearchQuerySet().models(model).filter(**filtros).values_list("pk", flat=True))
+
+
+class ColaIndexacionTests(IndiceEnBase, PruebaCore):
+
+    def test_save_y_delete_solo_encolan(self):
+        comedor = crear_comedor("Comedor Esperanza")
+        self.assertTrue(ColaIndexacion.objects.filter(modelo="core.comedor", objeto_id=str(comedor.pk)).exists())
+        self.assertEqual(_ids(Comedor, content="esperanza"), [])
+
+        search_queue.procesar_cola()
+        self.assertEqual(_ids(Comedor, content="esperanza"), [comedor.pk])
+        self.assertFalse(ColaIndexacion.objects.exists())
+
+        pk = comedor.pk
+        comedor.delete()
+        search_queue.procesar_cola()
+        self.assertNotIn(pk, _ids(Comedor, content="esperanza"))
+
+    def test_cambio_de_comedor_reindexa_sus_publicaciones(self):
+        comedor = crear_comedor("Norte")
+        publicacion = crear_publicacion(comedor)
+        search_queue.procesar_cola()
+
+        comedor.nombre = "Comedor Arcoiris"
+        comedor.save()
+        self.assertTrue(
+            ColaIndexacion.objects.filter(modelo="core.publicacion", objeto_id=str(publicacion.pk)).exists()
+        )
+        search_queue.procesar_cola()
+        self.assertEqual(_ids(Publicacion, content="arcoiris"), [publicacion.pk])
+
+
+class ReconstruccionTests(IndiceEnBase, PruebaCore):
+
+    def test_reconstruye_en_el_lugar_y_saca_sobrantes(self):
+        norte = crear_comedor("Norte")
+        sur = crear_comedor("Sur")
+        search_queue.procesar_cola()
+        # Un borrado que no pasó por la cola: el documento queda huérfano en el índice
+        Comedor.objects.filter(pk=sur.pk).delete()
+        ColaIndexacion.objects.all().delete()
+
+        job = search_queue.solicitar_reconstruccion()
+        self.assertEqual(search_queue.solicitar_reconstruccion(), job)
+        job = search_queue.tomar_reconstruccion_pendiente()
+        with mock.patch.object(DBSearchBackend, "clear") as clear:
+            search_queue.ejecutar_reconstruccion(job, batch_size=1)
+        clear.assert_not_called()
+
+        job.refresh_from_db()
+        self.assertEqual(job.estado, ReconstruccionIndice.ESTADO_TERMINADO)
+        self.assertEqual(job.procesados, job.total)
+        self.assertIsNotNone(job.tomado)
+        self.assertEqual(connections["default"].get_backend().ids_indexados(Comedor), {str(norte.pk)})
+
+    def test_error_queda_en_el_job(self):
+        job = search_queue.solicitar_reconstruccion()
+        crear_comedor("Norte")
+        with mock.patch.object(DBSearchBackend, "update", side_effect=RuntimeError("sin disco")), \
+                self.assertLogs("core.search_queue", "ERROR"):
+            search_queue.ejecutar_reconstruccion(job)
+        job.refresh_from_db()
+        self.assertEqual(job.estado, ReconstruccionIndice.ESTADO_ERROR)
+        self.assertEqual(job.error, "sin disco")
+
+    def test_retoma_reconstrucciones_abandonadas(self):
+        job = search_queue.solicitar_reconstruccion()
+        self.assertEqual(search_queue.tomar_reconstruccion_pendiente(), job)
+        # Otro worker no toma una reconstrucción que sigue viva...
+        self.assertIsNone(search_queue.tomar_reconstruccion_pendiente())
+
+        # ...pero sí una cuyo worker dejó de avanzar
+        vencido = timezone.now() - timedelta(seconds=search_queue.RECONSTRUCCION_VENCE_SEGUNDOS + 1)
+        ReconstruccionIndice.objects.filter(pk=job.pk).update(tomado=vencido)
+        self.assertEqual(search_queue.solicitar_reconstruccion(), job)
+        retomado = search_queue.tomar_reconstruccion_pendiente()
+        self.assertEqual(retomado, job)
+        self.assertGreater(retomado.tomado, vencido)
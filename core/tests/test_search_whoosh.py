@@ -0,0 +1,61 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from haystack import connections
+from haystack.query import SearchQuerySet
+
+from core.models import Comedor
+
+from .datos import PruebaCore, crear_comedor
+
+
+class WhooshConSearcherTests(PruebaCore):
+    """Sobre un índice Whoosh en un directorio temporal (no el whoosh_index/ del proyecto)."""
+
+    def setUp(self):
+        super().setUp()
+        directorio = tempfile.mkdtemp(prefix="whoosh-test-")
+        self.addCleanup(shutil.rmtree, directorio, ignore_errors=True)
+        patcher = mock.patch.dict(connections.connections_info, {
+            "default": {"ENGINE": "core.search_whoosh.PooledWhooshEngine", "PATH": directorio},
+        })
+        patcher.start()
+        self.addCleanup(connections.reload, "default")
+        self.addCleanup(patcher.stop)
+        connections.reload("default")
+
+        self.backend = connections["default"].get_backend()
+        self.index = connections["default"].get_unified_index().get_index(Comedor)
+        self.norte = crear_comedor("Comedor Norte")
+        self.backend.update(self.index, [self.norte])
+
+    def _buscar(self, texto):
+        return [int(r.pk) for r in SearchQuerySet().models(Comedor).filter(content=texto)]
+
+    def test_reutiliza_el_searcher_hasta_que_cambia_el_indice(self):
+        self.assertEqual(self._buscar("norte"), [self.norte.pk])
+        searcher = self.backend.index._searcher
+        self.assertFalse(searcher.is_closed)
+
+        self._buscar("comedor")
+        self.assertIs(self.backend.index._searcher, searcher)
+
+        sur = crear_comedor("Comedor Sur")
+        self.backend.update(self.index, [sur])
+        self.assertEqual(self._buscar("sur"), [sur.pk])
+        self.assertIsNot(self.backend.index._searcher, searcher)
+
+    def test_optimize_fusiona_segmentos(self):
+        for nombre in ("Sur", "Este", "Oeste"):
+            self.backend.update(self.index, [crear_comedor(nombre)])
+        self.assertGreater(self.backend.segmentos(), 1)
+
+        self.backend.optimize()
+        self.assertEqual(self.backend.segmentos(), 1)
+        self.assertEqual(self._buscar("norte"), [self.norte.pk])
+
+    def test_ids_indexados_incluye_documentos_sin_texto(self):
+        vacio = crear_comedor("x", barrio="", descripcion="")
+        self.backend.update(self.index, [vacio])
+        self.assertEqual(self.backend.ids_indexados(Comedor), {str(self.norte.pk), str(vacio.pk)})
@@ -0,0 +1,46 @@
+from unittest import mock
+
+from core import sugerencias
+
+from .datos import IndiceEnBase, PruebaCore, crear_comedor, crear_publicacion
+
+
+class SugerenciasTests(IndiceEnBase, PruebaCore):
+
+    def setUp(self):
+        super().setUp()
+        self.olla = crear_comedor("Olla Popular", barrio="Constitución")
+        crear_publicacion(self.olla, articulos=("Leche en polvo", "Lentejas"))
+        self.indice = sugerencias.IndicePrefijos()
+        for patcher in (mock.patch.object(sugerencias, "indice", self.indice),
+                        mock.patch("core.views.indice_sugerencias", self.indice)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _textos(self, prefijo, limite=10):
+        return [s["texto"] for s in self.indice.sugerir(prefijo, limite)]
+
+    def test_prefijo_sin_acentos_y_por_palabra_interna(self):
+        self.assertEqual(self._textos("LE"), ["Leche en polvo", "Lentejas"])
+        self.assertEqual(self._textos("constitu"), ["Constitución"])
+        self.assertEqual(self.indice.sugerir("popu"), [{"texto": "Olla Popular", "tipo": "comedor", "id": self.olla.pk}])
+        self.assertEqual(self._textos("le", limite=1), ["Leche en polvo"])
+        self.assertEqual(self._textos("   "), [])
+
+    def test_cambios_se_aplican_al_confirmar(self):
+        self.indice.sugerir("x")   # arma el índice
+        with self.captureOnCommitCallbacks(execute=True):
+            self.olla.nombre = "Merendero Sol"
+            self.olla.save()
+        self.assertEqual(self._textos("olla"), [])
+        self.assertEqual(self._textos("meren"), ["Merendero Sol"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.olla.delete()
+        self.assertEqual(self._textos("meren"), [])
+        self.assertEqual(self._textos("constitu"), [])
+
+    def test_api(self):
+        response = self.client.get("/api/sugerencias/", {"q": "lent"})
+        self.assertEqual(response.json(), {"sugerencias": [{"texto": "Lentejas", "tipo": "articulo"}]})
+        self.assertEqual(self.client.get("/api/sugerencias/", {"q": "le", "limite": "x"}).status_code, 400)
@@ -0,0 +1,94 @@
+from datetime import timedelta
+
+from django.contrib.messages import get_messages
+from django.utils import timezone
+
+from core import utils, verificacion
+from core.models import CorreoPendiente, UserProfile
+
+from .datos import PruebaCore, crear_usuario
+
+
+class VerificarCodigoTests(PruebaCore):
+
+    def setUp(self):
+        super().setUp()
+        self.user = crear_usuario(verificado=False)
+        self.email = self.user.email
+        self.assertEqual(verificacion.emitir_codigo(self.email).estado, verificacion.ENVIADO)
+        self.codigo = UserProfile.objects.get(user=self.user).email_verification_code
+
+    def _perfil(self):
+        return UserProfile.objects.get(user=self.user)
+
+    def _incorrecto(self):
+        return "000000" if self.codigo != "000000" else "111111"
+
+    def test_emitir_codigo_encola_el_mail(self):
+        correo = CorreoPendiente.objects.get()
+        self.assertEqual(correo.destinatario, self.email)
+        self.assertIn(self.codigo, correo.mensaje)
+        self.assertEqual(verificacion.emitir_codigo("nadie@example.com").estado, verificacion.SIN_CUENTA)
+
+    def test_codigo_correcto_verifica_una_sola_vez(self):
+        resultado = verificacion.verificar_codigo(self.email.upper(), self.codigo)
+        self.assertEqual(resultado.estado, verificacion.VERIFICADO)
+        self.assertEqual(resultado.user, self.user)
+        perfil = self._perfil()
+        self.assertTrue(perfil.email_verified)
+        self.assertIsNone(perfil.email_verification_code)
+
+        self.assertEqual(verificacion.verificar_codigo(self.email, self.codigo).estado, verificacion.YA_VERIFICADO)
+        self.assertEqual(verificacion.emitir_codigo(self.email).estado, verificacion.YA_VERIFICADO)
+
+    def test_codigo_incorrecto_cuenta_y_bloquea(self):
+        for restantes in range(verificacion.MAX_TRIES - 1, 0, -1):
+            resultado = verificacion.verificar_codigo(self.email, self._incorrecto())
+            self.assertEqual((resultado.estado, resultado.restantes), (verificacion.INCORRECTO, restantes))
+        self.assertEqual(verificacion.verificar_codigo(self.email, self._incorrecto()).estado, verificacion.BLOQUEADO)
+
+        # El código quedó invalidado: ni el correcto sirve, y arranca el cooldown para reenviar
+        self.assertIsNone(self._perfil().email_verification_code)
+        self.assertEqual(verificacion.verificar_codigo(self.email, self.codigo).estado, verificacion.VENCIDO)
+        self.assertGreater(utils.cooldown_remaining(self.email), 0)
+
+    def test_codigo_vencido_y_sin_cuenta(self):
+        UserProfile.objects.filter(user=self.user).update(
+            verification_expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertEqual(verificacion.verificar_codigo(self.email, self.codigo).estado, verificacion.VENCIDO)
+        self.assertFalse(self._perfil().email_verified)
+        self.assertEqual(verificacion.verificar_codigo("nadie@example.com", "123456").estado, verificacion.SIN_CUENTA)
+
+
+class VerificarEmailVistasTests(PruebaCore):
+
+    def setUp(self):
+        super().setUp()
+        self.user = crear_usuario(verificado=False)
+        verificacion.emitir_codigo(self.user.email)
+        self.codigo = UserProfile.objects.get(user=self.user).email_verification_code
+
+    def _mensajes(self, response):
+        return [str(m) for m in get_messages(response.wsgi_request)]
+
+    def test_verificar_email(self):
+        response = self.client.post("/verificar-email/", {"email": self.user.email, "code": "x"})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Código incorrecto", self._mensajes(response)[0])
+
+        response = self.client.post("/verificar-email/", {"email": self.user.email, "code": self.codigo})
+        self.assertRedirects(response, "/login/", fetch_redirect_response=False)
+        self.assertTrue(UserProfile.objects.get(user=self.user).email_verified)
+
+    def test_verificacion_obligatoria_inicia_sesion(self):
+        self.assertRedirects(self.client.get("/verificar-email-obligatorio/"), "/verificar-email/",
+                             fetch_redirect_response=False)
+        session = self.client.session
+        session.update({"user_needs_verification": True, "verify_email": self.user.email})
+        session.save()
+
+        response = self.client.post("/verificar-email-obligatorio/", {"code": self.codigo})
+        self.assertRedirects(response, "/privada/", fetch_redirect_response=False)
+        self.assertEqual(int(self.client.session["_auth_user_id"]), self.user.pk)
+        self.assertNotIn("verify_email", self.client.session)
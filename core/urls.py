@@ -8,6 +8,7 @@ app_name = 'core'
 urlpatterns = [
     path('', views.home, name='home'),
     path('privada/', views.privada, name='privada'),
+    path('privada/resumen-donaciones/', views.preferencia_resumen_donaciones, name='preferencia_resumen_donaciones'),
     
 
     # Comedores
@@ -32,7 +33,11 @@ urlpatterns = [
 
     # API endpoints para AJAX
     path('api/publicaciones/<int:id_publicacion>/articulos/', views.listar_articulos_disponibles_por_publicacion, name='api_articulos_publicacion'),
+    path('api/comedores/cercanos/', views.api_comedores_cercanos, name='api_comedores_cercanos'),
+    path('api/comedores/exportar/', views.exportar_comedores, name='api_exportar_comedores'),
+    path('api/sugerencias/', views.api_sugerencias, name='api_sugerencias'),
     path('api/donaciones/enviar/', views.api_enviar_donacion, name='api_enviar_donacion'),
+    path('api/donaciones/enviar-lote/', views.api_enviar_donaciones_lote, name='api_enviar_donaciones_lote'),
     path('api/comedores/<int:comedor_id>/publicaciones/<int:publicacion_id>/donar/', views.api_crear_donacion, name='api_crear_donacion'),
 
     # Activacion por token
@@ -1,10 +1,13 @@
 # core/utils.py
 import secrets
 import time
+import unicodedata
 
 from django.core.cache import cache
 from django.conf import settings
 
+from .limites import VentanaDeslizante
+
 EMAIL_SUBJECT_VERIFICATION = "Comedores Comunitarios – Verificación de correo electrónico"
 COOLDOWN_S = getattr(settings, "VERIFICATION_RESEND_COOLDOWN_SECONDS", 60)
 RESEND_WINDOW_S = getattr(settings, "VERIFICATION_RESEND_WINDOW_SECONDS", 60)
@@ -13,8 +16,23 @@ RESEND_MAX_NO_WAIT = getattr(settings, "VERIFICATION_RESEND_MAX_NO_WAIT", 3)
 def generar_codigo():
     return f"{secrets.randbelow(10**6):06d}"
 
+def normalizar_texto(valor: str | None) -> str:
+    """Pasa a minúsculas (casefold), saca acentos y colapsa espacios: 'Constitución ' -> 'constitucion'."""
+    if not valor:
+        return ""
+    descompuesto = unicodedata.normalize("NFKD", valor.casefold())
+    sin_acentos = "".join(c for c in descompuesto if not unicodedata.combining(c))
+    return " ".join(sin_acentos.split())
+
+def rango_prefijo(prefijo: str) -> tuple[str, str]:
+    """
+    Devuelve (desde, hasta) tal que desde <= x < hasta equivale a x.startswith(prefijo).
+    Un rango sobre la columna usa el índice B-tree en SQLite y Postgres, a diferencia de LIKE '%x%'.
+    """
+    return prefijo, prefijo[:-1] + chr(ord(prefijo[-1]) + 1)
+
 def _cooldown_key(email: str) -> str:
-    return f"verify_cd:{email}"
+    return f"verify_cd:{email.strip().lower()}"
 
 def start_cooldown(email: str) -> None:
     """Inicia cooldown. Esto evita spam al enviar codigo"""
@@ -34,47 +52,16 @@ def cooldown_remaining(email: str) -> int:
     remaining = COOLDOWN_S - elapsed
     return remaining if remaining > 0 else 0
 
-def _resend_bucket_key(email: str) -> str:
-    return f"verify_resend_bucket:{email}"
+_reenvios = VentanaDeslizante("verify_resend", RESEND_MAX_NO_WAIT, RESEND_WINDOW_S)
 
 def can_reenviar_now(email: str) -> tuple[bool, int]:
     """
-    Devuelve (permitido, remaining_seconds_si_no).
-    Permite 2 reenvíos "free" por ventana de 60s; el 3º requiere esperar a que venza la ventana.
+    Reserva un reenvío para `email` si no pasó el límite (RESEND_MAX_NO_WAIT por
+    ventana móvil de RESEND_WINDOW_S segundos). Devuelve (permitido, remaining_seconds_si_no).
+    Es atómico entre workers: chequear y contar son la misma operación.
     """
-    key = _resend_bucket_key(email)
-    data = cache.get(key)
-    now = int(time.time())
-
-    if not data:
-        # (count, window_start)
-        cache.set(key, (0, now), timeout=RESEND_WINDOW_S)
-        data = (0, now)
-
-    count, window_start = data
-
-    # si la ventana ya venció, resetea
-    if now - window_start >= RESEND_WINDOW_S:
-        cache.set(key, (0, now), timeout=RESEND_WINDOW_S)
-        count, window_start = 0, now
-
-    if count >= RESEND_MAX_NO_WAIT:
-        # bloqueado hasta que termine la ventana
-        remaining = RESEND_WINDOW_S - (now - window_start)
-        return (False, remaining if remaining > 0 else 0)
-
-    return (True, 0)
+    return _reenvios.consumir(email.strip().lower())
 
-def mark_reenviado(email: str) -> None:
-    """Incrementa el contador dentro de la ventana."""
-    key = _resend_bucket_key(email)
-    data = cache.get(key)
-    now = int(time.time())
-    if not data:
-        cache.set(key, (1, now), timeout=RESEND_WINDOW_S)
-        return
-    count, window_start = data
-    if now - window_start >= RESEND_WINDOW_S:
-        cache.set(key, (1, now), timeout=RESEND_WINDOW_S)
-    else:
-        cache.set(key, (count + 1, window_start), timeout=RESEND_WINDOW_S)
+def liberar_reenvio(email: str) -> None:
+    """Devuelve el reenvío reservado por can_reenviar_now si al final no se envió nada."""
+    _reenvios.devolver(email.strip().lower())
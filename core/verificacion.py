@@ -0,0 +1,137 @@
+# core/verificacion.py
+"""
+Verificación de email con UPDATEs condicionales (compare-and-set).
+
+Antes cada intento tomaba select_for_update() sobre User y UserProfile dentro
+de una transacción: en SQLite eso bloquea la base entera mientras dura el
+request, y sumar un intento fallido costaba UPDATE + SELECT (refresh_from_db).
+
+Acá cada operación lee la cuenta una vez (usuario y perfil en el mismo SELECT)
+y escribe con un único UPDATE cuyo WHERE repite lo leído: código, vencimiento
+e intentos. Si otro request cambió la fila en el medio, el UPDATE no toca nada
+y se vuelve a leer y decidir. Así:
+
+- de varios códigos correctos simultáneos sólo uno verifica la cuenta,
+- cada código incorrecto cuenta exactamente una vez,
+- el intento que llega a VERIFICATION_MAX_TRIES invalida el código en el mismo
+  UPDATE, así que no quedan intentos "de más" en carrera: hay que pedir otro.
+"""
+import hmac
+from typing import NamedTuple
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from .mail_service import EmailService
+from .models import UserProfile
+from .utils import start_cooldown
+
+WINDOW_MIN = getattr(settings, "VERIFICATION_WINDOW_MINUTES", 15)
+MAX_TRIES = getattr(settings, "VERIFICATION_MAX_TRIES", 3)
+_RELECTURAS = 10   # veces que se vuelve a leer tras perder la carrera de un UPDATE
+
+VERIFICADO = "verificado"
+YA_VERIFICADO = "ya_verificado"
+SIN_CUENTA = "sin_cuenta"
+VENCIDO = "vencido"
+INCORRECTO = "incorrecto"
+BLOQUEADO = "bloqueado"   # se agotaron los intentos: el código quedó invalidado
+ENVIADO = "enviado"
+
+_CAMPOS = ["email_verified", "email_verification_code", "verification_expires_at", "verification_tries"]
+
+
+class Resultado(NamedTuple):
+    estado: str
+    user: User | None = None
+    restantes: int = 0   # intentos que quedan (sólo con INCORRECTO)
+
+
+def _cuenta(email: str):
+    """(user, perfil) del email en una consulta; crea el perfil si falta. (None, None) si no hay cuenta."""
+    user = User.objects.select_related("userprofile").filter(email__iexact=email).first()
+    if user is None:
+        return None, None
+    try:
+        return user, user.userprofile
+    except UserProfile.DoesNotExist:
+        profile, _ = UserProfile.objects.get_or_create(user=user)
+        user.userprofile = profile
+        return user, profile
+
+
+def _aplicar(profile: UserProfile, leido: dict, cambios: dict) -> bool:
+    """UPDATE de `cambios` sólo si el perfil sigue como `leido`. Si pasa, deja `profile` al día."""
+    if not UserProfile.objects.filter(pk=profile.pk, **leido).update(**cambios):
+        return False
+    for campo, valor in cambios.items():
+        setattr(profile, campo, valor)
+    return True
+
+
+def verificar_codigo(email: str, code: str) -> Resultado:
+    """Intenta verificar la cuenta de `email` con `code`."""
+    user, profile = _cuenta(email)
+    if user is None:
+        return Resultado(SIN_CUENTA)
+
+    for _ in range(_RELECTURAS):
+        if profile.email_verified:
+            return Resultado(YA_VERIFICADO, user)
+        ahora = timezone.now()
+        codigo = profile.email_verification_code
+        if not codigo or not profile.verification_expires_at or ahora > profile.verification_expires_at:
+            return Resultado(VENCIDO, user)
+        if profile.verification_tries >= MAX_TRIES:
+            return Resultado(BLOQUEADO, user)
+
+        leido = {"email_verified": False, "email_verification_code": codigo}
+        if hmac.compare_digest(codigo, code or ""):
+            exito = {
+                "email_verified": True, "email_verification_code": None,
+                "verification_expires_at": None, "verification_tries": 0,
+            }
+            vigente = {"verification_expires_at__gte": ahora, "verification_tries__lt": MAX_TRIES}
+            if _aplicar(profile, {**leido, **vigente}, exito):
+                return Resultado(VERIFICADO, user)
+        else:
+            intentos = profile.verification_tries + 1
+            if intentos >= MAX_TRIES:
+                cambios = {"email_verification_code": None, "verification_expires_at": None, "verification_tries": 0}
+            else:
+                cambios = {"verification_tries": intentos}
+            if _aplicar(profile, {**leido, "verification_tries": profile.verification_tries}, cambios):
+                if intentos >= MAX_TRIES:
+                    start_cooldown(email)
+                    return Resultado(BLOQUEADO, user)
+                return Resultado(INCORRECTO, user, MAX_TRIES - intentos)
+
+        # Otro request cambió el perfil entre la lectura y el UPDATE: releer y decidir de nuevo
+        profile.refresh_from_db(fields=_CAMPOS)
+
+    raise RuntimeError(f"Demasiada concurrencia verificando {email}")
+
+
+def emitir_codigo(email: str) -> Resultado:
+    """Genera un código nuevo para `email` (reinicia intentos) y encola el mail con él."""
+    user, profile = _cuenta(email)
+    if user is None:
+        return Resultado(SIN_CUENTA)
+    if profile.email_verified:
+        return Resultado(YA_VERIFICADO, user)
+
+    profile.set_new_code(minutes=WINDOW_MIN)
+    nuevo = {
+        "email_verification_code": profile.email_verification_code,
+        "verification_expires_at": profile.verification_expires_at,
+        "verification_tries": 0,
+    }
+    # El código y su correo (outbox) se guardan juntos: un UPDATE y un INSERT
+    with transaction.atomic():
+        if not UserProfile.objects.filter(pk=profile.pk, email_verified=False).update(**nuevo):
+            profile.email_verified = True   # la verificó otro request en el medio
+            return Resultado(YA_VERIFICADO, user)
+        EmailService.send_verification(email=email, code=profile.email_verification_code, minutos=WINDOW_MIN)
+    return Resultado(ENVIADO, user)
@@ -2,35 +2,54 @@ from django.contrib.auth.decorators import login_required
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 from django.db import IntegrityError, models, transaction
-from django.db.models import F, Q
-from .utils import start_cooldown, cooldown_remaining, can_reenviar_now, mark_reenviado
+from django.db.models import Q
+from .idempotencia import idempotente
+from .limites import limitar
+from .perfiles import BACKEND_CON_PERFIL, perfil_de
+from . import verificacion
+from .verificacion import emitir_codigo, verificar_codigo
+from .utils import cooldown_remaining, can_reenviar_now, liberar_reenvio, normalizar_texto, rango_prefijo
 from django.shortcuts import get_object_or_404
-from django.contrib.auth import login as auth_login, authenticate
+from django.urls import reverse
+from django.contrib.auth import login as auth_login
 from django.contrib.auth.forms import AuthenticationForm
 from django.conf import settings
 from django.contrib.auth.models import User
 from functools import wraps
-from django.http import JsonResponse
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from typing import List
 from django.views.decorators.http import require_GET, require_POST
 from django.contrib import messages
 from django.shortcuts import redirect, render
-from haystack.query import SearchQuerySet
 from core.mail_service import EmailService
+from core.difusion import difundir_publicacion
+from core.resumen_donaciones import avisar_donacion, avisar_donaciones
+from core.stats import get_snapshot, comedores_recientes
+from core.pagination import KeysetPage, paginar_keyset
+from core.geo import cercanos, parse_coordenadas
+from core.favoritos import ids_favoritos
+from core.export import iter_comedores, stream_csv, stream_jsonl
+from core.search_queue import solicitar_reconstruccion
+from core.busqueda import buscar_pagina
+from core.sugerencias import SUGERENCIAS_MAX, indice as indice_sugerencias
 from django.contrib.admin.views.decorators import staff_member_required
-from haystack.management.commands import update_index
 from django.http import HttpResponse
 
 from .forms import ComedorForm, CustomUserCreationForm, FavoritoForm, DonacionForm, PublicacionForm, PublicacionArticuloFormSet
-from .models import Comedor, UserProfile, Favoritos, Donacion, Publicacion, PublicacionArticulo, DonacionItem
+from .models import Comedor, UserProfile, Favoritos, Donacion, Publicacion, PublicacionArticulo, DonacionItem, ReconstruccionIndice
 
 import json
-import hmac
 import logging
 
 SESSION_KEY = "pending_registration"
 WINDOW_MIN = getattr(settings, "VERIFICATION_WINDOW_MINUTES", 15)
 MAX_TRIES  = getattr(settings, "VERIFICATION_MAX_TRIES", 3)
+COMEDORES_PAGE_SIZE = getattr(settings, "COMEDORES_PAGE_SIZE", 24)
+DONACIONES_PAGE_SIZE = getattr(settings, "DONACIONES_PAGE_SIZE", 20)
+DONACIONES_LOTE_MAX = getattr(settings, "DONACIONES_LOTE_MAX", 20)
+PUBLICACIONES_VENCIDAS_PAGE_SIZE = getattr(settings, "PUBLICACIONES_VENCIDAS_PAGE_SIZE", 10)
+# Mayor id que entra en un entero de 64 bits (SQLite/Postgres): más allá la consulta falla
+ID_MAX = 2 ** 63 - 1
 
 logger = logging.getLogger(__name__)
 
@@ -44,16 +63,38 @@ def email_verified_required(view_func):
         if not request.user.is_authenticated:
             return redirect('login')
         
-        try:
-            profile = request.user.userprofile
-            if not profile.email_verified:
+        # Perfil ya cargado junto con el usuario (core/perfiles.py): no hay consulta extra
+        profile = perfil_de(request)
+        if profile is None:
+            # Si no hay perfil, crear uno y requerir verificación
+            try:
+                with transaction.atomic():
+                    profile = perfil_de(request, crear=True)
+                    profile.set_new_code(minutes=WINDOW_MIN)
+                    profile.save()
+                    EmailService.send_verification(
+                        email=request.user.email,
+                        code=profile.email_verification_code,
+                        minutos=WINDOW_MIN
+                    )
                 messages.warning(request, 'Para realizar esta acción necesitás verificar tu email. Te enviamos un código de verificación.')
-                
-                # Generar y enviar un nuevo código si no hay uno válido
-                try:
-                    now = timezone.now()
-                    if (not profile.verification_expires_at or 
-                        now > profile.verification_expires_at):
+                request.session['verify_email'] = request.user.email
+                return redirect('core:verificar_email')
+            except Exception as e:
+                logger.exception("[email_verified_required] Error enviando código: %s", e)
+                messages.error(request, 'No pudimos enviar el código de verificación. Intentá más tarde.')
+                return redirect('core:privada')
+
+        if not profile.email_verified:
+            messages.warning(request, 'Para realizar esta acción necesitás verificar tu email. Te enviamos un código de verificación.')
+
+            # Generar y enviar un nuevo código si no hay uno válido
+            try:
+                now = timezone.now()
+                if (not profile.verification_expires_at or 
+                    now > profile.verification_expires_at):
+                    # El código y su correo (outbox) se guardan juntos
+                    with transaction.atomic():
                         profile.set_new_code(minutes=WINDOW_MIN)
                         profile.verification_tries = 0
                         profile.save(update_fields=["email_verification_code", "verification_expires_at", "verification_tries"])
@@ -62,25 +103,7 @@ def email_verified_required(view_func):
                             code=profile.email_verification_code,
                             minutos=WINDOW_MIN
                         )
-                    
-                    request.session['verify_email'] = request.user.email
-                    return redirect('core:verificar_email')
-                except Exception as e:
-                    logger.exception("[email_verified_required] Error enviando código: %s", e)
-                    messages.error(request, 'No pudimos enviar el código de verificación. Intentá más tarde.')
-                    return redirect('core:privada')
-        except UserProfile.DoesNotExist:
-            # Si no hay perfil, crear uno y requerir verificación
-            profile = UserProfile.objects.create(user=request.user)
-            profile.set_new_code(minutes=WINDOW_MIN)
-            profile.save()
-            try:
-                EmailService.send_verification(
-                    email=request.user.email,
-                    code=profile.email_verification_code,
-                    minutos=WINDOW_MIN
-                )
-                messages.warning(request, 'Para realizar esta acción necesitás verificar tu email. Te enviamos un código de verificación.')
+
                 request.session['verify_email'] = request.user.email
                 return redirect('core:verificar_email')
             except Exception as e:
@@ -91,29 +114,39 @@ def email_verified_required(view_func):
         return view_func(request, *args, **kwargs)
     return _wrapped_view
 
+def _url_con_cursor(request, cursor):
+    """Link a otra página del listado, conservando los filtros del request."""
+    if not cursor:
+        return None
+    params = request.GET.copy()
+    params['cursor'] = cursor
+    return f"?{params.urlencode()}"
+
+def _dashboard_context():
+    """Estadísticas para home/privada, leídas del snapshot materializado."""
+    snapshot = get_snapshot()
+    return {
+        'comedores_count': snapshot.comedores_count,
+        'total_capacity': snapshot.total_capacity,
+        'barrios_count': snapshot.barrios_count,
+        'tipos_count': snapshot.tipos_count,
+        'comedores_recientes': comedores_recientes(snapshot),
+    }
+
 def home(request):
     logger.info('Entrando a la vista home')
     try:
-        comedores_count = Comedor.objects.count()
-        total_capacity = Comedor.objects.aggregate(total=models.Sum('capacidad'))['total'] or 0
-        barrios_count = Comedor.objects.values('barrio').distinct().count()
-        tipos_count = Comedor.objects.values('tipo').distinct().count()
-        comedores_recientes = Comedor.objects.all().order_by('-id')[:6]
-        logger.info(f"Comedores: {comedores_count}, Capacidad: {total_capacity}")
+        context = _dashboard_context()
+        logger.info(f"Comedores: {context['comedores_count']}, Capacidad: {context['total_capacity']}")
     except Exception as e:
         logger.error(f"Error en vista home: {e}")
-        comedores_count = 0
-        total_capacity = 0
-        barrios_count = 0
-        tipos_count = 0
-        comedores_recientes = []
-    context = {
-        'comedores_count': comedores_count,
-        'total_capacity': total_capacity,
-        'barrios_count': barrios_count,
-        'tipos_count': tipos_count,
-        'comedores_recientes': comedores_recientes,
-    }
+        context = {
+            'comedores_count': 0,
+            'total_capacity': 0,
+            'barrios_count': 0,
+            'tipos_count': 0,
+            'comedores_recientes': [],
+        }
     logger.info('Renderizando template core/home.html')
     return render(request, 'core/home.html', context)
 
@@ -122,30 +155,35 @@ def privada(request):
     """
     Vista del perfil privado del usuario
     """
-    comedores_count = Comedor.objects.count()
-    total_capacity = Comedor.objects.aggregate(total=models.Sum('capacidad'))['total'] or 0
-    barrios_count = Comedor.objects.values('barrio').distinct().count()
-    tipos_count = Comedor.objects.values('tipo').distinct().count()
-    comedores_recientes = Comedor.objects.all().order_by('-id')[:6]
+    context = _dashboard_context()
     
-    # Verificar estado de verificación del email
-    email_verified = False
-    try:
-        profile = request.user.userprofile
-        email_verified = profile.email_verified
-    except UserProfile.DoesNotExist:
-        email_verified = False
+    # Verificar estado de verificación del email (perfil cargado junto con el usuario)
+    profile = perfil_de(request)
+    email_verified = bool(profile and profile.email_verified)
     
-    context = {
-        'comedores_count': comedores_count,
-        'total_capacity': total_capacity,
-        'barrios_count': barrios_count,
-        'tipos_count': tipos_count,
-        'comedores_recientes': comedores_recientes,
-        'email_verified': email_verified,
-    }
+    context['email_verified'] = email_verified
+    context['es_dueno_comedor'] = Comedor.objects.filter(usuario=request.user).exists()
+    context['resumen_donaciones'] = bool(profile and profile.resumen_donaciones)
     return render(request, 'core/privada.html', context)
 
+@require_POST
+@login_required
+def preferencia_resumen_donaciones(request):
+    """
+    Activa o desactiva el resumen periódico de donaciones (en vez de un mail por donación).
+    POST /privada/resumen-donaciones/  (activar=1|0)
+    """
+    activar = request.POST.get("activar") == "1"
+    profile = perfil_de(request, crear=True)
+    profile.resumen_donaciones = activar
+    profile.save(update_fields=["resumen_donaciones"])
+    if activar:
+        messages.success(request, "Vas a recibir un resumen periódico de las donaciones a tus comedores.")
+    else:
+        messages.success(request, "Vas a recibir un correo por cada donación a tus comedores.")
+    return redirect('core:privada')
+
+@limitar("registro", ip="5/m")
 def registro(request):
     """
         Registro con solo dos casos:
@@ -198,18 +236,12 @@ def registro(request):
                         "email_verified"
                     ])
 
-                    # Enviar verificacion SOLO si el commit fue exitoso
-                    def _send_verification():
-                        try:
-                            EmailService.send_verification(
-                                email=email,
-                                code=profile.email_verification_code,
-                                minutos=WINDOW_MIN
-                            )
-                        except Exception as e:
-                            logger.exception("[registro] Falló envío de verificación a %s: %s", email, e)
-
-                    transaction.on_commit(_send_verification)
+                    # Se encola en la misma transacción: sale sólo si el usuario se crea
+                    EmailService.send_verification(
+                        email=email,
+                        code=profile.email_verification_code,
+                        minutos=WINDOW_MIN
+                    )
                     messages.success(
                         request,
                         f"¡Cuenta creada exitosamente! Te enviamos un código de verificación a {email}. Revisá tu correo."
@@ -278,40 +310,152 @@ def crear_comedor(request):
 
     return render(request, "core/crear_comedor.html", {"form": form})
 
+def _facetas_comedores(comedores):
+    """
+    Conteos por barrio y por tipo sobre el queryset filtrado, con UNA consulta agrupada
+    por (barrio_norm, tipo_norm). Devuelve dos listas de (etiqueta, cantidad) ordenadas por cantidad.
+    """
+    filas = (
+        comedores
+        .order_by()
+        .values('barrio_norm', 'tipo_norm')
+        .annotate(barrio=models.Min('barrio'), tipo=models.Min('tipo'), n=models.Count('id'))
+    )
+    barrios, tipos = {}, {}
+    for fila in filas:
+        etiqueta, n = barrios.get(fila['barrio_norm'], (fila['barrio'], 0))
+        barrios[fila['barrio_norm']] = (etiqueta, n + fila['n'])
+        etiqueta, n = tipos.get(fila['tipo_norm'], (fila['tipo'], 0))
+        tipos[fila['tipo_norm']] = (etiqueta, n + fila['n'])
+
+    def _ordenar(facetas):
+        return sorted(facetas.values(), key=lambda par: (-par[1], par[0]))
+    return _ordenar(barrios), _ordenar(tipos)
+
 # Vista para listar comedores con filtros
 def listar_comedores(request):
     barrio = request.GET.get('barrio', '')
     tipo = request.GET.get('tipo', '')
     capacidad = request.GET.get('capacidad', '')
     comedores = Comedor.objects.all()
-    if barrio:
-        comedores = comedores.filter(barrio__icontains=barrio)
-    if tipo:
-        comedores = comedores.filter(tipo__icontains=tipo)
+    # Prefijo sobre las columnas normalizadas: usa índice e ignora mayúsculas/acentos
+    barrio_norm = normalizar_texto(barrio)
+    if barrio_norm:
+        desde, hasta = rango_prefijo(barrio_norm)
+        comedores = comedores.filter(barrio_norm__gte=desde, barrio_norm__lt=hasta)
+    tipo_norm = normalizar_texto(tipo)
+    if tipo_norm:
+        desde, hasta = rango_prefijo(tipo_norm)
+        comedores = comedores.filter(tipo_norm__gte=desde, tipo_norm__lt=hasta)
     if capacidad:
         try:
             comedores = comedores.filter(capacidad__gte=int(capacidad))
         except ValueError:
             pass
+
+    facetas_barrio, facetas_tipo = _facetas_comedores(comedores)
+
+    lat, lon = parse_coordenadas(request.GET.get('lat'), request.GET.get('lon'))
+    if lat is not None:
+        # "Cerca mío": los más cercanos primero, sin paginar
+        radio = _parse_radio(request.GET.get('radio'))
+        items = []
+        for comedor, distancia in cercanos(lat, lon, k=COMEDORES_PAGE_SIZE, radio_km=radio, queryset=comedores):
+            comedor.distancia_km = distancia
+            items.append(comedor)
+        pagina = KeysetPage(items)
+    else:
+        # Paginación por cursor ordenada por (nombre, id)
+        pagina = paginar_keyset(
+            comedores,
+            cursor=request.GET.get('cursor'),
+            campos=('nombre', 'id'),
+            page_size=COMEDORES_PAGE_SIZE,
+        )
+
+    # Sin filtros el total sale del snapshot; con filtros no se cuenta (sería otro scan)
+    total_comedores = None if (barrio or tipo or capacidad or lat is not None) else get_snapshot().comedores_count
+
     return render(request, 'core/listar_comedores.html', {
-        'comedores': comedores,
+        'comedores': pagina,
+        'pagina': pagina,
+        'next_url': _url_con_cursor(request, pagina.next_cursor),
+        'prev_url': _url_con_cursor(request, pagina.prev_cursor),
+        'total_comedores': total_comedores,
+        'facetas_barrio': facetas_barrio,
+        'facetas_tipo': facetas_tipo,
         'barrio': barrio,
         'tipo': tipo,
-        'capacidad': capacidad
+        'capacidad': capacidad,
+        'lat': lat,
+        'lon': lon,
+        'favoritos_ids': ids_favoritos(request),
     })
 
+def _parse_radio(valor):
+    try:
+        radio = float(valor)
+    except (TypeError, ValueError):
+        return None
+    return radio if radio > 0 else None
+
+@require_GET
+def api_comedores_cercanos(request):
+    """
+    API: Comedores más cercanos a un punto.
+    GET /api/comedores/cercanos/?lat=-34.60&lon=-58.38&k=10&radio=5
+    """
+    lat, lon = parse_coordenadas(request.GET.get('lat'), request.GET.get('lon'))
+    if lat is None:
+        return JsonResponse({"error": "Parámetros lat/lon inválidos."}, status=400)
+    try:
+        k = max(1, min(int(request.GET.get('k') or 10), 100))
+    except ValueError:
+        return JsonResponse({"error": "El parámetro k debe ser un número."}, status=400)
+
+    resultados = cercanos(lat, lon, k=k, radio_km=_parse_radio(request.GET.get('radio')))
+    return JsonResponse({
+        "comedores": [
+            {
+                "id": comedor.id,
+                "nombre": comedor.nombre,
+                "barrio": comedor.barrio,
+                "tipo": comedor.tipo,
+                "capacidad": comedor.capacidad,
+                "latitud": comedor.latitud,
+                "longitud": comedor.longitud,
+                "distancia_km": round(distancia, 3),
+            }
+            for comedor, distancia in resultados
+        ]
+    })
+
+@require_GET
+def api_sugerencias(request):
+    """
+    API: Autocompletado de nombres de comedores, barrios y artículos.
+    GET /api/sugerencias/?q=lec&limite=10
+    """
+    try:
+        limite = max(1, min(int(request.GET.get('limite') or SUGERENCIAS_MAX), 50))
+    except ValueError:
+        return JsonResponse({"error": "El parámetro limite debe ser un número."}, status=400)
+    return JsonResponse({"sugerencias": indice_sugerencias.sugerir(request.GET.get('q', ''), limite)})
+
 # Vista para detalle de comedor
 def detalle_comedor(request, pk):
     comedor = get_object_or_404(Comedor, pk=pk)
     
-    # Obtener todas las publicaciones del comedor
-    publicaciones = (
+    # Sólo las publicaciones vigentes; las vencidas se ven paginadas en listar_publicaciones
+    publicaciones = list(
         Publicacion.objects
         .filter(id_comedor=comedor)
+        .vigentes()
         .select_related("id_comedor", "id_tipo_publicacion")
         .prefetch_related("publicacionarticulo_set")
         .order_by("-fecha_inicio")
     )
+    hay_vencidas = Publicacion.objects.filter(id_comedor=comedor).vencidas().exists()
 
     # Log de visualización
     if comedor.imagen:
@@ -319,9 +463,12 @@ def detalle_comedor(request, pk):
 
     return render(request, 'core/detalle_comedor.html', {
         'comedor': comedor,
-        'publicaciones': publicaciones
+        'publicaciones': publicaciones,
+        'hay_vencidas': hay_vencidas,
+        'es_favorito': comedor.id in ids_favoritos(request),
     })
 
+@limitar("login", ip="20/m", campo=("username", "5/m"))
 def custom_login(request):
     """
     Vista personalizada de login - permite login sin verificación de email
@@ -332,39 +479,24 @@ def custom_login(request):
     if request.method == 'POST':
         form = AuthenticationForm(request, data=request.POST)
         if form.is_valid():
-            username = form.cleaned_data.get('username')
-            password = form.cleaned_data.get('password')
-            
-            # Intentar autenticación
-            user = authenticate(request, username=username, password=password)
-
-            if user is not None:
-                if user.is_active:
-                    # Hacer login directamente sin verificar email
-                    auth_login(request, user)
-                    
-                    # Verificar si el email está verificado para mostrar mensaje apropiado
-                    try:
-                        profile = user.userprofile
-                        if not profile.email_verified:
-                            messages.warning(request, f'¡Bienvenido, {user.first_name or user.username}! Tu email no está verificado. Algunas funciones estarán limitadas.')
-                        else:
-                            messages.success(request, f'¡Bienvenido de vuelta, {user.first_name or user.username}!')
-                    except:
-                        messages.success(request, f'¡Bienvenido de vuelta, {user.first_name or user.username}!')
-                    
-                    next_url = request.GET.get('next', 'core:privada')
-                    return redirect(next_url)
+            # El form ya autenticó (una sola vez: PBKDF2 es caro) y el perfil viene en el mismo SELECT
+            user = form.get_user()
+
+            if user.is_active:
+                # Hacer login directamente sin verificar email
+                auth_login(request, user)
+                
+                # Verificar si el email está verificado para mostrar mensaje apropiado
+                profile = perfil_de(request)
+                if profile is not None and not profile.email_verified:
+                    messages.warning(request, f'¡Bienvenido, {user.first_name or user.username}! Tu email no está verificado. Algunas funciones estarán limitadas.')
                 else:
-                    messages.error(request, 'Tu cuenta está desactivada. Contacta al administrador.')
+                    messages.success(request, f'¡Bienvenido de vuelta, {user.first_name or user.username}!')
+                
+                next_url = request.GET.get('next', 'core:privada')
+                return redirect(next_url)
             else:
-                # Verificar si el usuario existe pero la contraseña es incorrecta
-                try:
-                    from django.contrib.auth.models import User
-                    user = User.objects.get(username=username)
-                    messages.error(request, 'La contraseña es incorrecta. Verifica tu contraseña e intenta nuevamente.')
-                except User.DoesNotExist:
-                    messages.error(request, 'No existe una cuenta con ese nombre de usuario. Verifica el nombre o regístrate si es tu primera vez.')
+                messages.error(request, 'Tu cuenta está desactivada. Contacta al administrador.')
         else:
             # El formulario tiene errores, Django los mostrará automáticamente
             if not form.cleaned_data.get('username'):
@@ -399,70 +531,42 @@ def verificar_email(request):
             return render(request, 'registration/verificar_email.html', ctx)
 
         try:
-            with transaction.atomic():
-                user = (
-                    User.objects
-                    .select_for_update()
-                    .filter(email__iexact=email)
-                    .first()
-                )
-                if not user:
-                    messages.error(request, f"No existe una cuenta con el correo '{email}'. Verificá que hayas ingresado el correo correcto.")
-                    return render(request, 'registration/verificar_email.html', ctx)
-
-                profile, _ = UserProfile.objects.select_for_update().get_or_create(user=user)
-
-                if profile.email_verified:
-                    messages.success(request, "¡Tu correo ya está verificado! Podés iniciar sesión ahora.")
-                    request.session.pop('verify_email', None)
-                    return redirect('login')
-
-                now = timezone.now()
-
-                # Expirado
-                if not profile.verification_expires_at or now > profile.verification_expires_at:
-                    messages.warning(request, "El código de verificación expiró. Podés solicitar uno nuevo haciendo clic en 'Reenviar código'.")
-                    return render(request, 'registration/verificar_email.html', ctx)
-
-                # Código incorrecto
-                if not _code_is_valid(profile.email_verification_code, code_in):
-                    profile.verification_tries = F("verification_tries") + 1
-                    profile.save(update_fields=["verification_tries"])
-                    profile.refresh_from_db(fields=["verification_tries"])
+            # UPDATEs condicionales, sin bloquear filas (core/verificacion.py)
+            resultado = verificar_codigo(email, code_in)
+        except Exception as e:
+            logger.exception("[verificar_email] Error general: %s", e)
+            messages.error(request, "Ocurrió un error. Probá de nuevo más tarde.")
+            return render(request, 'registration/verificar_email.html', ctx)
 
-                    if profile.verification_tries >= MAX_TRIES:
-                        profile.verification_tries = 0
-                        profile.save(update_fields=["verification_tries"])
-                        start_cooldown(email)
-                        messages.error(
-                            request,
-                            f"Superaste el número máximo de intentos ({MAX_TRIES}). Por seguridad, esperá 1 minuto y luego podés reenviar un nuevo código."
-                        )
-                        return render(request, 'registration/verificar_email.html', ctx)
-
-                    restantes = MAX_TRIES - profile.verification_tries
-                    messages.error(request, f"Código incorrecto. Te quedan {restantes} intento(s) antes de que se bloquee temporalmente.")
-                    return render(request, 'registration/verificar_email.html', ctx)
-
-                # Éxito
-                profile.email_verified = True
-                profile.email_verification_code = None
-                profile.verification_expires_at = None
-                profile.verification_tries = 0
-                profile.save(update_fields=[
-                    "email_verified", "email_verification_code",
-                    "verification_expires_at", "verification_tries"
-                ])
+        if resultado.estado == verificacion.SIN_CUENTA:
+            messages.error(request, f"No existe una cuenta con el correo '{email}'. Verificá que hayas ingresado el correo correcto.")
+            return render(request, 'registration/verificar_email.html', ctx)
 
+        if resultado.estado == verificacion.YA_VERIFICADO:
+            messages.success(request, "¡Tu correo ya está verificado! Podés iniciar sesión ahora.")
             request.session.pop('verify_email', None)
-            messages.success(request, f"¡Excelente! Tu email '{email}' ha sido verificado correctamente. Ya podés iniciar sesión y disfrutar de todos los servicios.")
             return redirect('login')
 
-        except Exception as e:
-            logger.exception("[verificar_email] Error general: %s", e)
-            messages.error(request, "Ocurrió un error. Probá de nuevo más tarde.")
+        if resultado.estado == verificacion.VENCIDO:
+            messages.warning(request, "El código de verificación expiró. Podés solicitar uno nuevo haciendo clic en 'Reenviar código'.")
             return render(request, 'registration/verificar_email.html', ctx)
 
+        if resultado.estado == verificacion.BLOQUEADO:
+            messages.error(
+                request,
+                f"Superaste el número máximo de intentos ({MAX_TRIES}). Por seguridad, esperá 1 minuto y luego podés reenviar un nuevo código."
+            )
+            return render(request, 'registration/verificar_email.html', ctx)
+
+        if resultado.estado == verificacion.INCORRECTO:
+            messages.error(request, f"Código incorrecto. Te quedan {resultado.restantes} intento(s) antes de que se bloquee temporalmente.")
+            return render(request, 'registration/verificar_email.html', ctx)
+
+        # Éxito
+        request.session.pop('verify_email', None)
+        messages.success(request, f"¡Excelente! Tu email '{email}' ha sido verificado correctamente. Ya podés iniciar sesión y disfrutar de todos los servicios.")
+        return redirect('login')
+
     # GET
     ctx = {
         "email": request.user.email if request.user.is_authenticated else request.session.get('verify_email', '')
@@ -489,41 +593,24 @@ def reenviar_codigo(request):
         return redirect('core:verificar_email')
 
     try:
-        with transaction.atomic():
-            user = (
-                User.objects
-                .select_for_update()
-                .filter(email__iexact=email)
-                .first()
-            )
-            if not user:
-                messages.error(request, f"No existe una cuenta con el correo '{email}'. Verificá que hayas ingresado el correo correcto.")
-                return redirect('core:verificar_email')
-
-            profile, _ = UserProfile.objects.select_for_update().get_or_create(user=user)
-
-            if profile.email_verified:
-                messages.success(request, "¡Ese correo ya está verificado! Podés iniciar sesión ahora.")
-                return redirect('login')
-
-            # Generar y enviar un nuevo código
-            profile.set_new_code(minutes=WINDOW_MIN)
-            profile.verification_tries = 0  # limpio intentos al reenviar
-            profile.save(update_fields=["email_verification_code", "verification_expires_at", "verification_tries"])
-
-            EmailService.send_verification(
-                email=email,
-                code=profile.email_verification_code,
-                minutos=WINDOW_MIN
-            )
-            mark_reenviado(email)
-
-            messages.success(request, f"¡Nuevo código enviado! Te enviamos un código de verificación a {email}. Revisá tu correo y seguí las instrucciones.")
-
+        resultado = emitir_codigo(email)
     except Exception as e:
+        liberar_reenvio(email)
         logger.exception("[reenviar_codigo] Error: %s", e)
         messages.error(request, "No pudimos reenviar el código. Verificá que el correo sea correcto e intentá más tarde.")
+        return redirect('core:verificar_email')
+
+    if resultado.estado == verificacion.SIN_CUENTA:
+        liberar_reenvio(email)
+        messages.error(request, f"No existe una cuenta con el correo '{email}'. Verificá que hayas ingresado el correo correcto.")
+        return redirect('core:verificar_email')
 
+    if resultado.estado == verificacion.YA_VERIFICADO:
+        liberar_reenvio(email)
+        messages.success(request, "¡Ese correo ya está verificado! Podés iniciar sesión ahora.")
+        return redirect('login')
+
+    messages.success(request, f"¡Nuevo código enviado! Te enviamos un código de verificación a {email}. Revisá tu correo y seguí las instrucciones.")
     return redirect('core:verificar_email')
 
 def verificar_email_obligatorio(request):
@@ -546,77 +633,48 @@ def verificar_email_obligatorio(request):
             return render(request, 'registration/verificar_email_obligatorio.html', {'email': email})
 
         try:
-            with transaction.atomic():
-                user = (
-                    User.objects
-                    .select_for_update()
-                    .filter(email__iexact=email)
-                    .first()
-                )
-                if not user:
-                    messages.error(request, f"No existe una cuenta con el correo '{email}'. Verificá que hayas ingresado el correo correcto.")
-                    return render(request, 'registration/verificar_email_obligatorio.html', {'email': email})
-
-                profile, _ = UserProfile.objects.select_for_update().get_or_create(user=user)
+            # UPDATEs condicionales, sin bloquear filas (core/verificacion.py)
+            resultado = verificar_codigo(email, code_in)
+        except Exception as e:
+            logger.exception("[verificar_email_obligatorio] Error general: %s", e)
+            messages.error(request, "Ocurrió un error. Probá de nuevo más tarde.")
+            return render(request, 'registration/verificar_email_obligatorio.html', {'email': email})
 
-                if profile.email_verified:
-                    # Limpiar sesión y redirigir al login
-                    request.session.pop('user_needs_verification', None)
-                    request.session.pop('verify_email', None)
-                    messages.success(request, "¡Tu correo ya está verificado! Ya podés iniciar sesión.")
-                    return redirect('login')
+        if resultado.estado == verificacion.SIN_CUENTA:
+            messages.error(request, f"No existe una cuenta con el correo '{email}'. Verificá que hayas ingresado el correo correcto.")
+            return render(request, 'registration/verificar_email_obligatorio.html', {'email': email})
 
-                now = timezone.now()
+        if resultado.estado == verificacion.YA_VERIFICADO:
+            # Limpiar sesión y redirigir al login
+            request.session.pop('user_needs_verification', None)
+            request.session.pop('verify_email', None)
+            messages.success(request, "¡Tu correo ya está verificado! Ya podés iniciar sesión.")
+            return redirect('login')
 
-                # Expirado
-                if not profile.verification_expires_at or now > profile.verification_expires_at:
-                    messages.warning(request, "El código de verificación expiró. Podés solicitar uno nuevo haciendo clic en 'Reenviar código'.")
-                    return render(request, 'registration/verificar_email_obligatorio.html', {'email': email})
+        if resultado.estado == verificacion.VENCIDO:
+            messages.warning(request, "El código de verificación expiró. Podés solicitar uno nuevo haciendo clic en 'Reenviar código'.")
+            return render(request, 'registration/verificar_email_obligatorio.html', {'email': email})
 
-                # Código incorrecto
-                if not _code_is_valid(profile.email_verification_code, code_in):
-                    profile.verification_tries = F("verification_tries") + 1
-                    profile.save(update_fields=["verification_tries"])
-                    profile.refresh_from_db(fields=["verification_tries"])
+        if resultado.estado == verificacion.BLOQUEADO:
+            messages.error(
+                request,
+                f"Superaste el número máximo de intentos ({MAX_TRIES}). Por seguridad, esperá 1 minuto y luego podés reenviar un nuevo código."
+            )
+            return render(request, 'registration/verificar_email_obligatorio.html', {'email': email})
 
-                    if profile.verification_tries >= MAX_TRIES:
-                        profile.verification_tries = 0
-                        profile.save(update_fields=["verification_tries"])
-                        start_cooldown(email)
-                        messages.error(
-                            request,
-                            f"Superaste el número máximo de intentos ({MAX_TRIES}). Por seguridad, esperá 1 minuto y luego podés reenviar un nuevo código."
-                        )
-                        return render(request, 'registration/verificar_email_obligatorio.html', {'email': email})
-
-                    restantes = MAX_TRIES - profile.verification_tries
-                    messages.error(request, f"Código incorrecto. Te quedan {restantes} intento(s) antes de que se bloquee temporalmente.")
-                    return render(request, 'registration/verificar_email_obligatorio.html', {'email': email})
-
-                # Éxito - verificar email
-                profile.email_verified = True
-                profile.email_verification_code = None
-                profile.verification_expires_at = None
-                profile.verification_tries = 0
-                profile.save(update_fields=[
-                    "email_verified", "email_verification_code",
-                    "verification_expires_at", "verification_tries"
-                ])
-
-                # Hacer login automático después de verificar
-                auth_login(request, user)
+        if resultado.estado == verificacion.INCORRECTO:
+            messages.error(request, f"Código incorrecto. Te quedan {resultado.restantes} intento(s) antes de que se bloquee temporalmente.")
+            return render(request, 'registration/verificar_email_obligatorio.html', {'email': email})
 
-            # Limpiar sesión
-            request.session.pop('user_needs_verification', None)
-            request.session.pop('verify_email', None)
-            
-            messages.success(request, f"¡Excelente! Tu email '{email}' ha sido verificado correctamente. ¡Bienvenido!")
-            return redirect('core:privada')
+        # Éxito - login automático después de verificar
+        auth_login(request, resultado.user, backend=BACKEND_CON_PERFIL)
 
-        except Exception as e:
-            logger.exception("[verificar_email_obligatorio] Error general: %s", e)
-            messages.error(request, "Ocurrió un error. Probá de nuevo más tarde.")
-            return render(request, 'registration/verificar_email_obligatorio.html', {'email': email})
+        # Limpiar sesión
+        request.session.pop('user_needs_verification', None)
+        request.session.pop('verify_email', None)
+        
+        messages.success(request, f"¡Excelente! Tu email '{email}' ha sido verificado correctamente. ¡Bienvenido!")
+        return redirect('core:privada')
 
     # GET
     return render(request, 'registration/verificar_email_obligatorio.html', {'email': email})
@@ -644,47 +702,27 @@ def reenviar_codigo_obligatorio(request):
         return redirect('core:verificar_email_obligatorio')
 
     try:
-        with transaction.atomic():
-            user = (
-                User.objects
-                .select_for_update()
-                .filter(email__iexact=email)
-                .first()
-            )
-            if not user:
-                messages.error(request, f"No existe una cuenta con el correo '{email}'. Verificá que hayas ingresado el correo correcto.")
-                return redirect('core:verificar_email_obligatorio')
-
-            profile, _ = UserProfile.objects.select_for_update().get_or_create(user=user)
-
-            if profile.email_verified:
-                messages.success(request, "¡Ese correo ya está verificado! Podés iniciar sesión ahora.")
-                request.session.pop('user_needs_verification', None)
-                request.session.pop('verify_email', None)
-                return redirect('login')
-
-            # Generar y enviar un nuevo código
-            profile.set_new_code(minutes=WINDOW_MIN)
-            profile.verification_tries = 0  # limpio intentos al reenviar
-            profile.save(update_fields=["email_verification_code", "verification_expires_at", "verification_tries"])
-
-            EmailService.send_verification(
-                email=email,
-                code=profile.email_verification_code,
-                minutos=WINDOW_MIN
-            )
-            mark_reenviado(email)
-
-            messages.success(request, f"¡Nuevo código enviado! Te enviamos un código de verificación a {email}. Revisá tu correo y seguí las instrucciones.")
-
+        resultado = emitir_codigo(email)
     except Exception as e:
+        liberar_reenvio(email)
         logger.exception("[reenviar_codigo_obligatorio] Error: %s", e)
         messages.error(request, "No pudimos reenviar el código. Verificá que el correo sea correcto e intentá más tarde.")
+        return redirect('core:verificar_email_obligatorio')
 
-    return redirect('core:verificar_email_obligatorio')
+    if resultado.estado == verificacion.SIN_CUENTA:
+        liberar_reenvio(email)
+        messages.error(request, f"No existe una cuenta con el correo '{email}'. Verificá que hayas ingresado el correo correcto.")
+        return redirect('core:verificar_email_obligatorio')
+
+    if resultado.estado == verificacion.YA_VERIFICADO:
+        liberar_reenvio(email)
+        messages.success(request, "¡Ese correo ya está verificado! Podés iniciar sesión ahora.")
+        request.session.pop('user_needs_verification', None)
+        request.session.pop('verify_email', None)
+        return redirect('login')
 
-def _code_is_valid(stored: str | None, given: str | None) -> bool:
-    return hmac.compare_digest((stored or ""), (given or ""))
+    messages.success(request, f"¡Nuevo código enviado! Te enviamos un código de verificación a {email}. Revisá tu correo y seguí las instrucciones.")
+    return redirect('core:verificar_email_obligatorio')
 
 @login_required
 @email_verified_required
@@ -735,50 +773,9 @@ def agregar_publicacion(request):
                     })
                 formset.save()
 
-                # Notificaciones a usuarios que marcaron este comedor como favorito
-                def _send_notifications():
-                    try:
-                        # Favoritos del mismo comedor, con join hasta auth.User para acceder a email
-                        favs = (
-                            Favoritos.objects
-                            .filter(id_comedor=publicacion.id_comedor_id)
-                            .select_related('id_usuario__user')  # UserProfile.user
-                        )
-
-                        autor_id = request.user.id
-                        autor_email = (request.user.email or "").strip().lower()
-
-                        emails = set()
-                        for fav in favs:
-                            up = fav.id_usuario       # UserProfile
-                            u = up.user               # auth.User
-
-                            # Opcional: exigir email verificado
-                            if hasattr(up, "email_verified") and not up.email_verified:
-                                continue
-                            if not getattr(u, "is_active", True):
-                                continue
-                            if u.id == autor_id:
-                                continue
-
-                            e = (u.email or "").strip()
-                            if e and e.lower() != autor_email:
-                                emails.add(e)
-
-                        if not emails:
-                            return
-
-                        EmailService.send_new_publication(
-                            emails=list(emails),
-                            comedor_nombre=publicacion.id_comedor.nombre,
-                            titulo=publicacion.titulo,
-                        )
-                    except Exception:
-                        import logging
-                        logging.getLogger(__name__).exception("Fallo al enviar notificaciones de favoritos")
-
-                # Se ejecuta solo si la transacción se confirma
-                transaction.on_commit(_send_notifications)
+                # Aviso a quienes tienen el comedor en favoritos: el worker de correos
+                # los recorre por tramos (core/difusion.py); acá sólo se programa
+                difundir_publicacion(publicacion, autor=request.user)
 
             messages.success(request, "¡Publicación creada exitosamente!")
             # Asegurate que este nombre de URL exista y reciba id_comedor
@@ -827,15 +824,30 @@ def eliminar_publicacion(request, id_publicacion):
 
 def listar_publicaciones(request, id_comedor):
     comedor = get_object_or_404(Comedor, pk=id_comedor)
-    publicaciones = (
+    base = (
         Publicacion.objects
         .filter(id_comedor=id_comedor)
         .select_related("id_comedor", "id_tipo_publicacion")
-        .order_by("-fecha_inicio")
+        .prefetch_related("publicacionarticulo_set")
     )
+    # Las vencidas se paginan por cursor (las más recientes primero)
+    vencidas = paginar_keyset(
+        base.vencidas(),
+        cursor=request.GET.get("cursor"),
+        campos=("-fecha_fin", "-id"),
+        page_size=PUBLICACIONES_VENCIDAS_PAGE_SIZE,
+    )
+
+    # Las vigentes van primero y sólo en la primera página (también si el cursor era
+    # inválido y paginar_keyset volvió al principio)
+    vigentes = [] if vencidas.has_previous else list(base.vigentes().order_by("-fecha_inicio"))
 
     return render(request, "core/listar_publicaciones.html", {
-        "publicaciones": publicaciones,
+        "publicaciones": vigentes + vencidas.items,
+        "vigentes_count": len(vigentes),
+        "pagina": vencidas,
+        "next_url": _url_con_cursor(request, vencidas.next_cursor),
+        "prev_url": _url_con_cursor(request, vencidas.prev_cursor),
         "comedor": comedor
     })
 
@@ -931,27 +943,62 @@ def editar_donacion(request, donacion_id):
 
 @login_required
 def listar_favoritos(request):
-    if isinstance(request.user, str):
-        user = get_object_or_404(User, username=request.user)
-    else:
-        user = request.user
-
-        # Obtener UserProfile asociado (OneToOne o FK según tu modelo)
-    profile = getattr(user, "userprofile", None)
+    # UserProfile asociado (ya cargado junto con request.user)
+    profile = perfil_de(request)
     if profile is None:
-        profile = get_object_or_404(UserProfile, user=user)
+        raise Http404("El usuario no tiene perfil.")
 
     # Filtrar usando la instancia de UserProfile
     favoritos = Favoritos.objects.filter(id_usuario=profile)
     return render(request, 'core/listar_favoritos.html', {'favoritos': favoritos})
 
-def listar_todas_donaciones(request):
-    donaciones = Donacion.objects.all()
-    return render(request, 'core/listar_donaciones.html', {'donaciones': donaciones})
+def _ledger_donaciones(request, donaciones):
+    """
+    Contexto del libro de donaciones: una página (por cursor) con comedor, publicación
+    e ítems precargados, más los totales calculados con agregados en SQL.
+    La cantidad de consultas es fija, no depende de cuántas donaciones haya.
+    """
+    pagina = paginar_keyset(
+        donaciones
+        .select_related("id_comedor", "id_publicacion")
+        .prefetch_related("items")
+        .annotate(total_cantidad=models.Sum("items__cantidad")),
+        cursor=request.GET.get("cursor"),
+        campos=("-fecha_alta", "-id"),
+        page_size=DONACIONES_PAGE_SIZE,
+    )
+
+    totales = donaciones.aggregate(
+        donaciones=models.Count("id"),
+        comedores=models.Count("id_comedor", distinct=True),
+    )
+    totales.update(
+        DonacionItem.objects
+        .filter(id_donacion__in=donaciones.values("id"))
+        .aggregate(items=models.Count("id"), cantidad=models.Sum("cantidad"))
+    )
+    por_comedor = list(
+        donaciones
+        .order_by()
+        .values("id_comedor", "id_comedor__nombre")
+        .annotate(donaciones=models.Count("id"))
+        .order_by("-donaciones", "id_comedor__nombre")[:10]
+    )
+
+    return {
+        "donaciones": pagina,
+        "pagina": pagina,
+        "next_url": _url_con_cursor(request, pagina.next_cursor),
+        "prev_url": _url_con_cursor(request, pagina.prev_cursor),
+        "total_donaciones": totales["donaciones"] or 0,
+        "total_comedores": totales["comedores"] or 0,
+        "total_items": totales["items"] or 0,
+        "total_cantidad": totales["cantidad"] or 0,
+        "donaciones_por_comedor": por_comedor,
+    }
 
-def listar_donaciones_usuario(request, id_usuario):
-    donaciones = Donacion.objects.filter(id_usuario_id=id_usuario)
-    return render(request, 'core/listar_donaciones.html', {'donaciones': donaciones})
+def listar_todas_donaciones(request):
+    return render(request, 'core/listar_donaciones.html', _ledger_donaciones(request, Donacion.objects.all()))
 
 @require_GET
 def listar_articulos_disponibles_por_publicacion(request, id_publicacion):
@@ -973,12 +1020,31 @@ def listar_articulos_disponibles_por_publicacion(request, id_publicacion):
     except Exception as e:
         return JsonResponse({"error": str(e)}, status=500)
 
+def _cantidades_articulos(articulos) -> dict[str, int]:
+    """Nombre -> cantidad de la lista del modal (strings o {"nombre", "cantidad"}); los repetidos suman."""
+    cantidades: dict[str, int] = {}
+    for a in articulos:
+        if isinstance(a, dict):
+            nombre = (a.get("nombre") or a.get("articulo") or "").strip()
+            cantidad = int(a.get("cantidad", 1))   # 0 o negativos los rechaza quien llama
+        else:
+            nombre = str(a).strip()
+            cantidad = 1
+
+        if not nombre:
+            continue
+        cantidades[nombre] = cantidades.get(nombre, 0) + cantidad
+    return cantidades
+
 @require_POST
+@limitar("donacion", ip="30/m", usuario="10/m", json=True)
 @login_required
+@idempotente
 def api_enviar_donacion(request):
     """
     API: Crea una donación desde el modal y notifica al comedor.
     POST /api/donaciones/enviar/
+    Con header Idempotency-Key, los reintentos reciben la respuesta original (core/idempotencia.py).
     """
     try:
         data = json.loads(request.body.decode("utf-8"))
@@ -994,6 +1060,14 @@ def api_enviar_donacion(request):
             return JsonResponse({"error": "Debe seleccionar al menos un artículo."}, status=400)
         if not telefono:
             return JsonResponse({"error": "Teléfono de contacto requerido."}, status=400)
+        try:
+            cantidades = _cantidades_articulos(articulos)
+        except (AttributeError, TypeError, ValueError):
+            return JsonResponse({"error": "Artículos inválidos."}, status=400)
+        if not cantidades:
+            return JsonResponse({"error": "Debe seleccionar al menos un artículo."}, status=400)
+        if any(cantidad < 1 for cantidad in cantidades.values()):
+            return JsonResponse({"error": "Las cantidades deben ser mayores a cero."}, status=400)
 
         # Obtener la publicación y su comedor
         try:
@@ -1017,51 +1091,27 @@ def api_enviar_donacion(request):
                 telefono=telefono,
             )
 
-            # Crear ítems
-            nombres_para_mail: list[str] = []
-            for a in articulos:
-                if isinstance(a, dict):
-                    nombre = (a.get("nombre") or a.get("articulo") or "").strip()
-                    cantidad = int(a.get("cantidad") or 1)
-                else:
-                    nombre = str(a).strip()
-                    cantidad = 1
-
-                if not nombre:
-                    continue
-
-                DonacionItem.objects.create(
-                    id_donacion=donacion,
-                    nombre_articulo=nombre,
-                    cantidad=cantidad,
+            # Crear ítems (un solo INSERT; el mismo artículo repetido suma cantidades)
+            DonacionItem.objects.bulk_create([
+                DonacionItem(id_donacion=donacion, nombre_articulo=nombre, cantidad=cantidad)
+                for nombre, cantidad in cantidades.items()
+            ])
+            nombres_para_mail = [
+                f"{nombre} (x{cantidad})" if cantidad > 1 else nombre
+                for nombre, cantidad in cantidades.items()
+            ]
+
+            # Aviso al dueño del comedor: queda en el outbox (o en su resumen) con la donación
+            owner_user = getattr(publicacion.id_comedor, "usuario", None)
+            if owner_user is not None:
+                avisar_donacion(
+                    donacion,
+                    owner_user,
+                    comedor_nombre=publicacion.id_comedor.nombre,
+                    publicacion_titulo=publicacion.titulo,
+                    donante=donante_nombre,
+                    articulos=nombres_para_mail,
                 )
-                nombres_para_mail.append(f"{nombre} (x{cantidad})" if cantidad > 1 else nombre)
-
-            # Callback para notificar al comedor
-            def _notify_comedor():
-                try:
-                    # Email del dueño del comedor
-                    owner_user = getattr(publicacion.id_comedor, "usuario", None)
-                    owner_email = getattr(owner_user, "email", "") or ""
-
-                    if not owner_email.strip():
-                        return  # comedor no tiene mail
-
-                    # Enviar correo al dueño del comedor
-                    EmailService.send_new_donation(
-                        email=owner_email.strip(),
-                        comedor_nombre=publicacion.id_comedor.nombre,
-                        publicacion_titulo=publicacion.titulo,
-                        donante=donante_nombre,
-                        articulos=nombres_para_mail,
-                    )
-
-                except Exception:
-                    import logging
-                    logging.getLogger(__name__).exception("Fallo al enviar mail de donación")
-
-            # Enviar el mail solo si la transacción se confirma
-            transaction.on_commit(_notify_comedor)
 
         return JsonResponse({
             "success": True,
@@ -1074,6 +1124,158 @@ def api_enviar_donacion(request):
     except Exception as e:
         return JsonResponse({"error": str(e)}, status=500)
 
+@require_POST
+@limitar("donacion_lote", ip="30/m", usuario="10/m", json=True)
+@login_required
+@idempotente
+def api_enviar_donaciones_lote(request):
+    """
+    API: Donaciones a varias publicaciones de UN comedor en un solo pedido.
+    POST /api/donaciones/enviar-lote/
+    Body JSON: {"telefono": "...", "donaciones": [
+        {"publicacion_id": 1, "articulos": [{"nombre": "Arroz", "cantidad": 2}, "Leche"]}, ...
+    ]}
+
+    Todo o nada: cada conjunto se valida contra el catálogo de su publicación (una sola
+    consulta para todas), se guarda en una transacción con inserts por lote y el dueño
+    recibe un único aviso. Con header Idempotency-Key, los reintentos no duplican.
+    """
+    try:
+        data = json.loads(request.body.decode("utf-8") or "{}")
+        if not isinstance(data, dict):
+            return JsonResponse({"error": "JSON inválido."}, status=400)
+
+        conjuntos = data.get("donaciones")
+        telefono = (data.get("telefono") or "").strip()
+
+        # Validaciones básicas
+        if not isinstance(conjuntos, list) or not conjuntos:
+            return JsonResponse({"error": "Debe enviar al menos una donación."}, status=400)
+        if len(conjuntos) > DONACIONES_LOTE_MAX:
+            return JsonResponse({"error": f"Como máximo {DONACIONES_LOTE_MAX} publicaciones por envío."}, status=400)
+        if not telefono:
+            return JsonResponse({"error": "Teléfono de contacto requerido."}, status=400)
+
+        perfil = perfil_de(request)
+        if perfil is None:
+            return JsonResponse({"error": "Perfil de usuario no encontrado."}, status=400)
+
+        # Artículos pedidos por publicación (la misma publicación repetida se junta)
+        errores: list[str] = []
+        pedidos: dict[int, dict[str, int]] = {}
+        for i, conjunto in enumerate(conjuntos, start=1):
+            try:
+                # 1e400 o Infinity llegan como float infinito: int() da OverflowError
+                publicacion_id = int(conjunto.get("publicacion_id"))
+                cantidades = _cantidades_articulos(conjunto.get("articulos") or [])
+            except (AttributeError, TypeError, ValueError, OverflowError):
+                errores.append(f"Donación {i}: publicación o artículos inválidos.")
+                continue
+            if not 0 < publicacion_id <= ID_MAX:
+                errores.append(f"Donación {i}: publicación o artículos inválidos.")
+                continue
+            if not cantidades:
+                errores.append(f"Donación {i}: debe seleccionar al menos un artículo.")
+                continue
+            if any(cantidad < 1 for cantidad in cantidades.values()):
+                errores.append(f"Donación {i}: las cantidades deben ser mayores a cero.")
+                continue
+            pedido = pedidos.setdefault(publicacion_id, {})
+            for nombre, cantidad in cantidades.items():
+                pedido[nombre] = pedido.get(nombre, 0) + cantidad
+
+        # Publicaciones y catálogo de artículos de todas ellas: dos consultas en total
+        publicaciones = {
+            pub.pk: pub
+            for pub in Publicacion.objects.select_related("id_comedor", "id_comedor__usuario").filter(pk__in=pedidos)
+        }
+        catalogo: dict[int, dict[str, str]] = {}
+        for pub_id, nombre in (
+            PublicacionArticulo.objects
+            .filter(id_publicacion_id__in=publicaciones)
+            .values_list("id_publicacion_id", "nombre_articulo")
+        ):
+            catalogo.setdefault(pub_id, {})[nombre.strip().lower()] = nombre
+
+        validados: dict[int, dict[str, int]] = {}
+        for pub_id, pedido in pedidos.items():
+            pub = publicaciones.get(pub_id)
+            if pub is None:
+                errores.append(f"Publicación {pub_id}: no existe.")
+                continue
+            try:
+                _assert_publicacion_vigente(pub)
+            except ValidationError:
+                errores.append(f"Publicación {pub_id}: no está vigente.")
+                continue
+            permitidos = catalogo.get(pub_id, {})
+            ajenos = [nombre for nombre in pedido if nombre.lower() not in permitidos]
+            if ajenos:
+                errores.append(f"Publicación {pub_id}: {', '.join(ajenos)} no pertenece(n) a la publicación.")
+                continue
+            # Nombres como figuran en el catálogo
+            items: dict[str, int] = {}
+            for nombre, cantidad in pedido.items():
+                oficial = permitidos[nombre.lower()]
+                items[oficial] = items.get(oficial, 0) + cantidad
+            validados[pub_id] = items
+
+        # Sólo cuentan las que pasaron la validación; va primero porque invalida todo el envío
+        if len({publicaciones[pub_id].id_comedor_id for pub_id in validados}) > 1:
+            errores.insert(0, "Todas las publicaciones deben ser del mismo comedor.")
+        if errores:
+            return JsonResponse({"error": "Revisá las donaciones: no se guardó ninguna.", "errores": errores}, status=400)
+
+        comedor = publicaciones[next(iter(validados))].id_comedor
+        donante_nombre = request.user.get_full_name() or request.user.username or "Donante"
+        orden = list(validados)
+
+        with transaction.atomic():
+            donaciones = Donacion.objects.bulk_create([
+                Donacion(
+                    id_usuario=perfil,
+                    id_comedor=comedor,
+                    id_publicacion=publicaciones[pub_id],
+                    telefono=telefono,
+                )
+                for pub_id in orden
+            ])
+            DonacionItem.objects.bulk_create([
+                DonacionItem(id_donacion=donacion, nombre_articulo=nombre, cantidad=cantidad)
+                for donacion, pub_id in zip(donaciones, orden)
+                for nombre, cantidad in validados[pub_id].items()
+            ])
+
+            # Un único aviso al dueño con todas las publicaciones (outbox o resumen)
+            if comedor.usuario is not None:
+                avisar_donaciones(
+                    [
+                        (
+                            donacion,
+                            publicaciones[pub_id].titulo,
+                            [f"{nombre} (x{cantidad})" if cantidad > 1 else nombre
+                             for nombre, cantidad in validados[pub_id].items()],
+                        )
+                        for donacion, pub_id in zip(donaciones, orden)
+                    ],
+                    comedor.usuario,
+                    comedor_nombre=comedor.nombre,
+                    donante=donante_nombre,
+                )
+
+        return JsonResponse({
+            "success": True,
+            "message": f"{len(donaciones)} donación(es) enviada(s) exitosamente.",
+            "donacion_ids": [donacion.id for donacion in donaciones],
+        })
+
+    except json.JSONDecodeError:
+        return JsonResponse({"error": "JSON inválido."}, status=400)
+    except Exception:
+        # El detalle queda en el log, no en la respuesta
+        logger.exception("[api_enviar_donaciones_lote] Error inesperado")
+        return JsonResponse({"error": "No se pudieron guardar las donaciones. Probá de nuevo más tarde."}, status=500)
+
 def _assert_publicacion_vigente(pub: Publicacion):
     """Opcional: exigir publicación vigente al momento de donar."""
     now = timezone.now()
@@ -1081,6 +1283,7 @@ def _assert_publicacion_vigente(pub: Publicacion):
         raise ValidationError("La publicación no está vigente.")
 
 @require_POST
+@limitar("donacion", ip="30/m", usuario="10/m", json=True)
 @transaction.atomic
 def api_crear_donacion(request, comedor_id: int, publicacion_id: int):
     """
@@ -1107,9 +1310,8 @@ def api_crear_donacion(request, comedor_id: int, publicacion_id: int):
 
     # Obtené el perfil si tu Donacion espera UserProfile:
     # (si Donacion.id_usuario apunta a UserProfile)
-    try:
-        usuario = UserProfile.objects.select_related("user").get(user=request.user)
-    except UserProfile.DoesNotExist:
+    usuario = perfil_de(request)
+    if usuario is None:
         return JsonResponse({"ok": False, "error": "Perfil de usuario no encontrado."}, status=400)
 
     # --- Validación artículos ---
@@ -1162,43 +1364,98 @@ def api_crear_donacion(request, comedor_id: int, publicacion_id: int):
     ])
 
     # --- Notificación al dueño del comedor ---
-    def _notify_owner():
-        try:
-            owner_user = getattr(comedor, "usuario", None)
-            owner_email = getattr(owner_user, "email", None)
-            if not owner_email:
-                return
-
-            comedor_nombre = getattr(comedor, "nombre", f"Comedor #{comedor.id}")
-            publicacion_titulo = getattr(pub, "titulo", f"Publicación #{pub.id}")
-            donante_nombre = getattr(usuario.user, "get_full_name", lambda: "")() or usuario.user.username
-
-            EmailService.send_new_donation(
-                email=owner_email,
-                comedor_nombre=comedor_nombre,
-                publicacion_titulo=publicacion_titulo,
-                donante=donante_nombre,
-                articulos=validos,
-            )
-
-        except Exception:
-            import logging
-            logging.getLogger(__name__).exception("Fallo al enviar notificación de donación")
-
-    # MUY IMPORTANTE: encolar el envío POST-COMMIT
-    transaction.on_commit(_notify_owner)
+    # Se encola (outbox o resumen) dentro de la misma transacción (la vista es atomic)
+    owner_user = getattr(comedor, "usuario", None)
+    if owner_user is not None:
+        comedor_nombre = getattr(comedor, "nombre", f"Comedor #{comedor.id}")
+        publicacion_titulo = getattr(pub, "titulo", f"Publicación #{pub.id}")
+        donante_nombre = getattr(usuario.user, "get_full_name", lambda: "")() or usuario.user.username
+
+        avisar_donacion(
+            don,
+            owner_user,
+            comedor_nombre=comedor_nombre,
+            publicacion_titulo=publicacion_titulo,
+            donante=donante_nombre,
+            articulos=validos,
+        )
 
     return JsonResponse({"ok": True, "donacion_id": don.id}, status=201)
 
+@require_GET
+def exportar_comedores(request):
+    """
+    API: Exporta todos los comedores en streaming.
+    GET /api/comedores/exportar/?formato=jsonl|csv&incluir=publicaciones
+    """
+    formato = (request.GET.get("formato") or "jsonl").lower()
+    incluir_publicaciones = request.GET.get("incluir") == "publicaciones"
+    filas = iter_comedores(incluir_publicaciones=incluir_publicaciones)
+
+    if formato == "csv":
+        response = StreamingHttpResponse(
+            stream_csv(filas, incluir_publicaciones=incluir_publicaciones),
+            content_type="text/csv; charset=utf-8",
+        )
+        response["Content-Disposition"] = 'attachment; filename="comedores.csv"'
+    elif formato == "jsonl":
+        response = StreamingHttpResponse(stream_jsonl(filas), content_type="application/x-ndjson; charset=utf-8")
+        response["Content-Disposition"] = 'attachment; filename="comedores.jsonl"'
+    else:
+        return JsonResponse({"error": "Formato inválido. Usá 'jsonl' o 'csv'."}, status=400)
+    return response
+
 def buscar(request):
     query = request.GET.get('q', '')
-    results = SearchQuerySet().filter(content=query) if query else []
-    return render(request, 'core/buscar.html', {'results': results, 'query': query})
+    try:
+        page = int(request.GET.get('page', 1))
+    except ValueError:
+        page = 1
+    resultado = buscar_pagina(query, page) if query else None
+
+    def _url_pagina(n):
+        params = request.GET.copy()
+        params['page'] = n
+        return f"?{params.urlencode()}"
+
+    return render(request, 'core/buscar.html', {
+        'results': resultado['comedores'] if resultado else [],
+        'publicaciones': resultado['publicaciones'] if resultado else [],
+        'resultado': resultado,
+        'prev_url': _url_pagina(page - 1) if resultado and resultado['has_previous'] else None,
+        'next_url': _url_pagina(page + 1) if resultado and resultado['has_next'] else None,
+        'query': query,
+        'favoritos_ids': ids_favoritos(request),
+    })
+
+def _estado_reconstruccion(job):
+    return {
+        "id": job.pk,
+        "estado": job.estado,
+        "total": job.total,
+        "procesados": job.procesados,
+        "porcentaje": job.porcentaje,
+        "error": job.error,
+        "status_url": reverse('rebuild_index_status', args=[job.pk]),
+    }
 
 @staff_member_required
 def rebuild_index_view(request):
-    update_index.Command().handle(interactive=False, verbosity=1)
-    return HttpResponse("Índice de búsqueda reconstruido.")
+    """
+    Pide una reconstrucción del índice y vuelve enseguida: la hace el worker
+    `manage.py procesar_indice_busqueda`. Si ya hay una pendiente o en curso, se reutiliza.
+    """
+    job = solicitar_reconstruccion(request.user)
+    return JsonResponse(_estado_reconstruccion(job), status=202)
+
+@staff_member_required
+def rebuild_index_status(request, job_id):
+    """
+    API: progreso de una reconstrucción del índice
+    GET /rebuild_index/<id>/
+    """
+    job = get_object_or_404(ReconstruccionIndice, pk=job_id)
+    return JsonResponse(_estado_reconstruccion(job))
 
 def robots_txt(request):
     lines = [
@@ -1212,24 +1469,16 @@ def robots_txt(request):
 def listar_donaciones_usuario(request):
     user = request.user
 
-    # Intentar obtener UserProfile si existe
-    profile = getattr(user, "userprofile", None)
-    if profile is None:
-        try:
-            profile = UserProfile.objects.get(user=user)
-        except UserProfile.DoesNotExist:
-            profile = None
+    # UserProfile si existe (ya cargado junto con request.user)
+    profile = perfil_de(request)
 
     # Filtrar donaciones según la relación presente
-    try:
-        if profile is not None:
-            donaciones = Donacion.objects.filter(id_usuario=profile).select_related("id_comedor", "id_publicacion").prefetch_related("items")
-        else:
-            donaciones = Donacion.objects.filter(id_usuario__user=user).select_related("id_comedor", "id_publicacion").prefetch_related("items")
-    except Exception:
-        donaciones = Donacion.objects.none()
+    if profile is not None:
+        donaciones = Donacion.objects.filter(id_usuario=profile)
+    else:
+        donaciones = Donacion.objects.filter(id_usuario__user=user)
 
-    return render(request, "core/listar_donaciones.html", {"donaciones": donaciones})
+    return render(request, "core/listar_donaciones.html", _ledger_donaciones(request, donaciones))
 
 @login_required
 def es_dueno_comedor(request, id_comedor):
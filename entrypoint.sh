@@ -9,5 +9,8 @@ python manage.py migrate --noinput
 echo ">> Collectstatic en /app/staticfiles ..."
 python manage.py collectstatic --noinput
 
+echo ">> Iniciando workers en segundo plano ..."
+bash ./workers.sh &
+
 echo ">> Iniciando Gunicorn en 0.0.0.0:${PORT}"
 exec gunicorn config.wsgi:application --bind 0.0.0.0:${PORT}
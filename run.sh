@@ -2,4 +2,7 @@
 #!/bin/bash
 set -o errexit
 
-gunicorn config.wsgi:application
\ No newline at end of file
+# Workers en segundo plano (ver workers.sh)
+bash ./workers.sh &
+
+exec gunicorn config.wsgi:application
\ No newline at end of file
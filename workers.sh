@@ -0,0 +1,20 @@
+#!/usr/bin/env bash
+# Workers en segundo plano de la app. Los requests sólo encolan trabajo en la base
+# y estos comandos lo procesan aparte. Si alguno se cae, se reinicia.
+# Lo lanzan entrypoint.sh (Docker) y run.sh (Render) antes de gunicorn:
+#   ./workers.sh &
+
+supervisar() {
+    while true; do
+        python manage.py "$@" || echo ">> Worker '$1' terminó con error; se reinicia en 5s"
+        sleep 5
+    done
+}
+
+# Outbox de correos (verificaciones, avisos de donaciones y de publicaciones nuevas)
+supervisar procesar_correos &
+
+# Cola del índice de búsqueda (altas/cambios de comedores y publicaciones, reconstrucciones de /rebuild_index/)
+supervisar procesar_indice_busqueda &
+
+wait